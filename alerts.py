@@ -0,0 +1,115 @@
+# alerts.py
+# Seleção de vencimentos e montagem dos e-mails de aviso
+# ---------------------------------------------------------------
+# Compartilhado por notify.py e tenants.py.
+# Aqui não há rede nem SMTP: entra a carteira, saem (cliente, delta) e as
+# mensagens prontas (email.message.EmailMessage) para o mailer.
+
+import re
+from email.message import EmailMessage
+
+import expiry
+from dates import today_ordinal
+from expiry import ExpiryIndex, group_by_threshold, DEFAULT_THRESHOLDS
+from timing import timed
+
+MODES = ("resumo", "cliente", "responsavel")
+
+# ---------- Lógica de prazos ----------
+
+@timed("classify")
+def selecionar_vencimentos(clients, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Retorna (expirados, proximos) como listas de (cliente, delta) em ordem de data.
+    Com um ExpiryIndex a consulta é O(log n + k); uma lista é classificada
+    em lote com NumPy (se instalado); um gerador é consumido numa única
+    passada, guardando só o que entra no resultado.
+    """
+    hoje = today_ordinal()
+    limite = max(thresholds)
+    if isinstance(clients, list) and expiry.load_numpy() is not None:
+        ords = expiry.ordinals_of(clients)
+        exp_idx, prox_idx = expiry.select_expiring(ords, hoje, limite)
+        return ([(clients[i], int(ords[i]) - hoje) for i in exp_idx],
+                [(clients[i], int(ords[i]) - hoje) for i in prox_idx])
+    if not isinstance(clients, ExpiryIndex):
+        clients = ExpiryIndex(c for c in clients if c.ordinal is not None and c.ordinal - hoje <= limite)
+    return clients.expired(hoje), clients.expiring_between(0, limite, hoje)
+
+# ---------- E-mail ----------
+
+def compor_email(cfg, expirados, proximos, thresholds=DEFAULT_THRESHOLDS, to=None):
+    linhas = []
+    if expirados:
+        linhas.append("⚠️ Licenças vencidas:")
+        for c, delta in expirados:
+            linhas.append(f"- {c.empresa} (vencida há {-delta} dias, {c.display})")
+        linhas.append("")
+    inicio = 0
+    for limite, grupo in group_by_threshold(proximos, thresholds):
+        if grupo:
+            faixa = f"até {limite}" if inicio == 0 else f"{inicio} a {limite}"
+            linhas.append(f"📅 Vencendo em {faixa} dias:")
+            for c, delta in grupo:
+                linhas.append(f"- {c.empresa} (vence em {delta} dias, {c.display})")
+            linhas.append("")
+        inicio = limite + 1
+    if not linhas:
+        linhas.append("✅ Nenhuma licença vencida ou próxima do vencimento.")
+
+    corpo = "\n".join(linhas)
+    msg = EmailMessage()
+    msg["Subject"] = "[3N] Resumo de Licenças - Vencimentos"
+    msg["From"] = f"{cfg['FROM_NAME']} <{cfg['SMTP_EMAIL']}>"
+    msg["To"] = to or cfg["OWNER_EMAIL"]
+    msg.set_content(corpo)
+    return msg
+
+def compor_lembrete(cfg, c, delta, to):
+    """Lembrete individual para o contato do cliente."""
+    if delta < 0:
+        situacao = f"venceu há {-delta} dias ({c.display})"
+    elif delta == 0:
+        situacao = f"vence hoje ({c.display})"
+    else:
+        situacao = f"vence em {delta} dias ({c.display})"
+    msg = EmailMessage()
+    msg["Subject"] = f"[3N] Licença {c.empresa} - {'vencida' if delta < 0 else 'vencimento próximo'}"
+    msg["From"] = f"{cfg['FROM_NAME']} <{cfg['SMTP_EMAIL']}>"
+    msg["To"] = to
+    msg.set_content(
+        f"Olá,\n\nA licença de {c.empresa} {situacao}.\n"
+        "Entre em contato para providenciar a renovação.\n\n"
+        f"{cfg['FROM_NAME']}"
+    )
+    return msg
+
+def destinatarios(value):
+    """'a@x.com; b@y.com' -> 'a@x.com, b@y.com' (vazio se não houver)."""
+    return ", ".join(p for p in re.split(r"[;,\s]+", value or "") if "@" in p)
+
+@timed("compose")
+def montar_mensagens(cfg, expirados, proximos, thresholds=DEFAULT_THRESHOLDS, modo="resumo"):
+    """
+    Mensagens do envio. O dono sempre recebe o resumo completo; além dele:
+      cliente     -> um lembrete para cada cliente com EMAIL_COLUMN preenchida
+      responsavel -> um resumo por responsável (MANAGER_COLUMN) com os clientes dele
+    """
+    mensagens = [compor_email(cfg, expirados, proximos, thresholds)]
+    if modo == "cliente":
+        coluna = cfg.get("EMAIL_COLUMN", "email")
+        for c, delta in expirados + proximos:
+            to = destinatarios(c.get(coluna))
+            if to:
+                mensagens.append(compor_lembrete(cfg, c, delta, to))
+    elif modo == "responsavel":
+        coluna = cfg.get("MANAGER_COLUMN", "responsavel")
+        grupos = {}
+        for lista, pos in ((expirados, 0), (proximos, 1)):
+            for c, delta in lista:
+                to = destinatarios(c.get(coluna))
+                if to:
+                    grupos.setdefault(to, ([], []))[pos].append((c, delta))
+        for to, (exp, prox) in grupos.items():
+            mensagens.append(compor_email(cfg, exp, prox, thresholds, to=to))
+    return mensagens
@@ -1,17 +1,29 @@
 # appScreens.py (GitHub como banco central + ícone + ordem corrigida)
+# Partida rápida: só o menu é montado antes da primeira pintura; a tela de
+# clientes é criada no primeiro uso e requests/openpyxl/numpy são importados
+# sob demanda (ver startup.py para o relatório de tempos).
+import startup
+import timing
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import tkinter.font as tkfont
 import os
 import sys
-import csv
-import json
-import base64
 from pathlib import Path
-from datetime import datetime
-import requests
-import io
+import threading
+
+import dates
+from records import Client, clients_to_csv, load_clients_from_text, merge_clients
+from tableView import VirtualTable, SortedRows
+from ioworker import IOWorker
+from csvcache import ContentCache
+from githubapi import GitHubClient, push_clients_csv
+from shards import ShardStore
+from expiry import tag_for_delta
+from exporter import export_xlsx, export_csv, ExportCancelled
+from importer import plan_file
+from search import NameIndex, ClientFilter, STATUS_FILTERS
 
 class App(ctk.CTk):
     def __init__(self):
@@ -38,14 +50,38 @@ class App(ctk.CTk):
         appdata_root = Path(os.getenv("APPDATA", Path.home() / ".3NApp"))
         self.data_dir = appdata_root / "3NApp" / "Data" if os.name == "nt" else appdata_root / "Data"
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.data_file = self.data_dir / "clientes.csv"  # opcional, não usado como fonte
-        self.clients = []
+        self.data_file = self.data_dir / "clientes.csv"  # cache do remoto (ETag/SHA), não é a fonte de verdade
+        self.cache = ContentCache(self.data_file)
+        self.clients = {}  # id -> Client (ordem de inserção = ordem do CSV)
+        self.rows = SortedRows(key=lambda c: c.sort_key)
+        self.name_index = NameIndex()
+        self.filter = ClientFilter()
+        self.search_debounce_ms = int((os.environ.get("SEARCH_DEBOUNCE_MS") or "120").strip())
+        self._filter_after_id = None
+        self._today = dates.today_ordinal()
+        self._sync_error = None
+        self.io = IOWorker(self)
+        self.file_io = IOWorker(self)    # importação/exportação não atrasam a fila do GitHub
+        self._export_cancel = None       # threading.Event da exportação em andamento
+        self.github = None
+        self.shards = None
+        self.table = None
+        self._startup_pending = True     # relatório de partida após a primeira carga
+        # Fila de gravação (write-behind): edições acumulam e viram um único commit
+        self.save_debounce_ms = int((os.environ.get("SAVE_DEBOUNCE_MS") or "3000").strip())
+        self._pending_saves = []
+        self._save_after_id = None
+        self._save_future = None
+        # Base da lista exibida (texto + SHA do arquivo, ou estado dos shards): só muda
+        # na thread do Tk, junto com self.clients; cada envio parte da base capturada
+        self._synced = None
 
         # Janela
         self.title(self.appTitle["menu"])
         ctk.set_appearance_mode("dark")
         self.geometry(f"{self.initialAppWidth}x{self.initialAppHeight}+{self.appInitialPosX}+{self.appInitialPosY}")
         self.minsize(700, 420)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self._set_window_icon()
@@ -59,14 +95,37 @@ class App(ctk.CTk):
         except Exception:
             pass
 
-        # --- Cria UI antes de carregar dados (evita erro de métodos/TreeView inexistentes) ---
+        # Barra de status: duração da última sincronização, da tabela e da exportação
+        timing.enable()
+        self.timing_bar = ctk.CTkLabel(self, text="", anchor="w", height=22, font=ctk.CTkFont(size=12))
+        self.timing_bar.pack(side="bottom", fill="x", padx=12)
+
+        # --- Só o menu antes da primeira pintura; a tela de clientes nasce no primeiro uso ---
         self.menu_frame = self.create_menu()
         self.last_frame = None
-        self.clients_frame = self.create_clients_view()
+        self.clients_frame = None
+        self.show_menu()
+        startup.mark("menu montado")
+
+        # Depois que a janela aparece, baixa os dados do GitHub em segundo plano
+        self._mapped = False
+        self.bind("<Map>", self._on_first_map, add="+")
 
-        # Baixa dados do GitHub e mostra
+    def _on_first_map(self, _event=None):
+        if self._mapped:
+            return
+        self._mapped = True
+        self.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        startup.mark("primeira pintura")
         self._load_clients()
-        self.show_menu()
+
+    def _startup_done(self):
+        if self._startup_pending:
+            self._startup_pending = False
+            startup.mark("dados carregados")
+            startup.report()
 
     # ---------- Ícone ----------
     def _set_window_icon(self):
@@ -123,7 +182,7 @@ class App(ctk.CTk):
 
         ctk.CTkButton(
             card, width=140, height=34, corner_radius=8,
-            text="Sair", command=self.destroy
+            text="Sair", command=self._on_close
         ).grid(row=3, column=0, padx=30, pady=(0, 24))
         return frame
 
@@ -137,29 +196,59 @@ class App(ctk.CTk):
         self.last_frame = self.menu_frame
 
     def show_clients(self):
+        if self.clients_frame is None:
+            self.clients_frame = self.create_clients_view()
+            self.refresh_table()
+            self._update_status()
         if self.last_frame == self.clients_frame:
             return
         if self.last_frame is not None:
             self.last_frame.pack_forget()
         self.title(self.appTitle["verClientes"])
         self.clients_frame.pack(fill="both", expand=True)
-        self.refresh_table()
+        self._today = dates.today_ordinal()
+        self.table.render()
         self.last_frame = self.clients_frame
 
     # ---------- Tela de clientes ----------
     def create_clients_view(self):
         frame = ctk.CTkFrame(self)
-        frame.grid_rowconfigure(1, weight=1)
+        frame.grid_rowconfigure(2, weight=1)
         frame.grid_columnconfigure(0, weight=1)
 
         top = ctk.CTkFrame(frame)
         top.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
         top.grid_columnconfigure(0, weight=1)
         ctk.CTkLabel(top, text="Clientes (Empresa / Vencimento)", font=ctk.CTkFont(size=18, weight="bold")).grid(row=0, column=0, sticky="w")
-        ctk.CTkButton(top, width=120, height=30, corner_radius=6, text="Menu", command=self.show_menu).grid(row=0, column=1, padx=6)
+        self.status_label = ctk.CTkLabel(top, text="")
+        self.status_label.grid(row=0, column=1, padx=12, sticky="e")
+        ctk.CTkButton(top, width=120, height=30, corner_radius=6, text="Menu", command=self.show_menu).grid(row=0, column=2, padx=6)
+
+        # Busca e filtros (texto com debounce, status e intervalo de datas)
+        filters = ctk.CTkFrame(frame)
+        filters.grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 10))
+        filters.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(filters, text="Buscar:").grid(row=0, column=0, padx=6, pady=6, sticky="e")
+        self.search_entry = ctk.CTkEntry(filters, placeholder_text="Nome da empresa (parte do nome)")
+        self.search_entry.grid(row=0, column=1, padx=6, pady=6, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", self._schedule_filter)
+        self.status_filter = ctk.CTkOptionMenu(filters, values=list(STATUS_FILTERS), width=130,
+                                               command=lambda _v: self._apply_filter())
+        self.status_filter.grid(row=0, column=2, padx=6, pady=6)
+        ctk.CTkLabel(filters, text="De:").grid(row=0, column=3, padx=(6, 2), pady=6, sticky="e")
+        self.date_from_entry = ctk.CTkEntry(filters, placeholder_text="DD/MM/AAAA", width=110)
+        self.date_from_entry.grid(row=0, column=4, padx=(2, 6), pady=6)
+        ctk.CTkLabel(filters, text="Até:").grid(row=0, column=5, padx=(6, 2), pady=6, sticky="e")
+        self.date_to_entry = ctk.CTkEntry(filters, placeholder_text="DD/MM/AAAA", width=110)
+        self.date_to_entry.grid(row=0, column=6, padx=(2, 6), pady=6)
+        for entry in (self.date_from_entry, self.date_to_entry):
+            entry.bind("<KeyRelease>", self._schedule_filter)
+        ctk.CTkButton(filters, text="Limpar", width=80, command=self.clear_filter).grid(row=0, column=7, padx=6, pady=6)
+        self.filter_info = ctk.CTkLabel(filters, text="", width=160, anchor="e")
+        self.filter_info.grid(row=0, column=8, padx=6, pady=6, sticky="e")
 
         table_frame = ctk.CTkFrame(frame)
-        table_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        table_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
 
@@ -174,9 +263,9 @@ class App(ctk.CTk):
         self.tree.column("empresa", anchor=tk.W, width=520, stretch=True)
         self.tree.column("vencimento", anchor=tk.CENTER, width=200, stretch=True)
 
-        y_scroll = ttk.Scrollbar(tv_container, orient="vertical", command=self.tree.yview)
+        y_scroll = ttk.Scrollbar(tv_container, orient="vertical")
         x_scroll = ttk.Scrollbar(tv_container, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        self.tree.configure(xscrollcommand=x_scroll.set)
         self.tree.grid(row=0, column=0, sticky="nsew")
         y_scroll.grid(row=0, column=1, sticky="ns")
         x_scroll.grid(row=1, column=0, sticky="ew")
@@ -191,6 +280,10 @@ class App(ctk.CTk):
         style.configure('Treeview', font=self._tv_font, rowheight=30)
         style.configure('Treeview.Heading', font=self._tv_head_font)
 
+        # Rolagem virtual: só a janela visível vira item do Treeview (TABLE_VIRTUAL=0 desativa)
+        virtual = (os.environ.get("TABLE_VIRTUAL") or "1").strip() != "0"
+        self.table = VirtualTable(self.tree, y_scroll, self._table_row, row_height=30, virtual=virtual)
+
         self.tree.tag_configure('expired', background='#7a2f2f', foreground='#ffffff')
         self.tree.tag_configure('due_15', background='#a85f00', foreground='#ffffff')
         self.tree.tag_configure('due_month', background='#b59f3b', foreground='#ffffff')
@@ -199,8 +292,8 @@ class App(ctk.CTk):
         self.tree.tag_configure('odd', background='#262626')
 
         controls = ctk.CTkFrame(frame)
-        controls.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 10))
-        for i in range(10):
+        controls.grid(row=3, column=0, sticky="ew", padx=10, pady=(0, 10))
+        for i in range(11):
             controls.grid_columnconfigure(i, weight=1)
 
         ctk.CTkLabel(controls, text="Empresa:").grid(row=0, column=0, padx=6, pady=6, sticky="e")
@@ -215,70 +308,299 @@ class App(ctk.CTk):
         ctk.CTkButton(controls, text="Remover selecionado", width=160, command=self.remove_selected_client).grid(row=0, column=5, padx=6, pady=6)
         ctk.CTk.CTkButton if False else None  # proteção para linters antigos
         ctk.CTkButton(controls, text="Editar selecionado", width=150, command=self.edit_selected_client).grid(row=0, column=6, padx=6, pady=6)
-        ctk.CTkButton(controls, text="Exportar (Excel)", width=120, command=self.export_clients_excel).grid(row=0, column=7, padx=6, pady=6)
-        ctk.CTkButton(controls, text="Recarregar", width=110, command=self._load_clients).grid(row=0, column=8, padx=6, pady=6)
+        ctk.CTkButton(controls, text="Importar (CSV/Excel)", width=150, command=self.import_clients_file).grid(row=0, column=7, padx=6, pady=6)
+        ctk.CTkButton(controls, text="Exportar (Excel/CSV)", width=150, command=self.export_clients_excel).grid(row=0, column=8, padx=6, pady=6)
+        ctk.CTkButton(controls, text="Recarregar", width=110, command=self._load_clients).grid(row=0, column=9, padx=6, pady=6)
+        ctk.CTkButton(controls, text="Sincronizar agora", width=140, command=self.flush_saves).grid(row=0, column=10, padx=6, pady=6)
 
         ctk.CTkLabel(
             frame,
             text="Legenda: Longe (verde), 30 dias (amarelo), 15 dias (laranja), Vencidas (vermelho)"
-        ).grid(row=3, column=0, padx=12, pady=(0, 10), sticky='w')
+        ).grid(row=4, column=0, padx=12, pady=(0, 10), sticky='w')
         return frame
 
     # ---------- Dados (GitHub remoto) ----------
-    def _ensure_data_store(self):
-        pass
-
     def _load_clients(self):
-        """Baixa clientes diretamente do GitHub."""
-        self.clients = []
-        try:
-            data = self._fetch_github_csv()
-            if not data:
-                self.refresh_table()
-                return
-            reader = csv.DictReader(io.StringIO(data))
-            for row in reader:
-                emp = (row.get("empresa") or "").strip()
-                ven = (row.get("vencimento") or "").strip()
-                if emp:
-                    d = self._parse_date_any(ven)
-                    ven_iso = d.strftime("%Y-%m-%d") if d else ven
-                    self.clients.append({"empresa": emp, "vencimento": ven_iso})
+        """Baixa clientes do GitHub em segundo plano (não bloqueia a janela)."""
+        # Envia antes o que estiver pendente; o worker FIFO garante a ordem
+        self.flush_saves()
+
+        def show(result):
+            if result is None:
+                return  # não há cache
+            clients, self._synced = result
+            self.clients = {c.id: c for c in clients}
             self.refresh_table()
-        except Exception as e:
+
+        def fetch():
+            with timing.span("sync"):
+                if self._shard_store() is not None:
+                    clients = self._fetch_shards()
+                else:
+                    data = self._fetch_github_csv()
+                    if data is None:
+                        return None  # remoto não mudou (304)
+                    clients = load_clients_from_text(data)
+                return clients, self._sync_state()
+
+        def done(result):
+            if result is not None:
+                self._apply_fetched(*result)
+            self._update_status()
+            self._update_timings()
+            self._startup_done()
+
+        def failed(e):
+            self._update_timings()
+            self._startup_done()
+            if self.clients:
+                self._update_status(f"⚠️ Offline: exibindo cópia local ({str(e)[:60]})")
+                return
+            self._update_status()
             messagebox.showwarning("GitHub", f"Falha ao carregar dados do GitHub:\n{e}")
 
+        if not self.clients:
+            # Partida: mostra a última cópia local enquanto consulta o GitHub
+            self.io.submit(self._read_cached_clients, on_done=show)
+        self.io.submit(fetch, on_done=done, on_error=failed)
+        self._update_status("Carregando do GitHub...")
+
+    def _sync_state(self):
+        """Estado sincronizado logo após um download/envio (no worker, que é FIFO)."""
+        if self.shards is not None and self.shards.head is not None:
+            return self.shards.state()
+        text, meta = self.cache.load()
+        return {"text": text, "sha": meta.get("sha")}
+
+    @staticmethod
+    def _state_clients(state):
+        """Registros da base de um estado sincronizado ([] se não houver)."""
+        if not state:
+            return []
+        if "base" in state:
+            return ShardStore.parse(state["base"])
+        return load_clients_from_text(state.get("text") or "")
+
+    def _apply_fetched(self, fetched, state):
+        """
+        Mostra a lista baixada. Edições feitas sobre a lista anterior (ainda não
+        enviadas ou em envio) são reaplicadas por merge de três vias em vez
+        de sobrescritas; o próximo envio leva o resultado.
+        """
+        if self._pending_saves or self._save_future is not None:
+            fetched = merge_clients(self._state_clients(self._synced), list(self.clients.values()), fetched)
+            if self.table is not None:
+                self.table.clear_selection()
+        self._synced = state
+        self.clients = {c.id: c for c in fetched}
+        self.refresh_table()
+
+    def _read_cached_clients(self):
+        text, meta = self.cache.load()
+        if not text:
+            return None
+        return load_clients_from_text(text), {"text": text, "sha": meta.get("sha")}
+
     def _save_clients(self, commit_message="Update clientes.csv from desktop app"):
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(["empresa", "vencimento"])
-        for c in self.clients:
-            writer.writerow([c["empresa"], self._format_date_display(c.get("vencimento", ""))])
-        csv_data = output.getvalue().encode("utf-8")
-        try:
-            self._push_github_internal(commit_message, content_bytes=csv_data, silent=True)
-        except Exception as e:
-            try:
-                messagebox.showwarning("GitHub", f"Falha ao salvar no GitHub:\n{e}")
-            except Exception:
-                print("GitHub push falhou:", e)
+        """Registra a alteração; o envio acontece após SAVE_DEBOUNCE_MS sem novas edições."""
+        self._pending_saves.append(commit_message)
+        if self._save_after_id is not None:
+            self.after_cancel(self._save_after_id)
+        self._save_after_id = self.after(self.save_debounce_ms, self.flush_saves)
+        self._update_status()
+
+    def _commit_message_for(self, messages):
+        if len(messages) == 1:
+            return messages[0]
+        return f"Update clientes.csv from desktop app ({len(messages)} changes)\n\n" + "\n".join(f"- {m}" for m in messages)
+
+    def flush_saves(self):
+        """Envia todas as alterações pendentes num único PUT/commit (em segundo plano)."""
+        if self._save_after_id is not None:
+            self.after_cancel(self._save_after_id)
+            self._save_after_id = None
+        if not self._pending_saves:
+            return
+        if self._save_future is not None:
+            # Já há um envio em andamento; as novas edições seguem no próximo
+            return
+        batch, self._pending_saves = self._pending_saves, []
+        snapshot, base = self._snapshot(), self._synced
+
+        def done(result):
+            merged, self._synced = result
+            self._save_future = None
+            self._sync_error = None
+            if merged is not None:
+                self._apply_merged(snapshot, merged)
+            if self._pending_saves:
+                self.flush_saves()
+            self._update_status()
+            self._update_timings()
+
+        def failed(e):
+            self._save_future = None
+            self._pending_saves = batch + self._pending_saves
+            self._sync_error = str(e)
+            print("GitHub push falhou:", e)
+            self._update_status()
+            self._update_timings()
+
+        self._save_future = self.io.submit(
+            self._push_snapshot, self._commit_message_for(batch), snapshot, base,
+            on_done=done, on_error=failed,
+        )
+        self._update_status()
+
+    def _snapshot(self):
+        """Serializa o estado atual na thread do Tk (registros podem mudar durante o envio)."""
+        if self.shards is not None:
+            return self.shards.split(self.clients.values())
+        return clients_to_csv(self.clients.values()).encode("utf-8")
+
+    def _push_snapshot(self, commit_message, snapshot, base=None):
+        """
+        Envia o snapshot a partir da base capturada com ele (self._synced). Um
+        download que rodou antes no worker não adianta essa base: o envio
+        recebe 409/422 e faz o merge em vez de apagar o que o remoto ganhou.
+        Retorna (lista mesclada ou None, novo estado sincronizado).
+        """
+        with timing.span("sync"):
+            if isinstance(snapshot, dict):
+                state = base if base and "head" in base else None
+                merged = self.shards.push(snapshot, commit_message, state=state)
+            else:
+                base = base if base and "text" in base else None
+                merged = self._push_github_internal(commit_message, content_bytes=snapshot, silent=True, base=base)
+        return merged, self._sync_state()
+
+    def _apply_merged(self, snapshot, merged):
+        """O push precisou de merge com o remoto: reaplica edições feitas durante o envio."""
+        if isinstance(snapshot, dict):
+            sent = ShardStore.parse(snapshot)
+        else:
+            sent = load_clients_from_text(snapshot.decode("utf-8"))
+        current = merge_clients(sent, list(self.clients.values()), merged)
+        self.clients = {c.id: c for c in current}
+        if self.table is not None:
+            self.table.clear_selection()
+        self.refresh_table()
+
+    def _on_close(self):
+        """Garante que nenhuma edição pendente se perca ao fechar a janela."""
+        if self._save_after_id is not None:
+            self.after_cancel(self._save_after_id)
+            self._save_after_id = None
+        if self._save_future is not None or self._pending_saves:
+            self._update_status("Salvando alterações pendentes...")
+            self.update_idletasks()
+            while self._save_future is not None:
+                self._save_future.result()
+                self.io.drain()
+            if self._pending_saves:
+                batch, self._pending_saves = self._pending_saves, []
+                try:
+                    self._push_snapshot(self._commit_message_for(batch), self._snapshot(), self._synced)
+                except Exception as e:
+                    if not messagebox.askyesno("GitHub", f"Falha ao salvar no GitHub:\n{e}\n\nSair mesmo assim?"):
+                        self._pending_saves = batch + self._pending_saves
+                        self._sync_error = str(e)
+                        self._update_status()
+                        return
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+        self.file_io.shutdown(wait=False)
+        self.io.shutdown(wait=False)
+        self.destroy()
+
+    def _update_status(self, text=None):
+        label = getattr(self, "status_label", None)
+        if label is None:
+            return
+        color = None
+        if text is None:
+            if self._sync_error:
+                text, color = f"⚠️ Falha ao sincronizar: {self._sync_error[:80]}", "#e06c6c"
+            elif self.io.pending:
+                text = f"⏳ Sincronizando ({self.io.pending} pendente(s))..."
+            elif self._pending_saves:
+                text = f"✏️ {len(self._pending_saves)} alteração(ões) aguardando envio"
+            else:
+                text = "✅ Sincronizado"
+        label.configure(text=text, text_color=color or ("gray10", "gray90"))
 
     # ---------- Ações UI ----------
     def refresh_table(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
-        def sort_key(c):
-            d = self._parse_date_any(c.get("vencimento", ""))
-            if d is not None:
-                return (0, d)
-            return (1, c.get("empresa", ""))
+        """Reordena tudo (após carga completa); edições pontuais usam _apply_change."""
+        if self.table is None:
+            return  # tela ainda não criada: ordena e indexa no primeiro show_clients
+        with timing.span("table.refresh"):
+            self._today = dates.today_ordinal()
+            self.rows.reset(self.clients.values())
+            self.name_index.reset(self.clients.values())
+            self._show_rows()
+        self._update_timings()
+
+    def _update_timings(self):
+        parts = []
+        sync = timing.last("sync")
+        if sync is not None:
+            parts.append(f"Última sincronização: {sync:.2f} s")
+        refresh = timing.last("table.refresh")
+        if refresh is not None:
+            parts.append(f"Atualização da tabela: {refresh * 1000:.0f} ms")
+        export = timing.last("export")
+        if export is not None:
+            parts.append(f"Última exportação: {export:.2f} s")
+        self.timing_bar.configure(text="   ·   ".join(parts))
+
+    def _apply_change(self, index):
+        if not self.filter.active:
+            if index is not None:
+                self.table.changed(index)
+            return
+        self._show_rows()  # com filtro ativo a posição na lista filtrada muda
 
-        for idx, c in enumerate(sorted(self.clients, key=sort_key)):
-            tag = self._row_tag_for_client(c)
-            display_date = self._format_date_display(c.get("vencimento", ""))
-            tags = (('even' if idx % 2 == 0 else 'odd'),) if tag == 'normal' else (tag,)
-            self.tree.insert("", tk.END, values=(c.get("empresa", ""), display_date), tags=tags)
+    def _show_rows(self, top=False):
+        if not self.filter.active:
+            self.table.set_rows(self.rows, top=top)
+            self.filter_info.configure(text="")
+            return
+        view = self.filter.view(self.rows, self.name_index, self.clients, self._today)
+        self.table.set_rows(view, top=top)
+        self.filter_info.configure(text=f"{len(view)} de {len(self.rows)} clientes")
+
+    # ---------- Busca / filtros ----------
+    def _schedule_filter(self, _event=None):
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(self.search_debounce_ms, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_after_id = None
+        f = self.filter
+        f.text = self.search_entry.get()
+        f.status = STATUS_FILTERS.get(self.status_filter.get())
+        f.date_from = dates.parse_ordinal(self.date_from_entry.get().strip())
+        f.date_to = dates.parse_ordinal(self.date_to_entry.get().strip())
+        self._show_rows(top=True)
+
+    def clear_filter(self):
+        for entry in (self.search_entry, self.date_from_entry, self.date_to_entry):
+            entry.delete(0, tk.END)
+        self.status_filter.set(next(iter(STATUS_FILTERS)))
+        self._apply_filter()
+
+    def _table_row(self, idx, c):
+        tag = self._row_tag_for_client(c, self._today)
+        tags = (('even' if idx % 2 == 0 else 'odd'),) if tag == 'normal' else (tag,)
+        return str(c.id), (c.empresa, c.display), tags
+
+    def _selected_client(self):
+        iid = self.table.selected()
+        if iid is None:
+            return None
+        return self.clients.get(int(iid))
 
     def add_client(self):
         empresa = self.empresa_entry.get().strip()
@@ -290,46 +612,37 @@ class App(ctk.CTk):
             if not self._valid_date(venc):
                 messagebox.showerror("Erro", "Data inválida. Use DD/MM/AAAA.")
                 return
-            venc_iso = self._to_iso_str(venc)
-        else:
-            venc_iso = ""
-        self.clients.append({"empresa": empresa, "vencimento": venc_iso})
+        client = Client(empresa, venc)
+        self.clients[client.id] = client
         self._save_clients("Add client from desktop app")
         self.empresa_entry.delete(0, tk.END)
         self.venc_entry.delete(0, tk.END)
-        self.refresh_table()
+        self.name_index.add(client)
+        self._apply_change(self.rows.add(client))
 
     def remove_selected_client(self):
-        sel = self.tree.selection()
-        if not sel:
+        if self.table.selected() is None:
             messagebox.showinfo("Remover", "Selecione um cliente na tabela.")
             return
-        values = self.tree.item(sel[0], "values")
-        empresa_sel, venc_sel = values[0], values[1]
-        venc_sel_iso = self._to_iso_str(venc_sel) if venc_sel else ""
-        removed = False
-        for i, c in enumerate(self.clients):
-            if c.get("empresa") != empresa_sel:
-                continue
-            stored = c.get("vencimento", "")
-            if (venc_sel_iso and stored == venc_sel_iso) or (not venc_sel_iso and self._format_date_display(stored) == venc_sel):
-                del self.clients[i]
-                removed = True
-                break
-        if removed:
+        client = self._selected_client()
+        if client is not None:
+            del self.clients[client.id]
+            self.table.clear_selection()
             self._save_clients("Remove client from desktop app")
-            self.refresh_table()
+            self.name_index.remove(client.id)
+            self._apply_change(self.rows.discard(client.id))
         else:
             messagebox.showwarning("Aviso", "Cliente não encontrado nos dados.")
 
     def edit_selected_client(self):
-        sel = self.tree.selection()
-        if not sel:
+        if self.table.selected() is None:
             messagebox.showinfo("Editar", "Selecione um cliente na tabela.")
             return
-        values = self.tree.item(sel[0], "values")
-        old_empresa, old_venc_disp = values[0], values[1]
-        old_venc_iso = self._to_iso_str(old_venc_disp) if old_venc_disp else ""
+        client = self._selected_client()
+        if client is None:
+            messagebox.showwarning("Editar", "Registro original não encontrado. Recarregue a tabela.")
+            return
+        old_empresa, old_venc_disp = client.empresa, client.display
 
         dlg = ctk.CTkToplevel(self)
         dlg.title("Editar Cliente - 3N")
@@ -356,21 +669,11 @@ class App(ctk.CTk):
             if new_venc and not self._valid_date(new_venc):
                 messagebox.showerror("Editar", "Data inválida. Use DD/MM/AAAA.")
                 return
-            new_venc_iso = self._to_iso_str(new_venc) if new_venc else ""
-            updated = False
-            for i, c in enumerate(self.clients):
-                if c.get("empresa") != old_empresa:
-                    continue
-                stored = c.get("vencimento", "")
-                if (old_venc_iso and stored == old_venc_iso) or (not old_venc_iso and self._format_date_display(stored) == old_venc_disp):
-                    self.clients[i] = {"empresa": new_emp, "vencimento": new_venc_iso}
-                    updated = True
-                    break
-            if not updated:
-                messagebox.showwarning("Editar", "Registro original não encontrado. Recarregue a tabela.")
-            else:
-                self._save_clients("Edit client from desktop app")
-                self.refresh_table()
+            client.empresa = new_emp
+            client.set_vencimento(new_venc)
+            self._save_clients("Edit client from desktop app")
+            self.name_index.update(client)
+            self._apply_change(min(self.rows.reposition(client)))
             dlg.destroy()
 
         btn_row = ctk.CTkFrame(dlg)
@@ -382,211 +685,201 @@ class App(ctk.CTk):
         if not self.clients:
             messagebox.showinfo("Exportar", "Não há dados para exportar.")
             return
+        if self._export_cancel is not None:
+            messagebox.showinfo("Exportar", "Já existe uma exportação em andamento.")
+            return
         file_path = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                                 filetypes=[("Excel", "*.xlsx")],
-                                                 title="Salvar lista de clientes (Excel)")
+                                                 filetypes=[("Excel", "*.xlsx"), ("CSV (rápido, sem formatação)", "*.csv")],
+                                                 title="Salvar lista de clientes")
         if not file_path:
             return
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-            wb = Workbook()
-            ws = wb.active
-            ws.title = 'Clientes 3N'
-
-            ws.merge_cells('A1:B1')
-            c = ws['A1']
-            c.value = "3N - Clientes e Vencimentos"
-            c.font = Font(size=18, bold=True)
-            c.alignment = Alignment(horizontal='center')
-
-            ws.merge_cells('A2:B2')
-            gen = ws['A2']
-            gen.value = f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-            gen.font = Font(size=12)
-            gen.alignment = Alignment(horizontal='center')
-
-            ws['A3'].value = 'Empresa'
-            ws['B3'].value = 'Vencimento'
-            header_fill = PatternFill('solid', fgColor='1F4E78')
-            header_font = Font(color='FFFFFF', bold=True, size=14)
-            for col in ('A', 'B'):
-                cell = ws[f'{col}3']
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-
-            thin = Side(style='thin', color='CCCCCC')
-            border = Border(left=thin, right=thin, top=thin, bottom=thin)
-            row_start = 4
-
-            def sort_key(crow):
-                d = self._parse_date_any(crow.get('vencimento', ''))
-                return (0, d) if d else (1, crow.get('empresa', ''))
-
-            sorted_rows = sorted(self.clients, key=sort_key)
-            for i, cdata in enumerate(sorted_rows):
-                empresa = cdata.get('empresa', '')
-                venc = self._format_date_display(cdata.get('vencimento', ''))
-                status = self._row_tag_for_client(cdata)
-                r = row_start + i
-                ws[f'A{r}'].value = empresa
-                ws[f'B{r}'].value = venc
-
-                for col in ('A', 'B'):
-                    cell = ws[f'{col}{r}']
-                    cell.font = Font(size=14)
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='left' if col == 'A' else 'center', vertical='center')
-
-                if status == 'expired':
-                    fill = PatternFill('solid', fgColor='FFC7CE')
-                elif status == 'due_15':
-                    fill = PatternFill('solid', fgColor='FCE4D6')
-                elif status == 'due_month':
-                    fill = PatternFill('solid', fgColor='FFF2CC')
-                elif status == 'ok_far':
-                    fill = PatternFill('solid', fgColor='E2EFDA')
-                else:
-                    fill = None
-                if fill:
-                    ws[f'A{r}'].fill = fill
-                    ws[f'B{r}'].fill = fill
-                ws.row_dimensions[r].height = 24
-
-            ws.column_dimensions['A'].width = 60
-            ws.column_dimensions['B'].width = 20
-            ws.freeze_panes = 'A4'
-            ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
-            ws.page_setup.fitToWidth = 1
-            ws.sheet_view.showGridLines = False
-            ws.print_title_rows = '1:3'
-            ws.page_margins.left = ws.page_margins.right = 0.4
-            ws.page_margins.top = ws.page_margins.bottom = 0.5
-
-            wb.save(file_path)
+        as_csv = file_path.lower().endswith(".csv")
+        export = export_csv if as_csv else export_xlsx
+
+        # Cópia da ordem atual: o worker não enxerga edições feitas durante a exportação
+        rows = list(self.rows)
+        cancel = threading.Event()
+        progress = {"done": 0, "total": len(rows)}
+        self._export_cancel = cancel
+
+        dlg = ctk.CTkToplevel(self)
+        dlg.title("Exportar - 3N")
+        dlg.geometry("420x150")
+        dlg.resizable(False, False)
+        dlg.transient(self)
+        dlg.protocol("WM_DELETE_WINDOW", cancel.set)
+        label = ctk.CTkLabel(dlg, text=f"Exportando {len(rows)} clientes...")
+        label.pack(padx=16, pady=(16, 8))
+        bar = ctk.CTkProgressBar(dlg, width=360)
+        bar.set(0)
+        bar.pack(padx=16, pady=8)
+        cancel_btn = ctk.CTkButton(dlg, text="Cancelar", width=120,
+                                   command=lambda: (cancel.set(), cancel_btn.configure(state="disabled")))
+        cancel_btn.pack(pady=(8, 16))
+
+        def on_progress(done, total):
+            progress["done"] = done  # thread do worker: só atualiza o dict
+
+        def tick():
+            if self._export_cancel is not cancel:
+                return
+            total = progress["total"] or 1
+            bar.set(progress["done"] / total)
+            label.configure(text=f"Exportando... {progress['done']}/{progress['total']}")
+            dlg.after(100, tick)
+
+        def finish():
+            self._export_cancel = None
+            dlg.destroy()
+
+        def done(_):
+            finish()
+            self._update_timings()
             messagebox.showinfo("Exportar", f"Exportado com sucesso para:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Erro ao exportar Excel",
-                                 "Falha ao exportar para Excel com formatação. Instale 'openpyxl'.\n\nErro: " + str(e))
 
-    # ---------- Utils ----------
-    def _valid_date(self, s):
-        try:
-            datetime.strptime(s, "%d/%m/%Y")
-            return True
-        except Exception:
-            return False
+        def failed(e):
+            finish()
+            if isinstance(e, ExportCancelled):
+                self._update_status("Exportação cancelada.")
+            elif isinstance(e, ImportError):
+                messagebox.showerror("Erro ao exportar Excel",
+                                     "Falha ao exportar para Excel com formatação. Instale 'openpyxl'.\n\nErro: " + str(e))
+            else:
+                messagebox.showerror("Erro ao exportar", f"Falha ao exportar:\n{e}")
 
-    def _parse_date_any(self, s):
-        if not s:
-            return None
-        s = s.strip()
-        for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
-            try:
-                return datetime.strptime(s, fmt).date()
-            except Exception:
-                continue
-        return None
+        self.file_io.submit(export, rows, file_path, progress=on_progress, cancel=cancel,
+                              on_done=done, on_error=failed)
+        tick()
 
-    def _to_iso_str(self, s):
-        d = self._parse_date_any(s)
-        return d.strftime("%Y-%m-%d") if d else ""
+    def import_clients_file(self):
+        """Importação em lote: prévia das alterações e um único commit ao confirmar."""
+        file_path = filedialog.askopenfilename(filetypes=[("Planilhas", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")],
+                                               title="Importar clientes")
+        if not file_path:
+            return
+        self._update_status("Lendo arquivo de importação...")
 
-    def _format_date_display(self, s):
-        d = self._parse_date_any(s)
-        return d.strftime("%d/%m/%Y") if d else s or ""
+        def failed(e):
+            self._update_status()
+            if isinstance(e, ImportError):
+                messagebox.showerror("Importar", f"Para importar Excel instale 'openpyxl'.\n\nErro: {e}")
+            else:
+                messagebox.showerror("Importar", f"Falha ao ler o arquivo:\n{e}")
 
-    def _row_tag_for_client(self, c):
-        ven = c.get("vencimento", "").strip()
-        if not ven:
-            return 'normal'
-        d = self._parse_date_any(ven)
-        if d is None:
+        # O plano é montado no worker sobre uma cópia dos registros atuais
+        self.file_io.submit(plan_file, file_path, list(self.clients.values()),
+                            on_done=self._preview_import, on_error=failed)
+
+    def _preview_import(self, plan):
+        self._update_status()
+        if not plan:
+            messagebox.showinfo("Importar", plan.summary() + "\n\nNada a importar.")
+            return
+
+        dlg = ctk.CTkToplevel(self)
+        dlg.title("Importar clientes - 3N")
+        dlg.geometry("560x420")
+        dlg.grab_set()
+        dlg.grid_columnconfigure(0, weight=1)
+        dlg.grid_rowconfigure(0, weight=1)
+
+        box = ctk.CTkTextbox(dlg)
+        box.grid(row=0, column=0, padx=10, pady=(10, 6), sticky="nsew")
+        box.insert("1.0", plan.summary(limit=50))
+        box.configure(state="disabled")
+
+        def on_apply():
+            dlg.destroy()
+            applied = len(plan.apply(self.clients))
+            if applied:
+                self._save_clients(plan.commit_message())
+                self.flush_saves()  # importação: envia já, sem esperar o debounce
+                self.refresh_table()
+            skipped = plan.changes - applied
+            note = f"\n{skipped} ignorada(s): a lista mudou desde a prévia." if skipped else ""
+            messagebox.showinfo("Importar", f"{applied} alteração(ões) importadas.{note}")
+
+        btn_row = ctk.CTkFrame(dlg)
+        btn_row.grid(row=1, column=0, pady=10)
+        ctk.CTkButton(btn_row, text=f"Importar {plan.changes}", width=140, command=on_apply).pack(side=tk.LEFT, padx=6)
+        ctk.CTkButton(btn_row, text="Cancelar", width=120, command=dlg.destroy).pack(side=tk.LEFT, padx=6)
+
+    # ---------- Utils ----------
+    def _valid_date(self, s):
+        return dates.valid_display_date(s)
+
+    def _row_tag_for_client(self, c, today=None):
+        o = c.ordinal
+        if o is None:
             return 'normal'
-        today = datetime.today().date()
-        if d < today:
-            return 'expired'
-        delta = (d - today).days
-        if delta <= 15:
-            return 'due_15'
-        if delta <= 30:
-            return 'due_month'
-        return 'ok_far'
+        if today is None:
+            today = dates.today_ordinal()
+        return tag_for_delta(o - today)
 
     # ---------- GitHub API ----------
+    def _github(self):
+        """Cliente GitHub compartilhado (sessão com pool de conexões), criado no primeiro uso."""
+        if self.github is None:
+            self.github = GitHubClient.from_env()
+        return self.github
+
+    def _shard_store(self):
+        """ShardStore quando GITHUB_SHARDS está definido (criado no primeiro uso)."""
+        if self.shards is None:
+            self.shards = ShardStore.from_env(self._github())
+        return self.shards
+
+    def _fetch_shards(self):
+        """Carrega os shards em paralelo; migra do arquivo único se ainda não existirem."""
+        clients = self.shards.load()
+        if clients is None:
+            data = self._fetch_github_csv()
+            if data is None:
+                data, _meta = self.cache.load()
+            clients = load_clients_from_text(data or "")
+            self.shards.adopt(clients)
+            return clients
+        # Cópia local apenas para a partida rápida (sem ETag/SHA do arquivo único)
+        self.cache.store(clients_to_csv(clients), etag=None, sha=None)
+        return clients
+
     def _fetch_github_csv(self):
-        """Faz download do CSV do GitHub e retorna o conteúdo em texto."""
-        repo = (os.environ.get("GITHUB_REPO") or "").strip()
-        token = (os.environ.get("GITHUB_TOKEN") or "").strip()
-        file_path = (os.environ.get("GITHUB_FILE") or "clientes.csv").strip()
-        branch = (os.environ.get("GITHUB_BRANCH") or "main").strip()
-
-        if not repo or not token:
-            raise RuntimeError("Defina GITHUB_REPO e GITHUB_TOKEN no DadApp.env.")
-
-        headers = {
-            "Accept": "application/vnd.github+json",
-            "Authorization": f"Bearer {token}",
-            "X-GitHub-Api-Version": "2022-11-28"
-        }
-        url = f"https://api.github.com/repos/{repo}/contents/{file_path}?ref={branch}"
-        r = requests.get(url, headers=headers, timeout=20)
-        if r.status_code == 200:
-            js = r.json()
-            encoded = js.get("content", "")
-            if encoded:
-                return base64.b64decode(encoded).decode("utf-8")
-            return ""
-        elif r.status_code == 404:
-            # cria remoto vazio se não existir
+        """Faz download do CSV do GitHub e retorna o conteúdo em texto.
+
+        GET condicional com o ETag do cache local: retorna None quando o
+        arquivo remoto não mudou desde o último download (HTTP 304).
+        """
+        gh = self._github()
+        cached, meta = self.cache.load()
+        res = gh.get_file(etag=meta.get("etag") if cached is not None else None)
+        if res.not_modified:
+            return None
+        if res.status == 404:
+            # cria remoto vazio se não existir (o cache local é de outro arquivo)
+            self.cache.clear()
             empty_csv = "empresa,vencimento\n"
             self._push_github_internal("Initialize remote clientes.csv", content_bytes=empty_csv.encode("utf-8"))
             return empty_csv
-        else:
-            raise RuntimeError(f"Erro ao buscar CSV: {r.status_code} - {r.text[:200]}")
-
-    def _push_github_internal(self, commit_message: str, content_bytes=None, silent=False):
-        repo = (os.environ.get("GITHUB_REPO") or "").strip()
-        token = (os.environ.get("GITHUB_TOKEN") or "").strip()
-        file_path = (os.environ.get("GITHUB_FILE") or "clientes.csv").strip()
-        branch = (os.environ.get("GITHUB_BRANCH") or "main").strip()
-        committer_name = (os.environ.get("GITHUB_COMMITTER_NAME") or "3N Bot").strip()
-        committer_email = (os.environ.get("GITHUB_COMMITTER_EMAIL") or "noreply@local").strip()
-
-        if not repo or not token:
-            raise RuntimeError("Defina GITHUB_REPO e GITHUB_TOKEN no DadApp.env (mesma pasta do app).")
-
-        headers = {
-            "Accept": "application/vnd.github+json",
-            "Authorization": f"Bearer {token}",
-            "X-GitHub-Api-Version": "2022-11-28"
-        }
-
-        # Descobre SHA atual (se existir) para update
-        sha = None
-        url_get = f"https://api.github.com/repos/{repo}/contents/{file_path}?ref={branch}"
-        r = requests.get(url_get, headers=headers, timeout=20)
-        if r.status_code == 200:
-            sha = r.json().get("sha")
-
-        encoded = base64.b64encode(content_bytes or b"").decode("ascii")
-        url_put = f"https://api.github.com/repos/{repo}/contents/{file_path}"
-        payload = {
-            "message": commit_message,
-            "content": encoded,
-            "branch": branch,
-            "committer": {"name": committer_name, "email": committer_email},
-        }
-        if sha:
-            payload["sha"] = sha
-
-        r2 = requests.put(url_put, headers=headers, data=json.dumps(payload), timeout=25)
-        if r2.status_code not in (200, 201):
-            raise RuntimeError(f"PUT {r2.status_code}: {r2.text[:200]}")
+        self.cache.store(res.text, etag=res.etag, sha=res.sha)
+        return res.text
+
+    def _push_github_internal(self, commit_message: str, content_bytes=None, silent=False, base=None):
+        """
+        PUT direto usando o SHA da base (githubapi.push_clients_csv); o merge
+        em caso de conflito usa o texto da base. base = {"text", "sha"} capturado
+        com o snapshot; sem ele, vale o cache local.
+        Retorna a lista mesclada quando houve merge, senão None.
+        """
+        if base is None:
+            text, meta = self.cache.load()
+            base = {"text": text, "sha": meta.get("sha")}
+        merged, content_bytes, new_sha = push_clients_csv(
+            self._github(), content_bytes, commit_message, base_text=base["text"], sha=base["sha"])
+        # O conteúdo enviado passa a ser a base local; sem ETag, o próximo GET é completo
+        self.cache.store(content_bytes.decode("utf-8"), etag=None, sha=new_sha)
         if not silent:
             print("GitHub: upload OK")
+        return merged
 
 if __name__ == "__main__":
     app = App()
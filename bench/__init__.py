@@ -0,0 +1,3 @@
+# bench/
+# Benchmarks reprodutíveis do notify.py e da GUI (sem rede real).
+# Uso: python -m bench.run --sizes 1000,10000,100000
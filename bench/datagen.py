@@ -0,0 +1,38 @@
+# bench/datagen.py
+# Geração de clientes.csv sintético para benchmarks
+# ---------------------------------------------------------------
+# Mistura os formatos aceitos (DD/MM/AAAA, AAAA-MM-DD, sem zero à
+# esquerda), datas em branco e inválidas, nomes com acento. A semente
+# fixa torna os arquivos idênticos entre execuções.
+
+import io
+import csv
+import random
+from datetime import date, timedelta
+
+_PREFIXOS = ["Posto", "Indústria", "Comércio", "Farmácia", "Padaria", "Oficina", "Clínica", "Construtora", "Mercado", "Ótica"]
+_SUFIXOS = ["Ltda", "ME", "EIRELI", "S/A", "& Filhos", "Express", "Central", "São João", "do Vale", "Irmãos"]
+
+
+def generate_csv(rows: int, seed: int = 42, today: date = None) -> str:
+    rnd = random.Random(seed)
+    today = today or date.today()
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["empresa", "vencimento"])
+    for i in range(rows):
+        nome = f"{rnd.choice(_PREFIXOS)} {rnd.choice(_SUFIXOS)} {i}"
+        r = rnd.random()
+        d = today + timedelta(days=rnd.randint(-365, 730))
+        if r < 0.45:
+            venc = d.strftime("%d/%m/%Y")
+        elif r < 0.80:
+            venc = d.isoformat()
+        elif r < 0.85:
+            venc = f"{d.day}/{d.month}/{d.year}"
+        elif r < 0.95:
+            venc = ""
+        else:
+            venc = rnd.choice(["31/02/2025", "n/d", "2025-13-01", "amanhã"])
+        w.writerow([nome, venc])
+    return out.getvalue()
@@ -0,0 +1,142 @@
+# bench/fake_github.py
+# Servidor HTTP local que imita a Contents API do GitHub
+# ---------------------------------------------------------------
+# Suporta o suficiente para notify.py e githubapi.GitHubClient:
+#   GET  /repos/{repo}/contents/{path}   JSON base64, ETag/304, media type raw
+#   GET  /repos/{repo}/contents/{dir}    listagem de diretório
+#   GET  /repos/{repo}/git/blobs/{sha}   blob bruto
+#   PUT  /repos/{repo}/contents/{path}   com verificação de SHA (409)
+# Como no GitHub real, arquivos acima de 1 MB voltam sem conteúdo
+# embutido ("encoding": "none"), forçando o caminho raw. latency simula a
+# ida e volta da rede (segundos por requisição).
+
+import json
+import base64
+import hashlib
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+INLINE_LIMIT = 1024 * 1024
+
+
+def blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _json(self, status, obj, headers=None):
+        h = {"Content-Type": "application/json"}
+        h.update(headers or {})
+        self._send(status, json.dumps(obj).encode("utf-8"), h)
+
+    def _route(self):
+        """/repos/{owner}/{name}/{kind}/{resto} -> (kind, resto)."""
+        parts = self.path.split("?", 1)[0].split("/", 5)
+        if len(parts) < 6 or parts[1] != "repos":
+            return None, None
+        return parts[4], parts[5]
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        kind, rest = self._route()
+        files = self.server.files
+        if kind == "git" and rest.startswith("blobs/"):
+            sha = rest[len("blobs/"):]
+            data = next((d for d in files.values() if blob_sha(d) == sha), None)
+            if data is None:
+                return self._json(404, {"message": "Not Found"})
+            return self._send(200, data)
+        if kind == "contents" and rest not in files:
+            # Listagem de diretório (sem conteúdo), como a Contents API
+            prefix = rest.strip("/") + "/" if rest.strip("/") else ""
+            listing = [{"type": "file", "path": p, "name": p[len(prefix):], "sha": blob_sha(d), "size": len(d)}
+                       for p, d in files.items() if p.startswith(prefix) and "/" not in p[len(prefix):]]
+            if listing:
+                return self._json(200, listing)
+        if kind != "contents" or rest not in files:
+            return self._json(404, {"message": "Not Found"})
+
+        data = files[rest]
+        sha = blob_sha(data)
+        etag = f'W/"{sha}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers={"ETag": etag})
+        if self.headers.get("Accept", "").startswith("application/vnd.github.raw"):
+            return self._send(200, data, {"ETag": etag})
+        if len(data) > INLINE_LIMIT:
+            payload = {"sha": sha, "size": len(data), "content": "", "encoding": "none"}
+        else:
+            payload = {"sha": sha, "size": len(data), "encoding": "base64",
+                       "content": base64.encodebytes(data).decode("ascii")}
+        self._json(200, payload, {"ETag": etag})
+
+    def do_PUT(self):
+        self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        kind, rest = self._route()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if kind != "contents":
+            return self._json(404, {"message": "Not Found"})
+        current = self.server.files.get(rest)
+        if current is not None and body.get("sha") != blob_sha(current):
+            return self._json(409, {"message": "sha does not match"})
+        data = base64.b64decode(body.get("content", ""))
+        self.server.files[rest] = data
+        self._json(201 if current is None else 200, {"content": {"path": rest, "sha": blob_sha(data)}})
+
+
+class FakeGitHub:
+    """Uso: with FakeGitHub() as gh: gh.files['clientes.csv'] = b'...'; gh.api_url"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.files = {}
+        self.server.requests = 0
+        self.server.latency = latency
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def files(self):
+        return self.server.files
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,312 @@
+# bench/run.py
+# Benchmark ponta a ponta: carga, seleção, e-mail, Excel e tabela
+# ---------------------------------------------------------------
+# Tudo roda localmente: o GitHub é substituído por bench.fake_github
+# (via GITHUB_API_URL) e o SMTP por bench.smtp_sink. Os dados são
+# sintéticos e determinísticos (bench.datagen, semente fixa).
+#
+# Uso:
+#   python -m bench.run --sizes 1000,10000,100000,1000000 --out bench-results.json
+#   python -m bench.run --sizes 10000 --baseline bench-results.json --tolerance 0.25
+#
+# Etapas medidas (segundos, mediana de --repeat execuções):
+#   fetch          GitHubClient.get_file (JSON/base64 ou blob bruto > 1 MB)
+#   parse          records.load_clients_from_text
+#   stream_select  notify.stream_clients_from_github + selecionar_vencimentos
+#   select         alerts.selecionar_vencimentos sobre a lista carregada
+#   parallel_select parallel.select_from_texts (carga + seleção em --workers
+#                  processos; confere que o resultado é igual ao de select)
+#   snapshot_save  columnar.ClientColumns.from_clients + save (snapshot binário)
+#   snapshot_load  ClientColumns.load (mmap) + to_clients; confere com parse
+#   index_build    ExpiryIndex(clientes)
+#   index_select   selecionar_vencimentos sobre o ExpiryIndex
+#   compose_email  alerts.compor_email
+#   smtp_send      envio da mensagem ao servidor SMTP local (mailer.Mailer)
+#   excel_export   exporter.export_xlsx (até --max-excel-rows)
+#   table_refresh  SortedRows.reset + VirtualTable.set_rows (Treeview real
+#                  se houver display; senão um Treeview nulo, display=false)
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+from bench.datagen import generate_csv
+from bench.fake_github import FakeGitHub
+from bench.smtp_sink import SMTPSink
+
+import alerts
+import dates
+import expiry
+import notify
+import parallel
+import records
+from columnar import ClientColumns
+from expiry import ExpiryIndex, parse_thresholds, tag_for_delta
+from githubapi import GitHubClient
+from mailer import Mailer
+from tableView import SortedRows, VirtualTable
+
+REPO = "bench/reminder"
+FILE = "clientes.csv"
+
+
+# ---------- Treeview nulo (sem display) ----------
+
+class _NullWidget:
+    """Aceita as chamadas que o VirtualTable faz ao Treeview/Scrollbar."""
+
+    def __init__(self):
+        self.items = {}
+
+    def bind(self, *a, **kw):
+        pass
+
+    def configure(self, *a, **kw):
+        pass
+
+    def set(self, *a):
+        pass
+
+    def yview(self, *a):
+        pass
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.items[iid] = (values, tags)
+        return iid
+
+    def item(self, iid, **kw):
+        self.items[iid] = (kw.get("values"), kw.get("tags"))
+
+    def move(self, *a):
+        pass
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.pop(iid, None)
+
+    def selection(self):
+        return ()
+
+    def selection_set(self, *a):
+        pass
+
+    def focus(self, *a):
+        pass
+
+
+def _make_tree():
+    """(tree, scrollbar, root, display) — Treeview real quando há display."""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception:
+        w = _NullWidget()
+        return w, w, None, False
+    tree = ttk.Treeview(root, columns=("empresa", "vencimento"), show="headings", height=20)
+    return tree, ttk.Scrollbar(root, orient="vertical"), root, True
+
+
+# ---------- Etapas ----------
+
+def _timed(fn, *args, **kw):
+    gc.collect()
+    t0 = time.perf_counter()
+    out = fn(*args, **kw)
+    return time.perf_counter() - t0, out
+
+
+def _row_builder(today):
+    def build(idx, c):
+        tag = "normal" if c.ordinal is None else tag_for_delta(c.ordinal - today)
+        tags = (("even" if idx % 2 == 0 else "odd"),) if tag == "normal" else (tag,)
+        return str(c.id), (c.empresa, c.display), tags
+    return build
+
+
+def _same_selection(a, b):
+    key = lambda pairs: [(c.empresa, c.display, d, c.extra) for c, d in pairs]
+    return key(a[0]) == key(b[0]) and key(a[1]) == key(b[1])
+
+
+def run_size(rows, gh, sink, thresholds, tmpdir, max_excel_rows, tree_parts, workers=None):
+    """Executa todas as etapas uma vez para o arquivo já publicado no fake."""
+    from exporter import export_xlsx
+
+    cfg = {"SMTP_EMAIL": "bench@local", "SMTP_APP_PASSWORD": "x",
+           "OWNER_EMAIL": "owner@local", "FROM_NAME": "3N Bench"}
+    out = {}
+
+    out["fetch"], res = _timed(gh.get_file)
+    out["parse"], clients = _timed(records.load_clients_from_text, res.text)
+
+    def stream_select():
+        stats = {}
+        sel = alerts.selecionar_vencimentos(notify.stream_clients_from_github(gh, stats), thresholds)
+        return stats["clientes"], sel
+    out["stream_select"], (n_stream, _) = _timed(stream_select)
+    if n_stream != len(clients):
+        raise RuntimeError(f"fluxo leu {n_stream} clientes, carga completa leu {len(clients)}")
+
+    out["select"], (expirados, proximos) = _timed(alerts.selecionar_vencimentos, clients, thresholds)
+    out["parallel_select"], (n_par, *sel_par) = _timed(
+        parallel.select_from_texts, [res.text], dates.today_ordinal(), max(thresholds), workers)
+    if n_par != len(clients) or not _same_selection(sel_par, (expirados, proximos)):
+        raise RuntimeError("seleção paralela e sequencial divergem")
+    snap = os.path.join(tmpdir, f"clientes-{rows}.snap")
+    out["snapshot_save"], _ = _timed(lambda: ClientColumns.from_clients(clients, source="bench").save(snap))
+    out["snapshot_load"], loaded = _timed(lambda: ClientColumns.load(snap, source="bench").to_clients())
+    os.remove(snap)
+    if records.clients_to_csv(loaded) != records.clients_to_csv(clients):
+        raise RuntimeError("snapshot em colunas e CSV divergem")
+    del loaded
+    out["index_build"], idx = _timed(ExpiryIndex, clients)
+    out["index_select"], sel_idx = _timed(alerts.selecionar_vencimentos, idx, thresholds)
+    if [c.id for c, _ in sel_idx[0] + sel_idx[1]] != [c.id for c, _ in expirados + proximos]:
+        raise RuntimeError("ExpiryIndex e seleção em lote divergem")
+
+    out["compose_email"], msg = _timed(alerts.compor_email, cfg, expirados, proximos, thresholds)
+
+    def send():
+        with Mailer(sink.host, sink.port, cfg["SMTP_EMAIL"], cfg["SMTP_APP_PASSWORD"], security="none", rate=0) as m:
+            m.send(msg)
+    out["smtp_send"], _ = _timed(send)
+
+    sorted_rows = SortedRows(key=lambda c: c.sort_key)
+    sorted_rows.reset(clients)
+    if rows <= max_excel_rows:
+        path = os.path.join(tmpdir, f"export-{rows}.xlsx")
+        out["excel_export"], _ = _timed(export_xlsx, sorted_rows, path)
+        os.remove(path)
+    else:
+        out["excel_export"] = None
+
+    tree, scroll, root, _ = tree_parts
+    table = VirtualTable(tree, scroll, _row_builder(dates.today_ordinal()))
+
+    def refresh():
+        sorted_rows.reset(clients)
+        table.set_rows(sorted_rows)
+        if root is not None:
+            root.update_idletasks()
+    out["table_refresh"], _ = _timed(refresh)
+
+    out["_counts"] = {"clientes": len(clients), "vencidos": len(expirados),
+                      "proximos": len(proximos), "bytes": len(res.text.encode("utf-8"))}
+    return out
+
+
+def summarize(samples):
+    """Mediana e mínimo por etapa a partir de várias execuções."""
+    stages = {}
+    for key in samples[0]:
+        if key.startswith("_"):
+            continue
+        values = [s[key] for s in samples if s[key] is not None]
+        stages[key] = None if not values else {
+            "median_s": round(statistics.median(values), 6),
+            "min_s": round(min(values), 6),
+        }
+    return stages
+
+
+def compare(results, baseline, tolerance):
+    """Lista de regressões (etapa mais lenta que baseline * (1 + tolerance))."""
+    base = {r["rows"]: r["stages"] for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = base.get(r["rows"])
+        if not old:
+            continue
+        for stage, cur in r["stages"].items():
+            prev = old.get(stage)
+            if not cur or not prev or prev["median_s"] <= 0:
+                continue
+            ratio = cur["median_s"] / prev["median_s"]
+            if ratio > 1 + tolerance:
+                regressions.append({"rows": r["rows"], "stage": stage, "baseline_s": prev["median_s"],
+                                    "current_s": cur["median_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Tamanhos da carteira, separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por tamanho (usa a mediana)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-excel-rows", type=int, default=100_000,
+                        help="Acima disso a exportação Excel é pulada")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processos da etapa parallel_select (padrão: núcleos da máquina)")
+    parser.add_argument("--out", help="Grava os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Regressão tolerada sobre a baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s.replace("_", "")) for s in args.sizes.split(",") if s.strip()]
+    thresholds = parse_thresholds(os.environ.get("DAYS_THRESHOLDS"))
+    tree_parts = _make_tree()
+    results = []
+
+    with FakeGitHub() as fake, SMTPSink() as sink, tempfile.TemporaryDirectory() as tmpdir:
+        gh = GitHubClient(REPO, "bench-token", file_path=FILE, api_url=fake.api_url, retries=0)
+        try:
+            for rows in sizes:
+                fake.files[FILE] = generate_csv(rows, seed=args.seed).encode("utf-8")
+                samples = [run_size(rows, gh, sink, thresholds, tmpdir, args.max_excel_rows, tree_parts, args.workers)
+                           for _ in range(max(1, args.repeat))]
+                stages = summarize(samples)
+                results.append({"rows": rows, **samples[0]["_counts"], "stages": stages})
+                line = "  ".join(f"{k}={v['median_s']:.4f}s" for k, v in stages.items() if v)
+                print(f"⏱️ {rows:>9} linhas: {line}")
+        finally:
+            gh.close()
+        smtp_messages = sink.messages
+
+    if tree_parts[2] is not None:
+        tree_parts[2].destroy()
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": expiry.load_numpy().__version__ if expiry.load_numpy() is not None else None,
+            "display": tree_parts[3],
+            "thresholds": list(thresholds),
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "smtp_messages": smtp_messages,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados gravados em {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"❌ {r['rows']} linhas, {r['stage']}: {r['baseline_s']}s -> {r['current_s']}s ({r['ratio']}x)")
+        if regressions:
+            return 1
+        print(f"✅ Sem regressões acima de {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# bench/smtp_sink.py
+# Servidor SMTP local que aceita e descarta mensagens
+# ---------------------------------------------------------------
+# Implementa o mínimo do protocolo (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL,
+# RCPT, DATA, RSET, NOOP, QUIT) sem TLS. Conta mensagens e bytes
+# recebidos; opcionalmente guarda as últimas mensagens para inspeção.
+# Para testar novas tentativas: flaky=N responde 451 a cada N-ésima
+# mensagem e drop_after=N derruba a conexão após N mensagens.
+
+import threading
+import socketserver
+from collections import deque
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, text):
+        self.wfile.write(text.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        srv = self.server
+        srv.connections += 1
+        self._reply("220 sink ESMTP")
+        in_data, size, lines, on_conn = False, 0, [], 0
+        for raw in self.rfile:
+            if in_data:
+                if raw.rstrip(b"\r\n") == b".":
+                    in_data = False
+                    with srv.lock:
+                        srv.attempts += 1
+                        reject = srv.flaky and srv.attempts % srv.flaky == 0
+                        if not reject:
+                            srv.messages += 1
+                            srv.bytes += size
+                            if srv.kept is not None:
+                                srv.kept.append(b"".join(lines))
+                    if reject:
+                        self._reply("451 Temporary failure, try again")
+                        continue
+                    self._reply("250 OK queued")
+                    on_conn += 1
+                    if srv.drop_after and on_conn >= srv.drop_after:
+                        return
+                else:
+                    size += len(raw)
+                    if srv.kept is not None:
+                        lines.append(raw)
+                continue
+            cmd = raw[:4].upper()
+            if cmd == b"EHLO":
+                self._reply("250-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+            elif cmd == b"AUTH":
+                if raw.split()[1:2] == [b"LOGIN"]:
+                    self._reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._reply("235 Authentication successful")
+            elif cmd == b"DATA":
+                in_data, size, lines = True, 0, []
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif cmd == b"QUIT":
+                self._reply("221 Bye")
+                return
+            elif cmd in (b"HELO", b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                self._reply("250 OK")
+            else:
+                self._reply("500 Command not recognized")
+
+
+class SMTPSink:
+    """Uso: with SMTPSink() as sink: smtplib.SMTP(sink.host, sink.port) ..."""
+
+    def __init__(self, host="127.0.0.1", port=0, keep=0, flaky=0, drop_after=0):
+        self.server = socketserver.ThreadingTCPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.messages = 0
+        self.server.attempts = 0
+        self.server.flaky = flaky
+        self.server.drop_after = drop_after
+        self.server.bytes = 0
+        self.server.connections = 0
+        self.server.kept = deque(maxlen=keep) if keep else None
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    host = property(lambda self: self.server.server_address[0])
+    port = property(lambda self: self.server.server_address[1])
+    messages = property(lambda self: self.server.messages)
+    connections = property(lambda self: self.server.connections)
+    kept = property(lambda self: list(self.server.kept or ()))
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
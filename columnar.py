@@ -0,0 +1,227 @@
+# columnar.py
+# Carteira em colunas + snapshot binário (mmap)
+# ---------------------------------------------------------------
+# ClientColumns guarda a carteira como colunas em vez de um objeto por
+# cliente:
+#   names     -> lista de nomes (sys.intern: nomes repetidos são um só str)
+#   ordinals  -> array('i') com o ordinal da data (0 = sem data)
+#   raw/extra -> só as linhas que têm data não reconhecida / colunas extras
+#   codes     -> array('b') com o código de status (TAG_NAMES) de cada
+#                linha, calculado em lote para um dia (codes_key)
+# A ordem por data é uma permutação array('i'). Registros (records.Client)
+# só são criados para as linhas que alguém vai usar (avisos do daemon).
+#
+# Quem usa: notify.py --daemon. A GUI continua com registros Client (a
+# tabela, a busca, a edição e o merge trabalham sobre eles).
+#
+# Snapshot: a carteira é gravada em binário (SNAPSHOT_NAME em CACHE_DIR)
+# junto com a revisão de origem (SHA do arquivo ou hash dos shards). Na
+# partida o arquivo é mapeado (mmap) e as colunas são copiadas para arrays
+# (o mapa é fechado em seguida: no Windows um arquivo mapeado não pode ser
+# substituído), sem interpretar CSV nem datas.
+#
+# Formato (little-endian):
+#   cabeçalho "<8sIIIII" (magic, versão, linhas, bytes da origem, dos nomes,
+#   do JSON de raw/extra/codes_key) + 4 bytes de alinhamento |
+#   ordinais int32 | códigos int8 | origem utf-8 | nomes utf-8 separados
+#   por \0 | JSON
+
+import io
+import sys
+import csv
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+import dates
+from csvcache import write_atomic_bytes
+from expiry import GUI_LIMITS, NO_DATE, TAG_NAMES, classify_ordinals, next_crossing_day
+from records import CORE_COLUMNS, Client
+from timing import timed
+
+SNAPSHOT_NAME = "clientes.snap"
+MAGIC = b"3NCOLS\0\0"
+VERSION = 2
+HEADER = struct.Struct("<8sIIIII")
+DATA_OFFSET = 32  # cabeçalho (28) + alinhamento dos ordinais
+
+
+class ClientColumns:
+    def __init__(self, names=(), ordinals=None, raw=None, extra=None, columns=(), source=None,
+                 codes=None, codes_key=None):
+        self.names = list(names)
+        self.ordinals = ordinals if ordinals is not None else array("i")
+        self.raw = raw or {}          # linha -> texto da data não reconhecida
+        self.extra = extra or {}      # linha -> {coluna: valor}
+        self.columns = list(columns)  # colunas extras, na ordem do CSV
+        self.source = source          # revisão do conteúdo de origem (snapshot)
+        self.codes = codes            # array('b') de status por linha (ou None)
+        self.codes_key = codes_key    # (hoje, limites) para os quais codes vale
+        self._order = None            # (permutação por data, ordinais ordenados)
+
+    def __len__(self):
+        return len(self.names)
+
+    # ---------- Construção ----------
+    @classmethod
+    def from_clients(cls, clients, source=None):
+        cols = cls(source=source)
+        names, ords, raw, extra = cols.names, cols.ordinals, cols.raw, cols.extra
+        seen = {}
+        intern = sys.intern
+        for i, c in enumerate(clients):
+            names.append(intern(c.empresa))
+            ords.append(NO_DATE if c.ordinal is None else c.ordinal)
+            if c.raw:
+                raw[i] = c.raw
+            if c.extra:
+                extra[i] = dict(c.extra)
+                for k in c.extra:
+                    seen.setdefault(k, None)
+        cols.columns = list(seen)
+        return cols
+
+    @classmethod
+    @timed("parse")
+    def from_text(cls, text, source=None):
+        """CSV -> colunas, sem criar um registro por linha (mesmas regras de records.iter_clients)."""
+        reader = csv.reader(io.StringIO(text or ""))
+        header = next(reader, None) or []
+        pos = {name: i for i, name in enumerate(header)}
+        emp_i = pos.get("empresa")
+        venc_i = pos.get("vencimento")
+        extra_cols = [(name, i) for name, i in pos.items() if name and name not in CORE_COLUMNS]
+        cols = cls(columns=[name for name, _ in extra_cols], source=source)
+        if emp_i is None:
+            return cols
+        names, ords, raw, extra = cols.names, cols.ordinals, cols.raw, cols.extra
+        parse = dates.parse_ordinal
+        intern = sys.intern
+        for row in reader:
+            n = len(row)
+            emp = row[emp_i].strip() if emp_i < n else ""
+            if not emp:
+                continue
+            venc = row[venc_i].strip() if venc_i is not None and venc_i < n else ""
+            o = parse(venc)
+            i = len(names)
+            names.append(intern(emp))
+            ords.append(NO_DATE if o is None else o)
+            if o is None and venc:
+                raw[i] = venc
+            if extra_cols:
+                values = {name: row[j] for name, j in extra_cols if j < n and row[j]}
+                if values:
+                    extra[i] = values
+        return cols
+
+    # ---------- Registros ----------
+    def client(self, i):
+        o = self.ordinals[i]
+        return Client.from_parsed(self.names[i], None if o == NO_DATE else o,
+                                  self.raw.get(i), self.extra.get(i))
+
+    def to_clients(self):
+        make = Client.from_parsed
+        raw, extra = self.raw, self.extra
+        if not raw and not extra:
+            return [make(name, o or None) for name, o in zip(self.names, self.ordinals)]
+        return [make(name, o or None, raw.get(i), extra.get(i))
+                for i, (name, o) in enumerate(zip(self.names, self.ordinals))]
+
+    # ---------- Consultas ----------
+    def status(self, today, limits=GUI_LIMITS):
+        """Coluna codes (TAG_NAMES por linha), recalculada quando o dia ou os limites mudam."""
+        key = (today, tuple(limits))
+        if self.codes is None or self.codes_key != key:
+            codes = classify_ordinals(self.ordinals, today, limits)
+            self.codes = array("b", codes.tobytes() if hasattr(codes, "tobytes") else codes)
+            self.codes_key = key
+        return self.codes
+
+    def status_counts(self, today, limits=GUI_LIMITS):
+        """Quantidade de linhas por nome de TAG_NAMES."""
+        codes = self.status(today, limits)
+        return {name: codes.count(i) for i, name in enumerate(TAG_NAMES)}
+
+    def _by_date(self):
+        """(linhas com data ordenadas por data e posição, ordinais nessa ordem)."""
+        if self._order is None:
+            ords = self.ordinals
+            perm = array("i", sorted((i for i in range(len(ords)) if ords[i] != NO_DATE),
+                                     key=ords.__getitem__))
+            self._order = (perm, array("i", (ords[i] for i in perm)))
+        return self._order
+
+    def select(self, today, horizon):
+        """(expirados, proximos) como alerts.selecionar_vencimentos, criando só esses registros."""
+        perm, so = self._by_date()
+        i = bisect_left(so, today)
+        j = bisect_right(so, today + horizon)
+        expirados = [(self.client(perm[k]), so[k] - today) for k in range(i)]
+        proximos = [(self.client(perm[k]), so[k] - today) for k in range(i, j)]
+        return expirados, proximos
+
+    def next_crossing(self, thresholds, today):
+        return next_crossing_day(self._by_date()[1], thresholds, today)
+
+    # ---------- Snapshot ----------
+    def save(self, path):
+        ords = self.ordinals
+        if sys.byteorder != "little":
+            ords = array("i", ords)
+            ords.byteswap()
+        n = len(self.names)
+        codes = self.codes if self.codes is not None and len(self.codes) == n else None
+        source = (self.source or "").encode("utf-8")
+        names = "\0".join(self.names).encode("utf-8")
+        meta = json.dumps({"columns": self.columns, "raw": self.raw, "extra": self.extra,
+                           "codes_key": self.codes_key if codes is not None else None},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        header = HEADER.pack(MAGIC, VERSION, n, len(source), len(names), len(meta))
+        write_atomic_bytes(path, b"".join((
+            header, b"\0" * (DATA_OFFSET - HEADER.size), ords.tobytes(),
+            codes.tobytes() if codes is not None else bytes(n), source, names, meta)))
+
+    @classmethod
+    def load(cls, path, source=None):
+        """Lê o snapshot via mmap; None se não existir, for inválido ou de outra revisão."""
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return cls._from_buffer(mm, source)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @classmethod
+    def _from_buffer(cls, mm, source):
+        magic, version, n, slen, nlen, mlen = HEADER.unpack_from(mm, 0)
+        end = DATA_OFFSET + 5 * n + slen + nlen + mlen
+        if magic != MAGIC or version != VERSION or len(mm) != end:
+            return None
+        pos = DATA_OFFSET + 5 * n
+        src = mm[pos:pos + slen].decode("utf-8") or None
+        if source is not None and src != source:
+            return None
+        ords, codes = array("i"), array("b")
+        with memoryview(mm) as mv:
+            ords.frombytes(mv[DATA_OFFSET:DATA_OFFSET + 4 * n])
+            codes.frombytes(mv[DATA_OFFSET + 4 * n:pos])
+            pos += slen
+            names = str(mv[pos:pos + nlen], "utf-8").split("\0") if n else []
+            pos += nlen
+            meta = json.loads(str(mv[pos:pos + mlen], "utf-8"))
+        if sys.byteorder != "little":
+            ords.byteswap()
+        if len(names) != n:
+            return None
+        key = meta.get("codes_key")
+        intern = sys.intern
+        return cls(
+            names=[intern(s) for s in names], ordinals=ords,
+            raw={int(k): v for k, v in meta.get("raw", {}).items()},
+            extra={int(k): v for k, v in meta.get("extra", {}).items()},
+            columns=meta.get("columns", ()), source=src,
+            codes=codes if key else None, codes_key=(key[0], tuple(key[1])) if key else None,
+        )
@@ -0,0 +1,60 @@
+# csvcache.py
+# Cache em disco do último clientes.csv baixado do GitHub
+# ---------------------------------------------------------------
+# Guarda o texto já decodificado junto com o ETag e o SHA do blob.
+# O ETag permite GET condicional (If-None-Match): quando o GitHub
+# responde 304, o conteúdo em cache é reaproveitado sem baixar nem
+# decodificar nada. O mesmo arquivo serve de partida rápida (offline).
+
+import os
+import json
+from pathlib import Path
+
+
+class ContentCache:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta_path = self.path.with_name(self.path.name + ".meta.json")
+
+    def load(self):
+        """Retorna (texto, meta) ou (None, {}) se não houver cache válido."""
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            with open(self.path, encoding="utf-8", newline="") as f:
+                text = f.read()
+        except (OSError, ValueError):
+            return None, {}
+        return text, meta
+
+    def meta(self):
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def store(self, text, etag=None, sha=None):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, text)
+        write_atomic(self.meta_path, json.dumps({"etag": etag, "sha": sha}))
+
+    def clear(self):
+        for p in (self.path, self.meta_path):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def write_atomic(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_atomic_bytes(path, data: bytes):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,374 @@
+# daemon.py
+# Modo contínuo do notificador (python notify.py --daemon)
+# ---------------------------------------------------------------
+# Em vez de uma execução a frio por dia (cron), o processo fica no ar com a
+# carteira carregada em memória e a sessão HTTP aberta:
+#   - "refresh": a cada NOTIFY_REFRESH segundos um GET condicional (ETag;
+#     com shards, o hash da listagem). 304/igual não baixa nada; conteúdo
+#     novo recarrega os clientes e confere se alguém já entrou numa faixa.
+#     A carteira fica em colunas (columnar.ClientColumns): registros só são
+#     criados para os clientes de cada aviso. Com CACHE_DIR, as colunas são
+#     gravadas em snapshot (clientes.snap) e a próxima partida as mapeia em
+#     vez de reinterpretar o CSV.
+#   - "check": às NOTIFY_AT do próximo dia em que algum cliente cruza um
+#     limite de DAYS_THRESHOLDS (ou vence), envia os avisos novos (ledger.py
+#     evita repetir quem já foi avisado na mesma faixa). Na partida, e quando
+#     o conteúdo muda, o check vai para hoje às NOTIFY_AT se o horário ainda
+#     não passou; nada é enviado fora de NOTIFY_AT.
+# Os eventos ficam num heap (min-heap por horário); o laço dorme até o
+# próximo evento. SIGTERM/SIGINT encerram entre eventos.
+#
+# GET /health (JSON; 503 se o último refresh bem-sucedido for antigo) e
+# GET /metrics (formato texto do Prometheus) em NOTIFY_HTTP.
+#
+# Variáveis de ambiente (além das do notify.py):
+#   NOTIFY_REFRESH -> segundos entre GETs condicionais (padrão 300)
+#   NOTIFY_AT      -> horário local dos avisos no dia do cruzamento (HH:MM, padrão 00:00)
+#   NOTIFY_HTTP    -> host:porta do endpoint de saúde (padrão 127.0.0.1:8765; "off" desliga)
+
+import os
+import json
+import heapq
+import signal
+import threading
+import time
+from datetime import date, datetime, time as dtime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+from columnar import ClientColumns, SNAPSHOT_NAME
+from expiry import GUI_LIMITS, TAG_NAMES
+from githubapi import GitHubError
+from ledger import NotificationLedger
+from mailer import MailerError
+from shards import ShardStore
+
+
+def _env(name, default=""):
+    return (os.environ.get(name) or default).strip()
+
+
+def parse_at(value):
+    """'08:30' -> time(8, 30). Vazio ou inválido = meia-noite."""
+    try:
+        h, _, m = (value or "").partition(":")
+        return dtime(int(h), int(m or 0))
+    except ValueError:
+        return dtime(0, 0)
+
+
+# ---------- Agenda ----------
+
+class Scheduler:
+    """Min-heap de (horário, seq, tipo). Reagendar um tipo invalida o anterior."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = count()
+        self._current = {}  # tipo -> seq da entrada válida
+
+    def push(self, when, kind):
+        seq = next(self._seq)
+        self._current[kind] = seq
+        heapq.heappush(self._heap, (when, seq, kind))
+
+    def cancel(self, kind):
+        self._current.pop(kind, None)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._current.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def next_time(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Tipos cujo horário já chegou, em ordem."""
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, seq, kind = heapq.heappop(self._heap)
+            del self._current[kind]
+            due.append(kind)
+
+
+# ---------- Carteira em memória ----------
+
+class WarmClients:
+    """Carteira em colunas mantida em memória, atualizada por GET condicional."""
+
+    def __init__(self, gh, snapshot=None):
+        self.gh = gh
+        self.store = ShardStore.from_env(gh)
+        self.snapshot = snapshot  # caminho do snapshot em colunas (None = sem snapshot)
+        self.source = None   # sha do arquivo ou hash da listagem dos shards
+        self.etag = None
+        self.loaded = False
+        self.columns = ClientColumns()
+        cols = ClientColumns.load(snapshot) if snapshot else None
+        if cols is not None and cols.source:
+            # Partida a partir do snapshot: se o remoto tiver a mesma revisão, o
+            # primeiro refresh não reinterpreta nada
+            self.columns, self.source, self.loaded = cols, cols.source, True
+
+    def refresh(self):
+        """True se o conteúdo mudou (e foi recarregado). Erros levantam GitHubError."""
+        if self.store is not None:
+            fp = self.store.fingerprint()
+            if fp is not None:
+                if fp == self.source:
+                    return False
+                self._set(ClientColumns.from_clients(self.store.load() or (), fp))
+                return True
+        res = self.gh.get_file(etag=self.etag)
+        if res.not_modified:
+            return False
+        if res.status != 200:
+            raise GitHubError(f"status {res.status} ao buscar {self.gh.file_path}")
+        self.etag = res.etag
+        if res.sha and res.sha == self.source:
+            return False
+        self._set(ClientColumns.from_text(res.text, res.sha))
+        return True
+
+    def _set(self, columns):
+        self.columns = columns
+        self.source = columns.source
+        self.loaded = True
+
+    def save(self):
+        """Grava o snapshot (com a coluna de status do dia, se já calculada)."""
+        if not self.snapshot:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.snapshot) or ".", exist_ok=True)
+            self.columns.save(self.snapshot)
+        except OSError as e:
+            print(f"⚠️ Snapshot não gravado: {e}")
+
+
+# ---------- Saúde / métricas ----------
+
+class Metrics:
+    def __init__(self, refresh_s):
+        self.started = time.time()
+        self.refresh_s = refresh_s
+        self.lock = threading.Lock()
+        self.values = {
+            "clients": 0,
+            **{f"clients_{name}": 0 for name in TAG_NAMES},
+            "refresh_total": 0,
+            "refresh_changed_total": 0,
+            "refresh_errors_total": 0,
+            "checks_total": 0,
+            "alerts_total": 0,
+            "send_failures_total": 0,
+            "last_refresh_timestamp_seconds": 0.0,
+            "last_check_timestamp_seconds": 0.0,
+            "next_check_timestamp_seconds": 0.0,
+        }
+
+    def inc(self, key, n=1):
+        with self.lock:
+            self.values[key] += n
+
+    def set(self, key, value):
+        with self.lock:
+            self.values[key] = value
+
+    def snapshot(self):
+        with self.lock:
+            out = dict(self.values)
+        out["uptime_seconds"] = round(time.time() - self.started, 3)
+        return out
+
+    def healthy(self):
+        last = self.values["last_refresh_timestamp_seconds"]
+        return bool(last) and time.time() - last <= 3 * self.refresh_s + 60
+
+
+def _handler(metrics):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            snap = metrics.snapshot()
+            if self.path.rstrip("/") in ("", "/health"):
+                ok = metrics.healthy()
+                body = json.dumps({"status": "ok" if ok else "stale", **snap}).encode("utf-8")
+                self._reply(200 if ok else 503, "application/json", body)
+            elif self.path == "/metrics":
+                lines = []
+                for key, value in snap.items():
+                    kind = "counter" if key.endswith("_total") else "gauge"
+                    lines += [f"# TYPE notify_{key} {kind}", f"notify_{key} {value}"]
+                self._reply(200, "text/plain; version=0.0.4", ("\n".join(lines) + "\n").encode("utf-8"))
+            else:
+                self._reply(404, "text/plain", b"not found\n")
+
+        def _reply(self, status, ctype, body):
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_http(address, metrics):
+    """Sobe o endpoint numa thread; address = 'host:porta' (None se desligado)."""
+    if not address or address.lower() == "off":
+        return None
+    host, _, port = address.rpartition(":")
+    server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _handler(metrics))
+    threading.Thread(target=server.serve_forever, name="notify-http", daemon=True).start()
+    return server
+
+
+# ---------- Laço principal ----------
+
+class NotifierDaemon:
+    def __init__(self, gh, thresholds, send, ledger=None, refresh_s=300, at=dtime(0, 0), clock=time.time,
+                 snapshot=None):
+        """
+        send(expirados, proximos) envia os avisos e retorna True se o resumo
+        do dono foi entregue (só então o ledger é salvo).
+        """
+        self.warm = WarmClients(gh, snapshot)
+        self.thresholds = thresholds
+        self.send = send
+        self.ledger = ledger if ledger is not None else NotificationLedger()
+        self.refresh_s = refresh_s
+        self.at = at
+        self.clock = clock
+        self.scheduler = Scheduler()
+        self.metrics = Metrics(refresh_s)
+        self.stop = threading.Event()
+
+    def _day_time(self, ordinal):
+        return datetime.combine(date.fromordinal(ordinal), self.at).timestamp()
+
+    def _today(self):
+        return date.fromtimestamp(self.clock()).toordinal()
+
+    def _schedule_check(self):
+        """
+        Agenda o próximo check: hoje às NOTIFY_AT se o horário ainda não passou
+        (alcança o que cruzou com o processo fora do ar), senão às NOTIFY_AT
+        do próximo dia de cruzamento de faixa.
+        """
+        now = self.clock()
+        today = date.fromtimestamp(now).toordinal()
+        when = self._day_time(today)
+        if when <= now:
+            day = self.warm.columns.next_crossing(self.thresholds, today)
+            if day is None:
+                self.scheduler.cancel("check")
+                self.metrics.set("next_check_timestamp_seconds", 0.0)
+                return
+            when = self._day_time(day)
+        self.scheduler.push(when, "check")
+        self.metrics.set("next_check_timestamp_seconds", when)
+
+    def refresh(self):
+        self.metrics.inc("refresh_total")
+        try:
+            changed = self.warm.refresh()
+        except Exception as e:  # rede, JSON inesperado...: o daemon segue e /health fica "stale"
+            self.metrics.inc("refresh_errors_total")
+            print(f"⚠️ Falha ao atualizar clientes: {e}")
+            return False
+        self.metrics.set("last_refresh_timestamp_seconds", time.time())
+        if changed:
+            self.metrics.inc("refresh_changed_total")
+            print(f"✅ {len(self.warm.columns)} clientes carregados")
+        if self.warm.loaded:
+            self.metrics.set("clients", len(self.warm.columns))
+            self._update_status(self._today())
+        return changed
+
+    def _update_status(self, today):
+        """Contagem por status (coluna codes do dia) nas métricas; grava o snapshot se a coluna mudou."""
+        cols = self.warm.columns
+        fresh = cols.codes_key == (today, GUI_LIMITS)
+        for name, n in cols.status_counts(today, GUI_LIMITS).items():
+            self.metrics.set(f"clients_{name}", n)
+        if not fresh:
+            self.warm.save()
+
+    def check(self):
+        """Envia os cruzamentos novos desde o último aviso; reagenda o próximo dia."""
+        if not self.warm.loaded:
+            return  # sem carteira, o ledger esqueceria todos os avisos
+        self.metrics.inc("checks_total")
+        self.metrics.set("last_check_timestamp_seconds", time.time())
+        today = self._today()
+        self._update_status(today)
+        state = self.ledger.snapshot()
+        expirados, proximos = self.warm.columns.select(today, max(self.thresholds))
+        expirados, proximos = self.ledger.filter_new(expirados, proximos, self.thresholds)
+        self.ledger.mark_run(self.warm.source, today, self.thresholds)
+        novos = len(expirados) + len(proximos)
+        if novos:
+            print(f"🆕 {len(expirados)} vencidos | {len(proximos)} próximos desde o último aviso")
+            try:
+                delivered = self.send(expirados, proximos)
+            except MailerError as e:
+                print(f"❌ Falha no envio: {e}")
+                delivered = False
+            if not delivered:
+                self.metrics.inc("send_failures_total")
+                # Volta o ledger e tenta de novo no próximo refresh
+                self.ledger.restore(state)
+                self.scheduler.push(self.clock() + self.refresh_s, "check")
+                return
+            self.metrics.inc("alerts_total", novos)
+        self.ledger.save()
+        self._schedule_check()
+
+    def run(self):
+        self.refresh()
+        self._schedule_check()
+        self.scheduler.push(self.clock() + self.refresh_s, "refresh")
+        while not self.stop.is_set():
+            nxt = self.scheduler.next_time()
+            self.stop.wait(max(0.0, nxt - self.clock()) if nxt is not None else self.refresh_s)
+            if self.stop.is_set():
+                break
+            for kind in self.scheduler.pop_due(self.clock()):
+                if kind == "refresh":
+                    if self.refresh():
+                        self._schedule_check()  # clientes novos podem já estar numa faixa
+                    self.scheduler.push(self.clock() + self.refresh_s, "refresh")
+                elif kind == "check":
+                    self.check()
+
+
+def run_daemon(gh, thresholds, send, ledger=None):
+    """Sobe o daemon com a configuração do ambiente e bloqueia até SIGTERM/SIGINT."""
+    cache_dir = _env("CACHE_DIR")
+    daemon = NotifierDaemon(
+        gh, thresholds, send, ledger=ledger,
+        refresh_s=max(1.0, float(_env("NOTIFY_REFRESH", "300"))),
+        at=parse_at(_env("NOTIFY_AT", "00:00")),
+        snapshot=os.path.join(cache_dir, SNAPSHOT_NAME) if cache_dir else None,
+    )
+    server = start_http(_env("NOTIFY_HTTP", "127.0.0.1:8765"), daemon.metrics)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: daemon.stop.set())
+    if server is not None:
+        print(f"🩺 Saúde em http://{server.server_address[0]}:{server.server_address[1]}/health e /metrics")
+    print(f"🔁 Daemon ativo: refresh a cada {daemon.refresh_s:g}s, avisos às {daemon.at:%H:%M}")
+    try:
+        daemon.run()
+    finally:
+        if server is not None:
+            server.shutdown()
+        print("👋 Daemon encerrado.")
+    return daemon
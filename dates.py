@@ -0,0 +1,95 @@
+# dates.py
+# Motor de datas compartilhado entre notify.py e appScreens.py
+# ---------------------------------------------------------------
+# Formatos aceitos: DD/MM/AAAA e AAAA-MM-DD.
+# As datas são representadas internamente como ordinais (date.toordinal()),
+# o que permite comparar, ordenar e calcular deltas com inteiros simples.
+#
+# Os dois formatos têm caminho rápido (fatiamento + int), sem strptime.
+# Resultados ficam em cache: uma carteira grande repete poucas datas distintas.
+
+from datetime import date, datetime
+from functools import lru_cache
+
+_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+
+
+def _ymd_to_ordinal(y: int, m: int, d: int):
+    try:
+        return date(y, m, d).toordinal()
+    except ValueError:
+        return None
+
+
+def _parse_slow(s: str, formats=_FORMATS):
+    # Variações sem zero à esquerda (ex.: 5/1/2025) continuam aceitas via strptime
+    for fmt in formats:
+        try:
+            return datetime.strptime(s, fmt).date().toordinal()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=65536)
+def _parse_ordinal_cached(s: str):
+    if len(s) == 10:
+        if s[2] == "/" and s[5] == "/":
+            dd, mm, yyyy = s[0:2], s[3:5], s[6:10]
+        elif s[4] == "-" and s[7] == "-":
+            yyyy, mm, dd = s[0:4], s[5:7], s[8:10]
+        else:
+            return None
+        digits = dd + mm + yyyy
+        # isdigit() aceita '²' e dígitos de outras escritas, que int() rejeita
+        if digits.isascii() and digits.isdigit():
+            return _ymd_to_ordinal(int(yyyy), int(mm), int(dd))
+    return _parse_slow(s)
+
+
+def parse_ordinal(s):
+    """Converte 'DD/MM/AAAA' ou 'AAAA-MM-DD' em ordinal; None se inválida."""
+    if not s:
+        return None
+    return _parse_ordinal_cached(s.strip())
+
+
+def parse_date_any(s):
+    o = parse_ordinal(s)
+    return date.fromordinal(o) if o is not None else None
+
+
+def valid_display_date(s) -> bool:
+    """Valida o formato de entrada da interface (DD/MM/AAAA)."""
+    if not s:
+        return False
+    s = s.strip()
+    if len(s) == 10 and s[2] == "/":
+        return parse_ordinal(s) is not None
+    return _parse_slow(s, ("%d/%m/%Y",)) is not None
+
+
+@lru_cache(maxsize=65536)
+def ordinal_to_display(o: int) -> str:
+    d = date.fromordinal(o)
+    return f"{d.day:02d}/{d.month:02d}/{d.year:04d}"
+
+
+@lru_cache(maxsize=65536)
+def ordinal_to_iso(o: int) -> str:
+    d = date.fromordinal(o)
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+
+def format_date_display(s):
+    o = parse_ordinal(s)
+    return ordinal_to_display(o) if o is not None else s or ""
+
+
+def to_iso_str(s):
+    o = parse_ordinal(s)
+    return ordinal_to_iso(o) if o is not None else ""
+
+
+def today_ordinal() -> int:
+    return date.today().toordinal()
@@ -0,0 +1,208 @@
+# expiry.py
+# Índice de vencimentos e faixas de alerta (DAYS_THRESHOLDS)
+# ---------------------------------------------------------------
+# Os clientes com data ficam ordenados por ordinal; "vencidos",
+# "vencendo entre X e Y dias" e as faixas de DAYS_THRESHOLDS viram
+# buscas bisect em O(log n + k), sem varrer a carteira inteira.
+# A mesma classificação por faixa é usada nas cores da tabela (GUI).
+#
+# Com NumPy instalado (opcional), a classificação em lote converte a coluna
+# de datas em um vetor int32 de ordinais e calcula deltas e faixas numa
+# única operação vetorizada; sem NumPy, cai para o caminho em Python puro.
+# O NumPy só é importado na primeira classificação em lote (load_numpy),
+# para não pesar na abertura da GUI.
+
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+_np = False  # False = ainda não tentou importar
+
+
+def load_numpy():
+    """Módulo numpy, ou None se não estiver instalado (importado uma vez)."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:  # opcional
+            numpy = None
+        _np = numpy
+    return _np
+
+
+DEFAULT_THRESHOLDS = (30,)
+
+# Faixas de cor da tabela/Excel: até 15 dias, até 30 dias, depois disso
+GUI_LIMITS = (15, 30)
+GUI_TAGS = ("due_15", "due_month", "ok_far")
+
+# Códigos da classificação em lote (índices em TAG_NAMES); ordinal 0 = sem data
+TAG_NAMES = ("normal", "expired") + GUI_TAGS
+NO_DATE = 0
+
+
+def parse_thresholds(value, default=DEFAULT_THRESHOLDS):
+    """'30,15,5' -> (5, 15, 30). Valores inválidos ou negativos são ignorados."""
+    out = set()
+    for part in (value or "").split(","):
+        part = part.strip()
+        if part.isdigit():
+            out.add(int(part))
+    return tuple(sorted(out)) or tuple(default)
+
+
+def tag_for_delta(delta, limits=GUI_LIMITS, tags=GUI_TAGS):
+    """Classifica dias até o vencimento: 'expired' ou a faixa correspondente."""
+    if delta < 0:
+        return "expired"
+    return tags[bisect_left(limits, delta)]
+
+
+class ExpiryIndex:
+    __slots__ = ("_ords", "_clients")
+
+    def __init__(self, clients=()):
+        dated = sorted((c for c in clients if c.ordinal is not None), key=attrgetter("ordinal"))
+        self._clients = dated
+        self._ords = [c.ordinal for c in dated]
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __iter__(self):
+        return iter(self._clients)
+
+    # ---------- Atualização incremental ----------
+    def add(self, c):
+        if c.ordinal is None:
+            return
+        i = bisect_right(self._ords, c.ordinal)
+        self._ords.insert(i, c.ordinal)
+        self._clients.insert(i, c)
+
+    def remove(self, c, ordinal=None):
+        """Remove o registro (ordinal = valor indexado, se a data já foi alterada)."""
+        o = c.ordinal if ordinal is None else ordinal
+        if o is None:
+            return
+        i = bisect_left(self._ords, o)
+        j = bisect_right(self._ords, o)
+        for k in range(i, j):
+            if self._clients[k] is c:
+                del self._ords[k]
+                del self._clients[k]
+                return
+
+    # ---------- Consultas ----------
+    def range(self, lo=None, hi=None):
+        """Clientes com ordinal em [lo, hi] (limites opcionais), em ordem de data."""
+        i = 0 if lo is None else bisect_left(self._ords, lo)
+        j = len(self._ords) if hi is None else bisect_right(self._ords, hi)
+        return self._clients[i:j]
+
+    def count(self, lo=None, hi=None):
+        i = 0 if lo is None else bisect_left(self._ords, lo)
+        j = len(self._ords) if hi is None else bisect_right(self._ords, hi)
+        return max(0, j - i)
+
+    def expired(self, today):
+        return [(c, c.ordinal - today) for c in self.range(hi=today - 1)]
+
+    def expiring_between(self, x, y, today):
+        """Vencendo entre x e y dias a partir de hoje (inclusive)."""
+        return [(c, c.ordinal - today) for c in self.range(today + x, today + y)]
+
+    def next_crossing(self, thresholds, today):
+        return next_crossing_day(self._ords, thresholds, today)
+
+    def buckets(self, thresholds, today):
+        """[(limite, [(cliente, delta), ...]), ...] para faixas (0..t1], (t1..t2], ..."""
+        out = []
+        prev = -1
+        for t in sorted(thresholds):
+            out.append((t, self.expiring_between(prev + 1, t, today)))
+            prev = t
+        return out
+
+
+def next_crossing_day(ords, thresholds, today):
+    """
+    Primeiro dia (ordinal) depois de hoje em que algum cliente entra numa
+    faixa de thresholds (delta == limite) ou vence (delta == -1). None se
+    não houver mais nenhum. ords: ordinais em ordem crescente.
+    """
+    days = []
+    i = bisect_left(ords, today)          # vence no dia seguinte ao vencimento
+    if i < len(ords):
+        days.append(ords[i] + 1)
+    for t in thresholds:
+        i = bisect_right(ords, today + t)  # delta chega a t no dia ordinal - t
+        if i < len(ords):
+            days.append(ords[i] - t)
+    return min(days) if days else None
+
+
+def group_by_threshold(proximos, thresholds):
+    """Agrupa [(cliente, delta)] já ordenados por delta nas faixas de thresholds."""
+    limits = sorted(thresholds)
+    groups = [(t, []) for t in limits]
+    for c, delta in proximos:
+        i = bisect_left(limits, delta)
+        if i < len(limits):
+            groups[i][1].append((c, delta))
+    return groups
+
+
+# ---------- Classificação em lote ----------
+
+def ordinals_of(clients):
+    """Coluna de ordinais (NO_DATE quando não há data): vetor int32 ou lista."""
+    np = load_numpy()
+    if np is not None:
+        return np.fromiter((NO_DATE if c.ordinal is None else c.ordinal for c in clients),
+                           dtype=np.int32, count=len(clients))
+    return [NO_DATE if c.ordinal is None else c.ordinal for c in clients]
+
+
+def classify_ordinals(ords, today, limits=GUI_LIMITS):
+    """Códigos de TAG_NAMES para cada ordinal, calculados numa única passada."""
+    np = load_numpy()
+    if np is not None:
+        a = np.asarray(ords, dtype=np.int32)
+        delta = a - np.int32(today)
+        codes = np.full(a.shape, 2 + len(limits), dtype=np.int8)
+        for limit in limits:
+            codes -= delta <= limit
+        codes[delta < 0] = 1
+        codes[a == NO_DATE] = 0
+        return codes
+    code_of = {name: i for i, name in enumerate(TAG_NAMES)}
+    return [0 if o == NO_DATE else code_of[tag_for_delta(o - today, limits)] for o in ords]
+
+
+def select_expiring(ords, today, horizon):
+    """
+    Índices de vencidos e dos que vencem em 0..horizon dias, cada grupo em
+    ordem de data (estável, como o ExpiryIndex).
+    """
+    np = load_numpy()
+    if np is not None:
+        a = np.asarray(ords, dtype=np.int32)
+        delta = a - np.int32(today)
+        dated = a != NO_DATE
+        exp_idx = np.flatnonzero(dated & (delta < 0))
+        prox_idx = np.flatnonzero(dated & (delta >= 0) & (delta <= horizon))
+        exp_idx = exp_idx[np.argsort(a[exp_idx], kind="stable")]
+        prox_idx = prox_idx[np.argsort(a[prox_idx], kind="stable")]
+        return exp_idx.tolist(), prox_idx.tolist()
+    exp_idx, prox_idx = [], []
+    for i, o in enumerate(ords):
+        if o == NO_DATE:
+            continue
+        if o < today:
+            exp_idx.append(i)
+        elif o - today <= horizon:
+            prox_idx.append(i)
+    exp_idx.sort(key=ords.__getitem__)
+    prox_idx.sort(key=ords.__getitem__)
+    return exp_idx, prox_idx
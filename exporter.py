@@ -0,0 +1,178 @@
+# exporter.py
+# Exportação da lista de clientes para Excel (.xlsx) ou CSV
+# ---------------------------------------------------------------
+# Independente da interface: recebe registros já ordenados e com a data
+# pré-interpretada (records.Client) e grava o arquivo. Pensado para rodar
+# numa thread de trabalho: informa o progresso por callback e pode ser
+# cancelado por um threading.Event (ou qualquer objeto com is_set()).
+#
+# O Excel usa o modo write-only do openpyxl: as linhas vão direto para o
+# arquivo em vez de ficarem todas em memória, e a formatação vem de um
+# conjunto fixo de estilos nomeados, criados uma vez (em vez de novos
+# Font/Border/Alignment/PatternFill a cada célula). Com lxml instalado
+# a serialização fica bem mais rápida.
+
+import os
+import csv
+from copy import copy
+from datetime import datetime
+
+import dates
+from expiry import ordinals_of, classify_ordinals, TAG_NAMES
+from timing import timed
+
+CHUNK = 5000  # linhas entre atualizações de progresso/cancelamento
+
+# Preenchimento por status (TAG_NAMES); "normal" fica sem cor
+STATUS_FILLS = {
+    "expired": "FFC7CE",
+    "due_15": "FCE4D6",
+    "due_month": "FFF2CC",
+    "ok_far": "E2EFDA",
+}
+
+# Rótulos da coluna status no CSV (mesma legenda da tabela)
+STATUS_LABELS = {
+    "normal": "",
+    "expired": "Vencida",
+    "due_15": "Até 15 dias",
+    "due_month": "Até 30 dias",
+    "ok_far": "Longe",
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def _check(cancel, progress, done, total):
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    if progress is not None:
+        progress(done, total)
+
+
+def _write_via_tmp(file_path, write):
+    """Grava num arquivo temporário e só substitui o destino se terminar (cancelar não deixa lixo)."""
+    tmp = f"{file_path}.part"
+    try:
+        write(tmp)
+        os.replace(tmp, file_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _named_styles():
+    from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+
+    thin = Side(style='thin', color='CCCCCC')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    title = NamedStyle(name='3n_title', font=Font(size=18, bold=True), alignment=Alignment(horizontal='center'))
+    subtitle = NamedStyle(name='3n_subtitle', font=Font(size=12), alignment=Alignment(horizontal='center'))
+    header = NamedStyle(name='3n_header', font=Font(color='FFFFFF', bold=True, size=14),
+                        fill=PatternFill('solid', fgColor='1F4E78'), alignment=Alignment(horizontal='center'))
+    styles = [title, subtitle, header]
+
+    # Um estilo por (status, coluna): empresa à esquerda, vencimento centralizado
+    for status in TAG_NAMES:
+        for col, horizontal in (('a', 'left'), ('b', 'center')):
+            style = NamedStyle(name=f'3n_{status}_{col}', font=Font(size=14), border=border,
+                               alignment=Alignment(horizontal=horizontal, vertical='center'))
+            if status in STATUS_FILLS:
+                style.fill = PatternFill('solid', fgColor=STATUS_FILLS[status])
+            styles.append(style)
+    return styles
+
+
+@timed("export")
+def export_xlsx(rows, file_path, today=None, progress=None, cancel=None):
+    """
+    Grava a planilha formatada. progress(feitas, total) é chamado a cada
+    CHUNK linhas; se cancel.is_set(), levanta ExportCancelled e o destino
+    fica intacto.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    rows = rows if isinstance(rows, list) else list(rows)
+    total = len(rows)
+    # Classificação em lote (vetorizada com NumPy, se disponível)
+    codes = classify_ordinals(ordinals_of(rows), today if today is not None else dates.today_ordinal())
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Clientes 3N')
+    for style in _named_styles():
+        wb.add_named_style(style)
+
+    def cell(value, style):
+        c = WriteOnlyCell(ws, value)
+        c.style = style
+        return c
+
+    # Modelos de estilo por código de status: cada célula copia o StyleArray
+    # pronto em vez de procurar o estilo nomeado pelo nome
+    templates = [(cell(None, f'3n_{s}_a')._style, cell(None, f'3n_{s}_b')._style) for s in TAG_NAMES]
+
+    # Cabeçalho e layout precisam ser definidos antes da primeira linha
+    ws.column_dimensions['A'].width = 60
+    ws.column_dimensions['B'].width = 20
+    ws.sheet_format.defaultRowHeight = 24
+    ws.sheet_format.customHeight = True
+    ws.freeze_panes = 'A4'
+    ws.page_setup.orientation = 'landscape'
+    ws.page_setup.fitToWidth = 1
+    ws.sheet_view.showGridLines = False
+    ws.print_title_rows = '1:3'
+    ws.page_margins.left = ws.page_margins.right = 0.4
+    ws.page_margins.top = ws.page_margins.bottom = 0.5
+    ws.merged_cells.add('A1:B1')
+    ws.merged_cells.add('A2:B2')
+
+    ws.append([cell("3N - Clientes e Vencimentos", '3n_title')])
+    ws.append([cell(f"Gerado em {datetime.now().strftime('%d/%m/%Y %H:%M')}", '3n_subtitle')])
+    ws.append([cell('Empresa', '3n_header'), cell('Vencimento', '3n_header')])
+
+    try:
+        for i, c in enumerate(rows):
+            if i % CHUNK == 0:
+                _check(cancel, progress, i, total)
+            style_a, style_b = templates[codes[i]]
+            a = WriteOnlyCell(ws, c.empresa)
+            a._style = copy(style_a)
+            b = WriteOnlyCell(ws, c.display)
+            b._style = copy(style_b)
+            ws.append((a, b))
+        _check(cancel, progress, total, total)
+    except ExportCancelled:
+        ws.close()  # encerra o fluxo da planilha (o openpyxl apaga o temporário)
+        raise
+
+    _write_via_tmp(file_path, wb.save)
+
+
+@timed("export")
+def export_csv(rows, file_path, progress=None, cancel=None):
+    """
+    Exportação simples em CSV (empresa, vencimento, status), sem formatação.
+    Gravado com BOM UTF-8 para o Excel reconhecer os acentos.
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    total = len(rows)
+    codes = classify_ordinals(ordinals_of(rows), dates.today_ordinal())
+    labels = [STATUS_LABELS[name] for name in TAG_NAMES]
+
+    def write(path):
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["empresa", "vencimento", "status"])
+            for start in range(0, total, CHUNK):
+                _check(cancel, progress, start, total)
+                writer.writerows(
+                    (c.empresa, c.display, labels[codes[i]])
+                    for i, c in enumerate(rows[start:start + CHUNK], start)
+                )
+        _check(cancel, progress, total, total)
+
+    _write_via_tmp(file_path, write)
@@ -0,0 +1,259 @@
+# githubapi.py
+# Cliente HTTP compartilhado para a API de conteúdo do GitHub
+# ---------------------------------------------------------------
+# Usado por notify.py e appScreens.py. Mantém uma requests.Session
+# persistente (keep-alive + pool de conexões, sem novo handshake TLS a
+# cada chamada), compressão gzip, retry com backoff exponencial e
+# registra o tempo de cada requisição.
+#
+# O requests só é importado ao criar o primeiro cliente: a GUI abre a
+# janela sem pagar esse import (GitHubError e afins ficam disponíveis).
+#
+# Variáveis de ambiente:
+#   GITHUB_REPO, GITHUB_TOKEN          -> obrigatórias
+#   GITHUB_FILE   (clientes.csv)       GITHUB_BRANCH (main)
+#   GITHUB_API_URL (https://api.github.com)
+#   GITHUB_COMMITTER_NAME / GITHUB_COMMITTER_EMAIL
+
+import io
+import os
+import json
+import time
+import base64
+import posixpath
+from collections import deque
+from contextlib import contextmanager
+
+from records import load_clients_from_text, clients_to_csv, merge_clients
+from timing import span, timed
+
+API_VERSION = "2022-11-28"
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+
+class GitHubError(RuntimeError):
+    pass
+
+
+class FileResult:
+    __slots__ = ("status", "text", "sha", "etag")
+
+    def __init__(self, status, text=None, sha=None, etag=None):
+        self.status = status
+        self.text = text
+        self.sha = sha
+        self.etag = etag
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+
+def _env(name, default=""):
+    return (os.environ.get(name) or default).strip()
+
+
+class GitHubClient:
+    def __init__(self, repo, token, file_path="clientes.csv", branch="main",
+                 api_url="https://api.github.com", committer=None, timeout=20,
+                 pool_size=10, retries=3):
+        self.repo = repo
+        self.file_path = file_path
+        self.branch = branch
+        self.api_url = api_url.rstrip("/")
+        self.committer = committer or {"name": "3N Bot", "email": "noreply@local"}
+        self.timeout = timeout
+        self.timings = deque(maxlen=500)
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import HTTPError as Urllib3Error
+        from urllib3.util.retry import Retry
+
+        # Falhas de rede (conexão, timeout, fluxo interrompido) viram GitHubError
+        self._net_errors = (requests.RequestException, Urllib3Error)
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Accept-Encoding": "gzip, deflate",
+            "Authorization": f"Bearer {token}",
+            "X-GitHub-Api-Version": API_VERSION,
+        })
+        # Só métodos idempotentes: um PUT/POST/PATCH com 5xx pode já ter gravado o commit
+        retry = Retry(
+            total=retries, backoff_factor=0.5,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        repo = _env("GITHUB_REPO")
+        token = _env("GITHUB_TOKEN")
+        if not repo or not token:
+            raise GitHubError("Defina GITHUB_REPO e GITHUB_TOKEN (variáveis de ambiente ou DadApp.env).")
+        return cls(
+            repo, token,
+            file_path=_env("GITHUB_FILE", "clientes.csv"),
+            branch=_env("GITHUB_BRANCH", "main"),
+            api_url=_env("GITHUB_API_URL", "https://api.github.com"),
+            committer={
+                "name": _env("GITHUB_COMMITTER_NAME", "3N Bot"),
+                "email": _env("GITHUB_COMMITTER_EMAIL", "noreply@local"),
+            },
+            **kwargs,
+        )
+
+    # ---------- Baixo nível ----------
+    def request(self, method, path, **kwargs):
+        """Requisição relativa a /repos/{repo}; registra duração e tamanho."""
+        url = path if path.startswith("http") else f"{self.api_url}/repos/{self.repo}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        t0 = time.perf_counter()
+        try:
+            r = self.session.request(method, url, **kwargs)
+        except self._net_errors as e:
+            raise GitHubError(f"Falha de rede em {method} {path.split('?')[0]}: {e}") from e
+        self.timings.append({
+            "method": method,
+            "path": path.split("?")[0],
+            "status": r.status_code,
+            "seconds": round(time.perf_counter() - t0, 4),
+            "bytes": len(r.content) if not kwargs.get("stream") else None,
+        })
+        return r
+
+    def timing_summary(self):
+        """Agrupa as requisições registradas por método + caminho."""
+        summary = {}
+        for t in self.timings:
+            s = summary.setdefault(f"{t['method']} {t['path']}", {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            s["count"] += 1
+            s["total_s"] = round(s["total_s"] + t["seconds"], 4)
+            s["max_s"] = max(s["max_s"], t["seconds"])
+        return summary
+
+    def contents_path(self, file_path=None):
+        return f"contents/{file_path or self.file_path}"
+
+    # ---------- Arquivo de clientes ----------
+    @timed("fetch")
+    def get_file(self, etag=None, file_path=None):
+        """
+        Baixa o arquivo pela Contents API.
+        Com etag, envia If-None-Match: status 304 => FileResult sem texto.
+        Status 404 => FileResult(404). Outros erros levantam GitHubError.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        r = self.request("GET", f"{self.contents_path(file_path)}?ref={self.branch}", headers=headers)
+        if r.status_code == 304:
+            return FileResult(304, etag=etag)
+        if r.status_code == 404:
+            return FileResult(404)
+        if r.status_code != 200:
+            raise GitHubError(f"Erro ao buscar {file_path or self.file_path}: {r.status_code} - {r.text[:200]}")
+        with span("decode"):
+            js = r.json()
+            encoded = js.get("content") or ""
+            text = base64.b64decode(encoded).decode("utf-8-sig") if encoded else None
+        if text is None and js.get("encoding") == "none":
+            # Arquivos de 1 a 100 MB não vêm embutidos no JSON: busca o blob bruto
+            with self.open_raw(file_path, sha=js.get("sha")) as f:
+                text = f.read()
+        return FileResult(200, text=text or "", sha=js.get("sha"), etag=r.headers.get("ETag"))
+
+    @contextmanager
+    def open_raw(self, file_path=None, sha=None):
+        """
+        Abre o arquivo como fluxo de texto direto da resposta HTTP (sem base64
+        e sem carregar tudo em memória). Usa o media type raw da Contents API;
+        se o arquivo for grande demais para ela, cai para a Git Blobs API.
+        """
+        headers = {"Accept": RAW_MEDIA_TYPE}
+        path = f"{self.contents_path(file_path)}?ref={self.branch}"
+        if sha:
+            path = f"git/blobs/{sha}"
+        r = self.request("GET", path, headers=headers, stream=True)
+        if r.status_code in (403, 413) and not sha:
+            r.close()
+            sha = self.blob_sha(file_path)
+            r = self.request("GET", f"git/blobs/{sha}", headers=headers, stream=True)
+        try:
+            if r.status_code != 200:
+                raise GitHubError(f"Erro ao baixar {file_path or self.file_path}: {r.status_code} - {r.text[:200]}")
+            r.raw.decode_content = True  # descompacta gzip no próprio fluxo
+            r.raw.auto_close = False     # o TextIOWrapper precisa ler o EOF sem o fluxo "fechado"
+            yield io.TextIOWrapper(r.raw, encoding="utf-8-sig", newline="")
+        except self._net_errors as e:
+            raise GitHubError(f"Falha de rede ao baixar {file_path or self.file_path}: {e}") from e
+        finally:
+            r.close()
+
+    def blob_sha(self, file_path=None):
+        """SHA do blob via listagem do diretório (que não traz o conteúdo)."""
+        full = file_path or self.file_path
+        parent = posixpath.dirname(full)
+        r = self.request("GET", f"contents/{parent}?ref={self.branch}")
+        if r.status_code != 200:
+            raise GitHubError(f"Erro ao listar {parent or '/'}: {r.status_code} - {r.text[:200]}")
+        for entry in r.json():
+            if entry.get("path") == full:
+                return entry["sha"]
+        raise GitHubError(f"{full} não encontrado em {parent or '/'}")
+
+    def put_file(self, content_bytes, message, sha=None, file_path=None):
+        """PUT na Contents API. Retorna a resposta; o chamador trata 409/422."""
+        payload = {
+            "message": message,
+            "content": base64.b64encode(content_bytes or b"").decode("ascii"),
+            "branch": self.branch,
+            "committer": self.committer,
+        }
+        if sha:
+            payload["sha"] = sha
+        return self.request("PUT", self.contents_path(file_path), data=json.dumps(payload), timeout=max(self.timeout, 25))
+
+    def close(self):
+        self.session.close()
+
+
+@timed("push")
+def push_clients_csv(gh, content_bytes, message, base_text=None, sha=None):
+    """
+    PUT do CSV de clientes usando o SHA conhecido (uma ida e volta).
+    Em conflito (409/422) baixa o remoto, faz merge de três vias
+    (base = base_text, local = conteúdo enviado) e tenta de novo.
+    Retorna (merged, bytes enviados, novo SHA); merged é None sem merge.
+    """
+    content_bytes = content_bytes or b""
+    if not sha:
+        # Sem SHA conhecido (primeira gravação): descobre o atual, se existir
+        sha = gh.get_file().sha
+
+    merged = None
+    for attempt in range(3):
+        r = gh.put_file(content_bytes, message, sha=sha)
+        if r.status_code in (200, 201):
+            break
+        if r.status_code not in (409, 422) or attempt == 2:
+            raise GitHubError(f"PUT {r.status_code}: {r.text[:200]}")
+
+        # Outro editor gravou antes: merge de três vias e nova tentativa
+        remote = gh.get_file()
+        if remote.status != 200:
+            raise GitHubError(f"PUT {r.status_code}; GET {remote.status}")
+        if merged is None:
+            message = f"{message} (merged with remote changes)"
+        merged = merge_clients(
+            load_clients_from_text(base_text or ""),
+            load_clients_from_text(content_bytes.decode("utf-8")),
+            load_clients_from_text(remote.text),
+        )
+        content_bytes = clients_to_csv(merged).encode("utf-8")
+        base_text, sha = remote.text, remote.sha
+
+    return merged, content_bytes, (r.json().get("content") or {}).get("sha")
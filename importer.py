@@ -0,0 +1,316 @@
+# importer.py
+# Importação em lote de clientes a partir de CSV ou Excel (.xlsx)
+# ---------------------------------------------------------------
+# Lê o arquivo em fluxo (CSV com separador detectado; XLSX pelo modo
+# read-only do openpyxl), valida as datas, compara com os clientes já
+# existentes por um índice hash (empresa normalizada + vencimento) e
+# monta um plano: novos, atualizados, duplicados e inválidos. O plano é
+# mostrado antes e aplicado de uma vez, num único commit.
+#
+# Uso (CLI):
+#   python importer.py novos_clientes.xlsx            # mostra a prévia e pede confirmação
+#   python importer.py novos_clientes.csv --yes       # sem confirmação
+#   python importer.py novos_clientes.csv --dry-run   # só a prévia
+#
+# Usa as mesmas variáveis de ambiente do notify.py (GITHUB_*).
+
+import os
+import csv
+import argparse
+from collections import Counter
+from datetime import date, datetime
+from itertools import chain, islice
+
+from records import Client, clients_to_csv
+
+BATCH = 2000         # linhas por lote (progresso/cancelamento)
+HEADER_SCAN = 10     # linhas procuradas pelo cabeçalho (a exportação tem título)
+
+HEADER_ALIASES = {
+    "empresa": {"empresa", "cliente", "nome", "razao social", "razão social"},
+    "vencimento": {"vencimento", "validade", "data", "data de vencimento", "vence em"},
+}
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# ---------- Leitura ----------
+
+def _header_columns(row):
+    """(coluna da empresa, coluna do vencimento) se a linha for um cabeçalho."""
+    names = [str(v).strip().casefold() if v is not None else "" for v in row]
+    found = {}
+    for field, aliases in HEADER_ALIASES.items():
+        for i, name in enumerate(names):
+            if name in aliases:
+                found[field] = i
+                break
+    if len(found) == 2:
+        return found["empresa"], found["vencimento"]
+    return None
+
+
+def _rows_with_header(rows):
+    """Gera (nº da linha, empresa, vencimento) a partir de linhas cruas."""
+    rows = iter(rows)
+    head = list(islice(rows, HEADER_SCAN))
+    emp_i, venc_i, first = 0, 1, 0
+    for i, row in enumerate(head):
+        cols = _header_columns(row)
+        if cols:
+            (emp_i, venc_i), first = cols, i + 1
+            break
+    for n, row in enumerate(chain(head[first:], rows), first + 1):
+        emp = row[emp_i] if len(row) > emp_i else None
+        venc = row[venc_i] if len(row) > venc_i else None
+        yield n, emp, venc
+
+
+def iter_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from _rows_with_header(csv.reader(f, dialect))
+
+
+def iter_xlsx(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from _rows_with_header(wb.active.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def iter_file(path):
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return iter_xlsx(path)
+    return iter_csv(path)
+
+
+# ---------- Normalização ----------
+
+def normalize_name(empresa) -> str:
+    return " ".join(str(empresa or "").split())
+
+
+def _name_key(empresa: str) -> str:
+    return empresa.casefold()
+
+
+def _date_text(value) -> str:
+    """Células do Excel chegam como datetime; o resto vira texto."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    return str(value).strip()
+
+
+def _key(c):
+    return (_name_key(c.empresa), c.ordinal if c.ordinal is not None else c.raw or "")
+
+
+# ---------- Plano ----------
+
+class ImportPlan:
+    def __init__(self, source=""):
+        self.source = source
+        self.added = []       # [Client]
+        self.updated = []     # [(Client existente, novo vencimento exibido)]
+        self.duplicates = 0   # já existentes (ou repetidos no próprio arquivo)
+        self.invalid = []     # [(linha, empresa, valor, motivo)]
+
+    def __bool__(self):
+        return bool(self.added or self.updated)
+
+    @property
+    def changes(self):
+        return len(self.added) + len(self.updated)
+
+    def summary(self, limit=10):
+        linhas = [
+            f"Arquivo: {os.path.basename(self.source)}" if self.source else "",
+            f"➕ Novos: {len(self.added)}",
+            f"✏️ Atualizados: {len(self.updated)}",
+            f"♻️ Já existentes/duplicados: {self.duplicates}",
+            f"⚠️ Inválidos: {len(self.invalid)}",
+        ]
+        if self.added:
+            linhas += ["", "Novos:"] + [f"  {c.empresa} ({c.display or 'sem data'})" for c in self.added[:limit]]
+            if len(self.added) > limit:
+                linhas.append(f"  ... e mais {len(self.added) - limit}")
+        if self.updated:
+            linhas += ["", "Atualizados:"] + [
+                f"  {c.empresa}: {c.display or 'sem data'} -> {novo or 'sem data'}" for c, novo in self.updated[:limit]
+            ]
+            if len(self.updated) > limit:
+                linhas.append(f"  ... e mais {len(self.updated) - limit}")
+        if self.invalid:
+            linhas += ["", "Inválidos:"] + [
+                f"  linha {n}: {emp or '(sem empresa)'} [{valor}] {motivo}" for n, emp, valor, motivo in self.invalid[:limit]
+            ]
+            if len(self.invalid) > limit:
+                linhas.append(f"  ... e mais {len(self.invalid) - limit}")
+        return "\n".join(linhas).strip()
+
+    def commit_message(self):
+        name = os.path.basename(self.source) or "file"
+        return f"Import {len(self.added)} new / {len(self.updated)} updated clients from {name}"
+
+    def apply(self, clients):
+        """
+        Aplica o plano sobre o mapa id -> Client; retorna os registros tocados.
+        Se a lista foi recarregada depois da prévia, os registros a atualizar
+        são achados pela chave (empresa + vencimento); o que já não existe, ou
+        já está na lista, é ignorado (len(touched) é o total efetivo).
+        """
+        index = {_key(c): c for c in clients.values()}
+        touched = []
+        for c, novo in self.updated:
+            target = c if clients.get(c.id) is c else index.get(_key(c))
+            if target is not None:
+                target.set_vencimento(novo)
+                touched.append(target)
+        for c in self.added:
+            if c.id in clients or _key(c) in index:
+                continue
+            clients[c.id] = c
+            touched.append(c)
+        return touched
+
+
+def plan_import(rows, existing, source="", progress=None, cancel=None):
+    """
+    Monta o ImportPlan a partir de (linha, empresa, vencimento).
+
+    Regras:
+      - empresa + vencimento já existentes (ou repetidos no arquivo) -> duplicado
+      - empresa com um único cadastro e uma única linha no arquivo, com outro
+        vencimento -> atualização da data
+      - demais linhas válidas -> novos clientes
+      - data não reconhecida -> inválida (não importada)
+    """
+    plan = ImportPlan(source)
+    existing = list(existing)
+    index = {_key(c) for c in existing}
+    by_name = {}
+    for c in existing:
+        by_name.setdefault(_name_key(c.empresa), []).append(c)
+
+    # Validação em lotes (o cache de dates.parse_ordinal interpreta cada texto distinto uma vez)
+    valid = []
+    rows = iter(rows)
+    done = 0
+    while True:
+        batch = list(islice(rows, BATCH))
+        if not batch:
+            break
+        if cancel is not None and cancel.is_set():
+            raise ImportCancelled()
+        for n, emp, venc in batch:
+            empresa = normalize_name(emp)
+            texto = _date_text(venc)
+            if not empresa:
+                if texto:
+                    plan.invalid.append((n, "", texto, "sem empresa"))
+                continue
+            c = Client(empresa, texto)
+            if c.raw is not None:
+                plan.invalid.append((n, empresa, texto, "data inválida"))
+                continue
+            valid.append(c)
+        done += len(batch)
+        if progress is not None:
+            progress(done)
+
+    in_file = Counter(_name_key(c.empresa) for c in valid)
+    seen = set()
+    for c in valid:
+        k = _key(c)
+        if k in index or k in seen:
+            plan.duplicates += 1
+            continue
+        seen.add(k)
+        same = by_name.get(k[0], ())
+        if len(same) == 1 and in_file[k[0]] == 1:
+            plan.updated.append((same[0], c.display))
+        else:
+            plan.added.append(c)
+    return plan
+
+
+def plan_file(path, existing, progress=None, cancel=None):
+    return plan_import(iter_file(path), existing, source=path, progress=progress, cancel=cancel)
+
+
+# ---------- CLI ----------
+
+def main():
+    from githubapi import GitHubClient, GitHubError, push_clients_csv
+    from shards import ShardStore
+    from records import load_clients_from_text
+
+    parser = argparse.ArgumentParser(description="Importa clientes em lote (CSV ou XLSX) num único commit")
+    parser.add_argument("arquivo")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra a prévia")
+    parser.add_argument("--yes", "-y", action="store_true", help="Aplica sem pedir confirmação")
+    args = parser.parse_args()
+
+    try:
+        gh = GitHubClient.from_env()
+    except GitHubError:
+        raise SystemExit("❌ Variáveis GITHUB_REPO e GITHUB_TOKEN obrigatórias.")
+
+    try:
+        store = ShardStore.from_env(gh)
+        existing = store.load() if store else None
+        if existing is None:
+            store = None
+            res = gh.get_file()
+            if res.status not in (200, 404):
+                raise GitHubError(f"status {res.status}")
+            base_text, sha = res.text or "", res.sha
+            existing = load_clients_from_text(base_text)
+    except GitHubError as e:
+        raise SystemExit(f"❌ Falha ao obter clientes do GitHub: {e}")
+
+    try:
+        plan = plan_file(args.arquivo, existing)
+    except (OSError, ImportError, csv.Error) as e:
+        raise SystemExit(f"❌ Falha ao ler {args.arquivo}: {e}")
+    print(plan.summary())
+
+    if not plan:
+        print("✅ Nada a importar.")
+        return
+    if args.dry_run:
+        return
+    if not args.yes and input(f"\nAplicar {plan.changes} alteração(ões)? [s/N] ").strip().lower() not in ("s", "sim", "y"):
+        print("Importação cancelada.")
+        return
+
+    clients = {c.id: c for c in existing}
+    plan.apply(clients)
+    try:
+        if store is not None:
+            store.push(store.split(clients.values()), plan.commit_message())
+        else:
+            push_clients_csv(gh, clients_to_csv(clients.values()).encode("utf-8"),
+                             plan.commit_message(), base_text=base_text, sha=sha)
+    except GitHubError as e:
+        raise SystemExit(f"❌ Falha ao salvar no GitHub: {e}")
+    print(f"📨 {plan.changes} alteração(ões) enviadas em um único commit.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# ioworker.py
+# Executor de I/O em segundo plano para a interface Tk
+# ---------------------------------------------------------------
+# As chamadas ao GitHub rodam numa thread separada; o resultado volta para
+# a thread do Tk por uma fila consultada com after(), já que widgets Tk
+# só podem ser tocados pela thread principal.
+#
+# Um único worker garante ordem FIFO: um "Recarregar" enfileirado depois
+# de um salvamento sempre enxerga o arquivo já salvo.
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class IOWorker:
+    def __init__(self, root, max_workers=1, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="io")
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Agenda fn(*args, **kwargs); callbacks rodam na thread do Tk."""
+        self._pending += 1
+
+        def job():
+            try:
+                self._results.put((on_done, on_error, fn(*args, **kwargs), None))
+            except Exception as e:
+                self._results.put((on_done, on_error, None, e))
+
+        future = self._executor.submit(job)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def _poll(self):
+        self.drain()
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def drain(self):
+        """Executa os callbacks dos trabalhos já concluídos (thread do Tk)."""
+        while True:
+            try:
+                on_done, on_error, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                elif on_done:
+                    on_done(result)
+            except Exception as e:
+                print("Callback de I/O falhou:", e)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,116 @@
+# ledger.py
+# Registro persistente das notificações já enviadas pelo notify.py
+# ---------------------------------------------------------------
+# Guarda, para cada cliente alertado, a faixa de DAYS_THRESHOLDS em que
+# ele estava no último aviso (-1 = vencida). Na execução seguinte só entram
+# no e-mail os clientes que cruzaram para uma faixa mais urgente (ou que
+# apareceram agora); quem já foi avisado na mesma faixa não se repete.
+#
+# A chave é um hash curto de empresa + vencimento: renovar a licença
+# (nova data) gera uma chave nova, e chaves de clientes que saíram da
+# janela de alerta são descartadas, então o arquivo fica do tamanho da
+# lista de alertas, não da carteira.
+#
+# Também registra a última execução (dia, hash do conteúdo de origem e
+# faixas): no mesmo dia, com o mesmo conteúdo, não há nada novo a avisar.
+#
+# Variáveis de ambiente:
+#   NOTIFY_LEDGER -> caminho do arquivo (padrão: CACHE_DIR/notify-ledger.json;
+#                    sem nenhum dos dois o registro fica desligado)
+#
+# Com path=None o registro vive só em memória (modo --daemon sem arquivo).
+
+import os
+import json
+import hashlib
+from bisect import bisect_left
+from pathlib import Path
+
+from csvcache import write_atomic
+
+VERSION = 1
+
+
+def client_key(c) -> str:
+    ident = f"{c.empresa}\0{c.ordinal if c.ordinal is not None else c.raw or ''}"
+    return hashlib.blake2b(ident.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def stage_of(delta, limits):
+    """-1 = vencida; i = dentro de limits[i] (limits ordenados)."""
+    if delta < 0:
+        return -1
+    return bisect_left(limits, delta)
+
+
+class NotificationLedger:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.run = {}       # {"day": ordinal, "source": hash, "thresholds": [...]}
+        self.limits = []    # faixas a que se referem os estágios em alerts
+        self.alerts = {}    # chave do cliente -> faixa do último aviso
+        if self.path is None:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == VERSION:
+            self.run = data.get("run") or {}
+            self.limits = data.get("limits") or []
+            self.alerts = data.get("alerts") or {}
+
+    @classmethod
+    def from_env(cls):
+        path = (os.environ.get("NOTIFY_LEDGER") or "").strip()
+        if not path:
+            cache_dir = (os.environ.get("CACHE_DIR") or "").strip()
+            if not cache_dir:
+                return None
+            path = os.path.join(cache_dir, "notify-ledger.json")
+        return cls(path)
+
+    def unchanged(self, source, today, thresholds):
+        """Mesmo dia, mesmo conteúdo e mesmas faixas da última execução?"""
+        return bool(source) and self.run == {"day": today, "source": source, "thresholds": sorted(thresholds)}
+
+    def filter_new(self, expirados, proximos, thresholds):
+        """
+        Mantém só os cruzamentos novos desde o último aviso e atualiza o
+        registro (chamar save() depois do envio bem-sucedido).
+        """
+        limits = sorted(thresholds)
+        if self.limits != limits:
+            self.alerts = {}  # faixas mudaram: os estágios antigos não se comparam
+            self.limits = limits
+        alerts = {}
+        novos = ([], [])
+        for lista, out in ((expirados, novos[0]), (proximos, novos[1])):
+            for c, delta in lista:
+                k = client_key(c)
+                stage = stage_of(delta, limits)
+                prev = self.alerts.get(k)
+                if prev is None or stage < prev:
+                    out.append((c, delta))
+                    alerts[k] = stage
+                else:
+                    alerts[k] = prev
+        self.alerts = alerts  # quem saiu da janela (renovou/removido) é esquecido
+        return novos
+
+    def mark_run(self, source, today, thresholds):
+        self.run = {"day": today, "source": source, "thresholds": sorted(thresholds)}
+
+    def snapshot(self):
+        """Estado para restore() caso o envio falhe depois de filter_new()."""
+        return dict(self.run), list(self.limits), dict(self.alerts)
+
+    def restore(self, state):
+        self.run, self.limits, self.alerts = dict(state[0]), list(state[1]), dict(state[2])
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps(
+            {"version": VERSION, "run": self.run, "limits": self.limits, "alerts": self.alerts}, separators=(",", ":")))
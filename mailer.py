@@ -0,0 +1,243 @@
+# mailer.py
+# Envio de e-mails em lote com uma única conexão SMTP
+# ---------------------------------------------------------------
+# Abre e autentica a conexão uma vez e a reutiliza para todas as
+# mensagens do lote. Um token bucket limita a taxa de envio e falhas
+# temporárias (desconexão, respostas 4xx) são repetidas com backoff,
+# reconectando quando necessário.
+#
+# Variáveis de ambiente:
+#   SMTP_HOST (smtp.gmail.com)   SMTP_PORT (465)
+#   SMTP_SECURITY   -> "ssl" (padrão na porta 465), "starttls" ou "none"
+#   SMTP_EMAIL / SMTP_APP_PASSWORD -> login (sem senha, não autentica)
+#   SMTP_RATE       -> mensagens por segundo (padrão 5; 0 = sem limite)
+#   SMTP_BURST      -> rajada máxima do token bucket (padrão 10)
+#   SMTP_MAX_PER_CONNECTION -> reconecta após N mensagens (0 = nunca)
+#   SMTP_CONNECTIONS -> conexões simultâneas do MailerPool (padrão 2)
+#
+# MailerPool reparte um pequeno número de conexões entre várias threads
+# (notify.py --tenants); o token bucket é compartilhado, então a taxa
+# vale para o conjunto e não por conexão.
+
+import os
+import ssl
+import time
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+
+from timing import timed
+
+
+class MailerError(RuntimeError):
+    pass
+
+
+class MailerAuthError(MailerError):
+    pass
+
+
+def _env(name, default=""):
+    return (os.environ.get(name) or default).strip()
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até haver uma ficha disponível (rate <= 0 = sem limite)."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            while True:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self._sleep((1 - self.tokens) / self.rate)
+
+
+class Mailer:
+    def __init__(self, host="smtp.gmail.com", port=465, user="", password="", security=None,
+                 timeout=30, rate=5, burst=10, retries=3, backoff=1.0, max_per_connection=0, bucket=None):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.security = security or ("ssl" if self.port == 465 else "starttls")
+        if self.security not in ("ssl", "starttls", "none"):
+            raise MailerError(f"SMTP_SECURITY inválido: {self.security!r} (use ssl, starttls ou none)")
+        self.timeout = timeout
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_per_connection = max_per_connection
+
+        self._smtp = None
+        self._on_conn = 0
+        self.stats = {"sent": 0, "failed": 0, "retries": 0, "connections": 0}
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        return cls(
+            host=_env("SMTP_HOST", "smtp.gmail.com"),
+            port=int(_env("SMTP_PORT", "465")),
+            user=_env("SMTP_EMAIL"),
+            password=_env("SMTP_APP_PASSWORD"),
+            security=_env("SMTP_SECURITY") or None,
+            rate=float(_env("SMTP_RATE", "5")),
+            burst=float(_env("SMTP_BURST", "10")),
+            max_per_connection=int(_env("SMTP_MAX_PER_CONNECTION", "0")),
+            **kwargs,
+        )
+
+    # ---------- Conexão ----------
+    @timed("smtp.connect")
+    def _connect(self):
+        if self.security == "ssl":
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        if self.user and self.password:
+            smtp.login(self.user, self.password)
+        self._smtp = smtp
+        self._on_conn = 0
+        self.stats["connections"] += 1
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Envio ----------
+    @timed("smtp.send")
+    def send(self, msg):
+        """
+        Envia uma mensagem reaproveitando a conexão aberta. Repete falhas
+        temporárias com backoff exponencial; destinatário recusado ou erro
+        permanente (5xx) levanta MailerError sem nova tentativa.
+        """
+        self.bucket.acquire()
+        for attempt in range(self.retries + 1):
+            try:
+                if self._smtp is None or (self.max_per_connection and self._on_conn >= self.max_per_connection):
+                    self.close()
+                    self._connect()
+                self._smtp.send_message(msg)
+                self._on_conn += 1
+                self.stats["sent"] += 1
+                return
+            except smtplib.SMTPAuthenticationError as e:
+                self.close()
+                raise MailerAuthError(f"Falha de autenticação SMTP: {e.smtp_code} {e.smtp_error!r}")
+            except smtplib.SMTPRecipientsRefused as e:
+                self.stats["failed"] += 1
+                raise MailerError(f"Destinatário recusado: {', '.join(e.recipients)}")
+            except smtplib.SMTPResponseException as e:
+                if not 400 <= e.smtp_code < 500:
+                    self.stats["failed"] += 1
+                    raise MailerError(f"Erro SMTP {e.smtp_code}: {e.smtp_error!r}")
+                error = e  # 4xx: temporário
+                try:
+                    self._smtp.rset()
+                except (smtplib.SMTPException, OSError, AttributeError):
+                    self.close()
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                error = e
+                self.close()
+            if attempt < self.retries:
+                self.stats["retries"] += 1
+                time.sleep(self.backoff * (2 ** attempt))
+        self.stats["failed"] += 1
+        raise MailerError(f"Falha ao enviar após {self.retries + 1} tentativas: {error}")
+
+    def send_many(self, messages):
+        """Envia todas na mesma conexão; retorna [(mensagem, erro)] das que falharam."""
+        failed = []
+        for msg in messages:
+            try:
+                self.send(msg)
+            except MailerAuthError:
+                raise  # nenhuma outra mensagem passaria
+            except MailerError as e:
+                failed.append((msg, e))
+        return failed
+
+
+class MailerPool:
+    """Até size conexões (Mailer) reutilizadas entre threads."""
+
+    def __init__(self, factory, size=2):
+        self._factory = factory
+        self._size = max(1, int(size))
+        self._idle = queue.LifoQueue()  # a conexão usada por último ainda está quente
+        self._all = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, size=None, **kwargs):
+        """Mailers configurados como Mailer.from_env, com um token bucket em comum."""
+        rate = float(_env("SMTP_RATE", "5"))
+        bucket = TokenBucket(rate, float(_env("SMTP_BURST", "10")))
+        size = size if size is not None else int(_env("SMTP_CONNECTIONS", "2"))
+        return cls(lambda: Mailer.from_env(bucket=bucket, **kwargs), size)
+
+    @contextmanager
+    def connection(self):
+        """Empresta um Mailer (cria um novo enquanto houver vaga; senão espera)."""
+        try:
+            mailer = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                mailer = self._factory() if len(self._all) < self._size else None
+                if mailer is not None:
+                    self._all.append(mailer)
+            if mailer is None:
+                mailer = self._idle.get()
+        try:
+            yield mailer
+        finally:
+            self._idle.put(mailer)
+
+    def send_many(self, messages):
+        with self.connection() as mailer:
+            return mailer.send_many(messages)
+
+    @property
+    def stats(self):
+        total = {"sent": 0, "failed": 0, "retries": 0, "connections": 0}
+        for m in list(self._all):
+            for k in total:
+                total[k] += m.stats[k]
+        return total
+
+    def close(self):
+        for m in self._all:
+            m.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,9 @@
+import startup
 from pathlib import Path
 import appScreens
 
+startup.mark("imports")
+
 try:
     from dotenv import load_dotenv
     root = Path(__file__).resolve().parent
@@ -12,4 +15,5 @@ except Exception:
     pass
 
 app = appScreens.App()
+startup.mark("janela criada")
 app.mainloop()
@@ -9,149 +9,155 @@
 #   GITHUB_TOKEN     -> Token com "Contents: Read and write"
 #   SMTP_EMAIL       -> E-mail de envio (Gmail)
 #   SMTP_APP_PASSWORD-> Senha de app do Gmail
-#   OWNER_EMAIL      -> Destinatário
+#   OWNER_EMAIL      -> Destinatário do resumo
+#
+# Envio (ver mailer.py): SMTP_HOST, SMTP_PORT, SMTP_SECURITY, SMTP_RATE...
+# Com --mode cliente/responsavel, as colunas EMAIL_COLUMN (email) e
+# MANAGER_COLUMN (responsavel) do CSV definem destinatários extras.
 #
 # O arquivo 'clientes.csv' será obtido do branch principal
-# e nunca armazenado localmente nem impresso no terminal.
+# e nunca impresso no terminal. Só é armazenado localmente se
+# CACHE_DIR for definido (cache com ETag para GET condicional).
+#
+# Com NOTIFY_LEDGER ou CACHE_DIR definido, um registro (ledger.py) guarda
+# o que já foi avisado: cada execução envia só os cruzamentos novos de
+# faixa, e nada é baixado se o conteúdo não mudou desde a execução do dia.
+#
+# --daemon mantém o processo no ar (daemon.py): GET condicional periódico,
+# avisos no dia em que um cliente cruza uma faixa e endpoint /health.
+#
+# --profile grava um JSON com o tempo de cada etapa (fetch, decode, parse,
+# classify, compose, smtp.*); --cprofile ARQ.prof grava o perfil completo.
+#
+# --tenants ARQ.json processa várias carteiras em paralelo (tenants.py).
+# --parallel [N] (ou NOTIFY_PARALLEL) lê e classifica arquivos muito grandes
+# em N processos (parallel.py), com o mesmo resultado da leitura sequencial.
 
 import os
-import io
-import re
 import csv
-import ssl
-import base64
-import smtplib
+import json
+import time
 import argparse
-import requests
-from email.message import EmailMessage
+import platform
 from datetime import datetime
 
-# ---------- Helpers de data ----------
-
-def parse_date_any(s: str):
-    if not s:
-        return None
-    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(s.strip(), fmt).date()
-        except Exception:
-            continue
-    return None
-
-def format_date_display(s: str):
-    d = parse_date_any(s)
-    return d.strftime("%d/%m/%Y") if d else s or ""
+from dates import today_ordinal
+import records
+from csvcache import ContentCache
+from githubapi import GitHubClient, GitHubError
+from shards import ShardStore
+from expiry import parse_thresholds, DEFAULT_THRESHOLDS
+from mailer import Mailer, MailerError
+from alerts import MODES, selecionar_vencimentos, compor_email, montar_mensagens
+from ledger import NotificationLedger
+import timing
+import parallel
 
 # ---------- CSV ----------
 
 def load_clients_from_text(text: str):
-    """Converte CSV em lista de dicts."""
-    reader = csv.DictReader(io.StringIO(text))
-    clients = []
-    for row in reader:
-        emp = (row.get("empresa") or "").strip()
-        ven = (row.get("vencimento") or "").strip()
-        if emp:
-            clients.append({"empresa": emp, "vencimento": ven})
-    return clients
+    """Converte CSV em lista de registros (records.Client)."""
+    return records.load_clients_from_text(text)
 
 # ---------- GitHub fetch seguro ----------
 
-def load_clients_from_github():
-    repo = os.environ.get("GITHUB_REPO", "").strip()
-    token = os.environ.get("GITHUB_TOKEN", "").strip()
-    file_path = os.environ.get("GITHUB_FILE", "clientes.csv").strip()
-    branch = os.environ.get("GITHUB_BRANCH", "main").strip()
+def fetch_csv_texts(gh):
+    """
+    Textos CSV de origem, em ordem de carga: um por shard ou o arquivo
+    único (com cache ETag). Retorna (textos, descrição da origem).
+    """
+    try:
+        store = ShardStore.from_env(gh)
+        shards = store.fetch_texts() if store else None
+    except GitHubError as e:
+        raise SystemExit(f"❌ Falha ao obter shards do GitHub: {e}")
+    if shards:
+        return [shards[n] for n in sorted(shards)], f"{gh.repo}/{store.directory}/ ({len(shards)} shards)"
 
-    if not repo or not token:
-        raise SystemExit("❌ Variáveis GITHUB_REPO e GITHUB_TOKEN obrigatórias.")
+    cache_dir = os.environ.get("CACHE_DIR", "").strip()
+    cache = ContentCache(os.path.join(cache_dir, os.path.basename(gh.file_path))) if cache_dir else None
+    cached, meta = cache.load() if cache else (None, {})
 
-    url = f"https://api.github.com/repos/{repo}/contents/{file_path}?ref={branch}"
-    headers = {
-        "Accept": "application/vnd.github+json",
-        "Authorization": f"Bearer {token}",
-        "X-GitHub-Api-Version": "2022-11-28"
-    }
-
-    r = requests.get(url, headers=headers, timeout=20)
-    if r.status_code != 200:
-        raise SystemExit(f"❌ Falha ao obter CSV do GitHub: {r.status_code} {r.text[:150]}")
-
-    payload = r.json()
-    content = payload.get("content")
-    if not content:
+    try:
+        res = gh.get_file(etag=meta.get("etag") if cached is not None else None)
+    except GitHubError as e:
+        raise SystemExit(f"❌ Falha ao obter CSV do GitHub: {e}")
+    if res.not_modified:
+        print("♻️ clientes.csv inalterado (304), usando cache local")
+        text = cached
+    elif res.status != 200:
+        raise SystemExit(f"❌ Falha ao obter CSV do GitHub: {res.status}")
+    elif not res.text:
         raise SystemExit("❌ Nenhum conteúdo encontrado no clientes.csv")
+    else:
+        text = res.text
+        if cache:
+            cache.store(text, etag=res.etag, sha=res.sha)
+    return [text], f"{gh.repo}/{gh.file_path}"
 
-    text = base64.b64decode(content).decode("utf-8-sig")
-    clients = load_clients_from_text(text)
-    print(f"✅ {len(clients)} clientes carregados de {repo}/{file_path}")
+def load_clients_from_github(gh=None):
+    try:
+        gh = gh or GitHubClient.from_env()
+    except GitHubError:
+        raise SystemExit("❌ Variáveis GITHUB_REPO e GITHUB_TOKEN obrigatórias.")
+    texts, origem = fetch_csv_texts(gh)
+    clients = []
+    for text in texts:
+        clients.extend(load_clients_from_text(text))
+    print(f"✅ {len(clients)} clientes carregados de {origem}")
     return clients
 
-# ---------- Lógica de prazos ----------
-
-def selecionar_vencimentos(clients):
-    hoje = datetime.today().date()
-    expirados = []
-    proximos = []
-    for c in clients:
-        d = parse_date_any(c.get("vencimento"))
-        if not d:
-            continue
-        delta = (d - hoje).days
-        if delta < 0:
-            expirados.append((c, delta))
-        elif delta <= 30:
-            proximos.append((c, delta))
-    return expirados, proximos
-
-# ---------- E-mail ----------
-
-def enviar_email(cfg, expirados, proximos):
-    linhas = []
-    if expirados:
-        linhas.append("⚠️ Licenças vencidas:")
-        for c, delta in expirados:
-            linhas.append(f"- {c['empresa']} (vencida há {-delta} dias, {format_date_display(c['vencimento'])})")
-        linhas.append("")
-    if proximos:
-        linhas.append("📅 Vencendo em até 30 dias:")
-        for c, delta in proximos:
-            linhas.append(f"- {c['empresa']} (vence em {delta} dias, {format_date_display(c['vencimento'])})")
-        linhas.append("")
-    if not linhas:
-        linhas.append("✅ Nenhuma licença vencida ou próxima do vencimento.")
-
-    corpo = "\n".join(linhas)
-    msg = EmailMessage()
-    msg["Subject"] = "[3N] Resumo de Licenças - Vencimentos"
-    msg["From"] = f"{cfg['FROM_NAME']} <{cfg['SMTP_EMAIL']}>"
-    msg["To"] = cfg["OWNER_EMAIL"]
-    msg.set_content(corpo)
-
-    ctx = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=ctx) as s:
-        s.login(cfg["SMTP_EMAIL"], cfg["SMTP_APP_PASSWORD"])
-        s.send_message(msg)
-    print("📨 E-mail enviado com sucesso!")
+def stream_clients_from_github(gh, stats=None):
+    """
+    Gera registros direto do fluxo HTTP (blob bruto, sem base64/JSON).
+    A memória fica constante independentemente do tamanho do arquivo;
+    stats["clientes"] recebe a contagem ao final da leitura. Com shards
+    (GITHUB_SHARDS), cada shard é lido em fluxo, na mesma ordem da carga
+    completa; o arquivo único só vale enquanto os shards não existem.
+    """
+    store = ShardStore.from_env(gh)
+    listing = store.listing() if store is not None else None
+    sources = [{"sha": listing[name]} for name in sorted(listing)] if listing else [{}]
+    n = 0
+    for source in sources:
+        with gh.open_raw(**source) as f:
+            for c in records.iter_clients(csv.DictReader(f)):
+                n += 1
+                yield c
+    if stats is not None:
+        stats["clientes"] = n
+        stats["origem"] = (f"{gh.repo}/{store.directory}/ ({len(listing)} shards)" if listing
+                           else f"{gh.repo}/{gh.file_path}")
 
-# ---------- Main ----------
+def fonte_atual(gh):
+    """Hash do conteúdo de origem (shards ou arquivo único) sem baixar os dados."""
+    store = ShardStore.from_env(gh)
+    if store is not None:
+        fp = store.fingerprint()
+        if fp is not None:
+            return fp
+    return gh.blob_sha()
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--dry-run", action="store_true")
-    args = parser.parse_args()
+# ---------- Envio ----------
 
-    clients = load_clients_from_github()
-    expirados, proximos = selecionar_vencimentos(clients)
+def enviar_mensagens(mensagens, mailer=None):
+    """Envia tudo numa única conexão SMTP; retorna [(mensagem, erro)] das falhas."""
+    mailer = mailer or Mailer.from_env()
+    with mailer:
+        falhas = mailer.send_many(mensagens)
+    print(f"📨 {mailer.stats['sent']} e-mail(s) enviados ({mailer.stats['connections']} conexão(ões), "
+          f"{mailer.stats['retries']} nova(s) tentativa(s))")
+    return falhas
 
-    print(f"💾 {len(expirados)} vencidos | {len(proximos)} próximos")
+def enviar_email(cfg, expirados, proximos, thresholds=DEFAULT_THRESHOLDS):
+    falhas = enviar_mensagens([compor_email(cfg, expirados, proximos, thresholds)])
+    if falhas:
+        raise MailerError(str(falhas[0][1]))
+    print("📨 E-mail enviado com sucesso!")
 
-    if args.dry_run:
-        for c, delta in expirados + proximos:
-            status = "vencida" if delta < 0 else f"vence em {delta} dias"
-            print(f"- {c['empresa']}: {format_date_display(c['vencimento'])} ({status})")
-        return
+# ---------- Main ----------
 
+def config_from_env():
     cfg = {
         "SMTP_EMAIL": os.environ.get("SMTP_EMAIL", ""),
         "SMTP_APP_PASSWORD": os.environ.get("SMTP_APP_PASSWORD", ""),
@@ -161,8 +167,236 @@ def main():
 
     if not all(cfg.values()):
         raise SystemExit("❌ Configure SMTP_EMAIL, SMTP_APP_PASSWORD e OWNER_EMAIL nas variáveis de ambiente.")
+    cfg["EMAIL_COLUMN"] = (os.environ.get("EMAIL_COLUMN") or "email").strip()
+    cfg["MANAGER_COLUMN"] = (os.environ.get("MANAGER_COLUMN") or "responsavel").strip()
+    return cfg
+
+def listar(expirados, proximos):
+    for c, delta in expirados + proximos:
+        status = "vencida" if delta < 0 else f"vence em {delta} dias"
+        print(f"- {c.empresa}: {c.display} ({status})")
+
+def rodar_daemon(gh, thresholds, args):
+    """--daemon: carteira em memória, refresh condicional e avisos no cruzamento (daemon.py)."""
+    from daemon import run_daemon
+
+    cfg = None if args.dry_run else config_from_env()
+
+    def send(expirados, proximos):
+        if cfg is None:
+            listar(expirados, proximos)
+            return True
+        mensagens = montar_mensagens(cfg, expirados, proximos, thresholds, args.mode)
+        falhas = enviar_mensagens(mensagens)
+        for msg, erro in falhas:
+            print(f"⚠️ {msg['To']}: {erro}")
+        return all(msg is not mensagens[0] for msg, _ in falhas)
+
+    ledger = NotificationLedger() if args.full else NotificationLedger.from_env() or NotificationLedger()
+    try:
+        run_daemon(gh, thresholds, send, ledger)
+    finally:
+        gh.close()
+
+def rodar_tenants(args):
+    """--tenants: todas as carteiras numa execução; falha de uma não para as outras."""
+    from tenants import TenantError, load_tenants, run_tenants, print_report
+
+    try:
+        tenants = load_tenants(args.tenants)
+    except TenantError as e:
+        raise SystemExit(f"❌ {e}")
+    if not args.dry_run and not (os.environ.get("SMTP_EMAIL") and os.environ.get("SMTP_APP_PASSWORD")):
+        raise SystemExit("❌ Configure SMTP_EMAIL e SMTP_APP_PASSWORD nas variáveis de ambiente.")
+    report = run_tenants(tenants, args)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Relatório gravado em {args.report}")
+    erros = sum(n for status, n in report["aggregate"]["status"].items() if status in ("erro", "parcial"))
+    if erros:
+        raise SystemExit(f"❌ {erros} de {len(tenants)} carteira(s) com falha.")
+
+def gravar_perfil(path, args, gh, total_s, status):
+    """Relatório JSON das etapas (timing.py) e das requisições ao GitHub."""
+    spans = timing.summary()
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "status": status,
+            "total_s": round(total_s, 6),
+            "mode": args.mode,
+            "stream": args.stream,
+            "daemon": args.daemon,
+            "dry_run": args.dry_run,
+        },
+        "spans": spans,
+        "github": gh.timing_summary() if gh is not None else {},
+        "events": timing.events(),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    for name, t in spans.items():
+        print(f"⏱️ {name}: {t['count']}x, total {t['total_s']:.3f}s, máx {t['max_s']:.3f}s")
+    print(f"🧪 Perfil ({total_s:.3f}s no total) gravado em {path}")
+
+def processos(value):
+    """Tipo do --parallel: inteiro >= 0 (0 = desligado)."""
+    try:
+        n = int(value)
+    except ValueError:
+        n = -1
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"número de processos inválido: {value!r}")
+    return n
+
+def parallel_from_env():
+    """NOTIFY_PARALLEL como padrão do --parallel; valor inválido vira 0 (desligado) com aviso."""
+    value = (os.environ.get("NOTIFY_PARALLEL") or "").strip()
+    if not value:
+        return 0
+    try:
+        return processos(value)
+    except argparse.ArgumentTypeError:
+        print(f"⚠️ NOTIFY_PARALLEL inválido ({value!r}); seguindo sem --parallel")
+        return 0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--timings", action="store_true", help="Mostra o tempo das requisições ao GitHub")
+    leitura = parser.add_mutually_exclusive_group()
+    leitura.add_argument("--stream", action="store_true",
+                         help="Lê o CSV em fluxo (arquivos grandes, memória constante; ou GITHUB_STREAM=1)")
+    leitura.add_argument("--parallel", type=processos, nargs="?", const=os.cpu_count() or 1, metavar="N",
+                         help="Lê e classifica em N processos (padrão: núcleos da máquina; ou NOTIFY_PARALLEL=N); "
+                              "para arquivos muito grandes")
+    parser.add_argument("--mode", choices=MODES, default=(os.environ.get("NOTIFY_MODE") or "resumo").strip(),
+                        help="resumo (só o dono), cliente (lembrete por cliente) ou responsavel (resumo por responsável)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignora o registro de avisos e envia a lista completa")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Fica no ar: refresh condicional e avisos no momento do cruzamento de faixa")
+    parser.add_argument("--profile", nargs="?", const="notify-profile.json", metavar="ARQ.json",
+                        help="Mede cada etapa e grava um relatório JSON (padrão: notify-profile.json)")
+    parser.add_argument("--cprofile", metavar="ARQ.prof",
+                        help="Grava também o perfil do cProfile (abrir com python -m pstats ou snakeviz)")
+    parser.add_argument("--tenants", metavar="ARQ.json", default=(os.environ.get("NOTIFY_TENANTS") or "").strip() or None,
+                        help="Processa várias carteiras (repositório/arquivo/destinatário) em paralelo (tenants.py)")
+    parser.add_argument("--report", metavar="ARQ.json", help="Com --tenants: grava o resultado por carteira e o agregado")
+    args = parser.parse_args()
+    if not args.stream and args.parallel is None:
+        # Sem opção na linha de comando, vale o ambiente (com a mesma exclusão)
+        args.stream = os.environ.get("GITHUB_STREAM", "").strip() == "1"
+        args.parallel = parallel_from_env()
+        if args.stream and args.parallel:
+            parser.error("GITHUB_STREAM=1 e NOTIFY_PARALLEL não podem ser usados juntos")
+    args.parallel = args.parallel or 0
+
+    gh = None
+    if args.tenants:
+        if args.daemon:
+            raise SystemExit("❌ --daemon não combina com --tenants.")
+        def executar_run():
+            return rodar_tenants(args)
+    else:
+        try:
+            gh = GitHubClient.from_env()
+        except GitHubError:
+            raise SystemExit("❌ Variáveis GITHUB_REPO e GITHUB_TOKEN obrigatórias.")
+        def executar_run():
+            return executar(args, gh)
+    if not (args.profile or args.cprofile):
+        return executar_run()
+
+    timing.enable()
+    prof = None
+    if args.cprofile:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+    t0 = time.perf_counter()
+    status = "erro"
+    try:
+        executar_run()
+        status = "ok"
+    except SystemExit as e:
+        status = "ok" if e.code in (None, 0) else "erro"
+        raise
+    finally:
+        if prof is not None:
+            prof.disable()
+            prof.dump_stats(args.cprofile)
+            print(f"🧪 cProfile gravado em {args.cprofile}")
+        if args.profile:
+            gravar_perfil(args.profile, args, gh, time.perf_counter() - t0, status)
+
+def executar(args, gh):
+    thresholds = parse_thresholds(os.environ.get("DAYS_THRESHOLDS"))
+    if args.daemon:
+        return rodar_daemon(gh, thresholds, args)
+
+    ledger = None if args.full else NotificationLedger.from_env()
+    hoje = today_ordinal()
+    source = None
+    if ledger is not None:
+        try:
+            source = fonte_atual(gh)
+        except GitHubError:
+            source = None  # sem hash: processa normalmente
+        if ledger.unchanged(source, hoje, thresholds):
+            print("♻️ Conteúdo inalterado desde a execução de hoje; nada novo a avisar.")
+            return
+
+    if args.stream:
+        stats = {}
+        try:
+            expirados, proximos = selecionar_vencimentos(stream_clients_from_github(gh, stats), thresholds)
+        except GitHubError as e:
+            raise SystemExit(f"❌ Falha ao obter CSV do GitHub: {e}")
+        print(f"✅ {stats.get('clientes', 0)} clientes lidos em fluxo de {stats.get('origem')}")
+    elif args.parallel:
+        texts, origem = fetch_csv_texts(gh)
+        total, expirados, proximos = parallel.select_from_texts(
+            texts, today_ordinal(), max(thresholds), workers=args.parallel)
+        print(f"✅ {total} clientes lidos de {origem} ({args.parallel} processo(s))")
+    else:
+        clients = load_clients_from_github(gh)
+        expirados, proximos = selecionar_vencimentos(clients, thresholds)
+    if args.timings:
+        for key, t in gh.timing_summary().items():
+            print(f"⏱️ {key}: {t['count']}x, total {t['total_s']}s, máx {t['max_s']}s")
+
+    print(f"💾 {len(expirados)} vencidos | {len(proximos)} próximos")
+
+    if ledger is not None:
+        expirados, proximos = ledger.filter_new(expirados, proximos, thresholds)
+        ledger.mark_run(source, hoje, thresholds)
+        print(f"🆕 {len(expirados)} vencidos | {len(proximos)} próximos desde o último aviso")
+        if not expirados and not proximos:
+            if not args.dry_run:
+                ledger.save()
+            print("✅ Nenhum cruzamento novo de faixa; nada a enviar.")
+            return
+
+    if args.dry_run:
+        listar(expirados, proximos)
+        return
 
-    enviar_email(cfg, expirados, proximos)
+    cfg = config_from_env()
+    mensagens = montar_mensagens(cfg, expirados, proximos, thresholds, args.mode)
+    try:
+        falhas = enviar_mensagens(mensagens)
+    except MailerError as e:
+        raise SystemExit(f"❌ Falha no envio: {e}")
+    for msg, erro in falhas:
+        print(f"⚠️ {msg['To']}: {erro}")
+    if ledger is not None and all(msg is not mensagens[0] for msg, _ in falhas):
+        ledger.save()  # resumo entregue: estes avisos não se repetem
+    if falhas:
+        raise SystemExit(f"❌ {len(falhas)} de {len(mensagens)} e-mail(s) não enviados.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+# parallel.py
+# Carga e seleção de vencimentos em vários processos (arquivos muito grandes)
+# ---------------------------------------------------------------
+# O texto CSV é cortado em pedaços em fins de linha (nunca dentro de um
+# campo entre aspas) e cada pedaço, com o cabeçalho, vai para um processo
+# de um ProcessPoolExecutor. O processo interpreta as linhas e devolve só
+# o que interessa ao aviso: quantos clientes leu e os poucos que estão
+# vencidos ou dentro do maior limite (posição, ordinal, empresa, data,
+# colunas extras). O processo principal junta os pedaços em ordem e monta
+# os registros apenas dessas linhas.
+#
+# O resultado é o mesmo de alerts.selecionar_vencimentos sobre a carga
+# sequencial: mesmos clientes, mesmos deltas, mesma ordem (data e, no
+# empate, posição no arquivo). Só os ids de sessão diferem.
+#
+# Abaixo de MIN_BYTES o custo de subir processos não compensa e tudo roda
+# no processo atual (mesma função, mesmo resultado).
+
+import io
+import os
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+import dates
+from records import CORE_COLUMNS, Client
+from timing import timed
+
+MIN_BYTES = 4 * 1024 * 1024   # abaixo disso: sem processos extras
+CHUNKS_PER_WORKER = 4         # pedaços menores equilibram melhor a carga
+
+
+def split_csv(text, parts):
+    """
+    (cabeçalho, [corpo1, corpo2, ...]) com cortes em fim de linha. Um corte
+    com número ímpar de aspas desde o corte anterior cairia dentro de um
+    campo com quebra de linha e é empurrado para a próxima linha.
+    """
+    nl = text.find("\n")
+    if nl < 0:
+        return text, []
+    header, start, end = text[:nl + 1], nl + 1, len(text)
+    step = max(1, (end - start) // max(1, parts))
+    quoted = '"' in text
+    chunks = []
+    pos = start
+    while pos < end:
+        cut = text.find("\n", min(end, pos + step))
+        cut = end if cut < 0 else cut + 1
+        if quoted:
+            quotes = text.count('"', pos, cut)
+            while quotes % 2 and cut < end:
+                nxt = text.find("\n", cut)
+                nxt = end if nxt < 0 else nxt + 1
+                quotes += text.count('"', cut, nxt)
+                cut = nxt
+        chunks.append(text[pos:cut])
+        pos = cut
+    return header, chunks
+
+
+def select_chunk(job):
+    """
+    Executado no processo de trabalho: (texto CSV com cabeçalho, hoje, limite)
+    -> (clientes lidos, [(posição, ordinal, empresa, vencimento, extra)]).
+    Mesmas regras de records.iter_clients (empresa vazia é ignorada).
+    """
+    text, today, horizon = job
+    reader = csv.DictReader(io.StringIO(text))
+    extra_cols = [f for f in (reader.fieldnames or ()) if f and f not in CORE_COLUMNS]
+    parse = dates.parse_ordinal
+    hi = today + horizon
+    n = 0
+    out = []
+    for row in reader:
+        emp = (row.get("empresa") or "").strip()
+        if not emp:
+            continue
+        venc = (row.get("vencimento") or "").strip()
+        o = parse(venc)
+        if o is not None and o <= hi:
+            extra = {k: row[k] for k in extra_cols if row.get(k)} if extra_cols else None
+            out.append((n, o, emp, venc, extra))
+        n += 1
+    return n, out
+
+
+def _jobs(texts, parts, today, horizon):
+    for text in texts:
+        if not text:
+            continue
+        if parts <= 1 or len(text) < MIN_BYTES:
+            yield text, today, horizon
+            continue
+        header, chunks = split_csv(text, parts)
+        for chunk in chunks:
+            yield header + chunk, today, horizon
+
+
+@timed("parallel")
+def select_from_texts(texts, today, horizon, workers=None):
+    """
+    Textos CSV (o arquivo único ou um por shard, na ordem de carga) ->
+    (total de clientes, expirados, proximos) como alerts.selecionar_vencimentos.
+    """
+    workers = workers or os.cpu_count() or 1
+    texts = [t for t in texts if t]
+    big = workers > 1 and sum(len(t) for t in texts) >= MIN_BYTES
+    jobs = list(_jobs(texts, workers * CHUNKS_PER_WORKER if big else 1, today, horizon))
+    if big and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            results = list(ex.map(select_chunk, jobs))
+    else:
+        results = [select_chunk(job) for job in jobs]
+
+    # Junta em ordem de arquivo: posição global = deslocamento do pedaço + posição local
+    selected = []
+    offset = 0
+    for n, rows in results:
+        selected.extend((o, offset + i, emp, venc, extra) for i, o, emp, venc, extra in rows)
+        offset += n
+    selected.sort(key=lambda r: (r[0], r[1]))
+
+    expirados, proximos = [], []
+    for o, _, emp, venc, extra in selected:
+        pair = (Client(emp, venc, extra=extra), o - today)
+        (expirados if o < today else proximos).append(pair)
+    return offset, expirados, proximos
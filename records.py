@@ -0,0 +1,165 @@
+# records.py
+# Registro compacto de cliente, compartilhado entre notify.py e appScreens.py
+# ---------------------------------------------------------------
+# A data de vencimento é interpretada uma única vez, na carga, e guardada
+# como ordinal. Cada registro recebe um id estável durante a sessão, usado
+# para identificar a linha sem depender do nome/data exibidos.
+#
+# Colunas além de empresa/vencimento (ex.: email, responsavel) ficam em
+# Client.extra e são gravadas de volta, para não se perderem ao salvar.
+
+import io
+import csv
+import itertools
+from collections import Counter
+
+import dates
+from timing import timed
+
+_ids = itertools.count(1)
+
+CORE_COLUMNS = ("empresa", "vencimento")
+
+
+class Client:
+    __slots__ = ("id", "empresa", "ordinal", "raw", "extra")
+
+    def __init__(self, empresa: str, vencimento: str = "", id: int = None, extra: dict = None):
+        self.id = next(_ids) if id is None else id
+        self.empresa = empresa
+        self.extra = extra or None  # demais colunas do CSV (coluna -> valor)
+        self.set_vencimento(vencimento)
+
+    @classmethod
+    def from_parsed(cls, empresa, ordinal, raw=None, extra=None):
+        """Registro a partir de campos já interpretados (snapshot em colunas), sem reler a data."""
+        c = cls.__new__(cls)
+        c.id = next(_ids)
+        c.empresa = empresa
+        c.ordinal = ordinal
+        c.raw = raw
+        c.extra = dict(extra) if extra else None
+        return c
+
+    def set_vencimento(self, vencimento: str):
+        vencimento = (vencimento or "").strip()
+        self.ordinal = dates.parse_ordinal(vencimento)
+        # Só guarda o texto original quando não é uma data reconhecida
+        self.raw = vencimento if self.ordinal is None and vencimento else None
+
+    @property
+    def display(self) -> str:
+        if self.ordinal is not None:
+            return dates.ordinal_to_display(self.ordinal)
+        return self.raw or ""
+
+    @property
+    def iso(self) -> str:
+        if self.ordinal is not None:
+            return dates.ordinal_to_iso(self.ordinal)
+        return self.raw or ""
+
+    @property
+    def sort_key(self):
+        if self.ordinal is not None:
+            return (0, self.ordinal, self.id)
+        return (1, self.empresa, self.id)
+
+    def get(self, column, default=""):
+        """Valor de uma coluna extra do CSV."""
+        if self.extra:
+            return self.extra.get(column, default)
+        return default
+
+    def __repr__(self):
+        return f"Client(id={self.id}, empresa={self.empresa!r}, vencimento={self.display!r})"
+
+
+def iter_clients(rows):
+    """Converte linhas de csv.DictReader em registros (ignora empresa vazia)."""
+    extra_cols = [f for f in (getattr(rows, "fieldnames", None) or ()) if f and f not in CORE_COLUMNS]
+    for row in rows:
+        emp = (row.get("empresa") or "").strip()
+        if emp:
+            extra = {k: row[k] for k in extra_cols if row.get(k)} if extra_cols else None
+            yield Client(emp, row.get("vencimento") or "", extra=extra)
+
+
+@timed("parse")
+def load_clients_from_text(text: str):
+    return list(iter_clients(csv.DictReader(io.StringIO(text))))
+
+
+def extra_columns(clients):
+    """Colunas extras presentes nos registros, na ordem em que aparecem."""
+    cols = {}
+    for c in clients:
+        if c.extra:
+            cols.update(dict.fromkeys(c.extra))
+    return list(cols)
+
+
+def clients_to_csv(clients) -> str:
+    clients = clients if isinstance(clients, (list, tuple)) else list(clients)
+    extra = extra_columns(clients)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([*CORE_COLUMNS, *extra])
+    if not extra:
+        for c in clients:
+            writer.writerow([c.empresa, c.display])
+    else:
+        for c in clients:
+            writer.writerow([c.empresa, c.display, *(c.get(k) for k in extra)])
+    return output.getvalue()
+
+
+def _merge_key(c):
+    return (c.empresa, c.ordinal if c.ordinal is not None else c.raw)
+
+
+def merge_clients(base, local, remote):
+    """
+    Merge de três vias por registro (empresa + vencimento).
+
+    Inclusões e remoções locais em relação à base são reaplicadas sobre o
+    remoto; uma edição é tratada como remoção + inclusão. Se a mesma empresa
+    foi editada dos dois lados, prevalece a versão local.
+    """
+    base_keys = Counter(map(_merge_key, base))
+    local_keys = Counter(map(_merge_key, local))
+    remote_keys = Counter(map(_merge_key, remote))
+    remote_added = remote_keys - base_keys
+
+    added = local_keys - base_keys
+    removed = base_keys - local_keys
+
+    # Registro da base editado dos dois lados (removido nos dois, com nova
+    # versão da mesma empresa): a versão remota dá lugar à local. Inclusões
+    # remotas de outra empresa homônima não entram nessa conta.
+    edited = {k[0] for k in removed} & {k[0] for k in added}
+    both = Counter()
+    for k, n in (removed & (base_keys - remote_keys)).items():
+        if k[0] in edited:
+            both[k[0]] += n
+    drop = Counter(removed)
+    for k, n in remote_added.items():
+        take = min(n, both[k[0]])
+        if take:
+            drop[k] += take
+            both[k[0]] -= take
+    added -= remote_added  # mesma inclusão feita dos dois lados
+
+    merged = []
+    for c in remote:
+        k = _merge_key(c)
+        if drop[k] > 0:
+            drop[k] -= 1
+            continue
+        merged.append(c)
+    for c in local:
+        k = _merge_key(c)
+        if added[k] > 0:
+            added[k] -= 1
+            merged.append(c)
+    return merged
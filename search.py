@@ -0,0 +1,212 @@
+# search.py
+# Busca e filtros da tela de clientes
+# ---------------------------------------------------------------
+# NameIndex guarda os nomes das empresas normalizados (minúsculas, sem
+# acento) como um índice invertido por palavra: palavra -> {ids}. Sobre o
+# vocabulário (palavras distintas, bem menos que os clientes) há dois
+# índices auxiliares:
+#   - lista ordenada (bisect) para início de palavra com 1-2 letras;
+#   - trigramas -> palavras para trechos de 3+ letras (parte do nome).
+# Uma consulta encontra as palavras do vocabulário que casam e une os
+# conjuntos de ids delas; várias palavras na consulta viram interseção.
+# Inclusão, edição e remoção atualizam só as palavras do registro.
+#
+# ClientFilter combina texto, status (cor da tabela) e intervalo de datas.
+# Status e datas viram um intervalo contínuo da lista ordenada (SortedRows
+# ordena por data), resolvido com bisect.
+
+import unicodedata
+from bisect import bisect_left, insort
+
+from expiry import GUI_LIMITS, GUI_TAGS
+
+# Rótulo do filtro de status -> tag da tabela (None = todos, "normal" = sem data)
+STATUS_FILTERS = {
+    "Todos": None,
+    "Vencidas": "expired",
+    "Até 15 dias": "due_15",
+    "Até 30 dias": "due_month",
+    "Longe": "ok_far",
+    "Sem data": "normal",
+}
+
+
+def fold(text: str) -> str:
+    """'  Farmácia  São João ' -> 'farmacia sao joao'"""
+    text = text or ""
+    if not text.isascii():
+        decomposed = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(text.casefold().split())
+
+
+def _trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class NameIndex:
+    def __init__(self, clients=()):
+        self.reset(clients)
+
+    def reset(self, clients):
+        self._words = {}      # id -> palavras normalizadas do nome
+        self._postings = {}   # palavra -> {ids}
+        postings = self._postings
+        for c in clients:
+            words = frozenset(fold(c.empresa).split())
+            self._words[c.id] = words
+            for w in words:
+                ids = postings.get(w)
+                if ids is None:
+                    postings[w] = {c.id}
+                else:
+                    ids.add(c.id)
+        self._vocab = sorted(postings)   # palavras distintas, ordenadas
+        self._grams = {}                 # trigrama -> {palavras}
+        for w in self._vocab:
+            self._index_word(w)
+
+    def __len__(self):
+        return len(self._words)
+
+    def _index_word(self, w):
+        for g in _trigrams(w):
+            words = self._grams.get(g)
+            if words is None:
+                self._grams[g] = {w}
+            else:
+                words.add(w)
+
+    # ---------- Atualização incremental ----------
+    def add(self, c):
+        words = frozenset(fold(c.empresa).split())
+        self._words[c.id] = words
+        for w in words:
+            ids = self._postings.get(w)
+            if ids is None:
+                self._postings[w] = {c.id}
+                insort(self._vocab, w)
+                self._index_word(w)
+            else:
+                ids.add(c.id)
+
+    def remove(self, rid):
+        for w in self._words.pop(rid, ()):
+            ids = self._postings.get(w)
+            if ids is None:
+                continue
+            ids.discard(rid)
+            if ids:
+                continue
+            # Palavra sumiu do vocabulário
+            del self._postings[w]
+            del self._vocab[bisect_left(self._vocab, w)]
+            for g in _trigrams(w):
+                words = self._grams.get(g)
+                if words is not None:
+                    words.discard(w)
+                    if not words:
+                        del self._grams[g]
+
+    def update(self, c):
+        """Reindexa um registro cujo nome pode ter mudado."""
+        if self._words.get(c.id) != frozenset(fold(c.empresa).split()):
+            self.remove(c.id)
+            self.add(c)
+
+    # ---------- Consulta ----------
+    def _matching_words(self, q):
+        """Palavras do vocabulário que começam com q (1-2 letras) ou contêm q (3+)."""
+        if len(q) < 3:
+            vocab = self._vocab
+            out = []
+            i = bisect_left(vocab, q)
+            while i < len(vocab) and vocab[i].startswith(q):
+                out.append(vocab[i])
+                i += 1
+            return out
+        best = None
+        for g in _trigrams(q):
+            words = self._grams.get(g)
+            if not words:
+                return []
+            if best is None or len(words) < len(best):
+                best = words
+        return [w for w in best if q in w]
+
+    def search(self, query):
+        """
+        ids cujas empresas contêm todas as palavras da consulta (trecho com
+        3+ letras ou início de palavra com 1-2). None se a consulta é vazia.
+        """
+        terms = fold(query).split()
+        if not terms:
+            return None
+        result = None
+        for q in sorted(terms, key=len, reverse=True):  # termos longos costumam ser mais seletivos
+            ids = set().union(*(self._postings[w] for w in self._matching_words(q)))
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result
+
+
+def status_range(tag, today, limits=GUI_LIMITS, tags=GUI_TAGS):
+    """Intervalo de ordinais [lo, hi] (None = aberto) de uma tag de status."""
+    if tag == "expired":
+        return None, today - 1
+    k = tags.index(tag)
+    lo = today if k == 0 else today + limits[k - 1] + 1
+    hi = today + limits[k] if k < len(limits) else None
+    return lo, hi
+
+
+class ClientFilter:
+    def __init__(self):
+        self.text = ""
+        self.status = None      # tag de STATUS_FILTERS
+        self.date_from = None   # ordinal
+        self.date_to = None     # ordinal
+
+    @property
+    def active(self):
+        return bool(self.text.strip()) or self.status is not None \
+            or self.date_from is not None or self.date_to is not None
+
+    def _bounds(self, rows, today):
+        """Índices [i, j) da lista ordenada que respeitam status e datas."""
+        if self.status == "normal":
+            if self.date_from is not None or self.date_to is not None:
+                return 0, 0
+            return rows.bounds((1,), None)
+        lo, hi = (None, None) if self.status is None else status_range(self.status, today)
+        if self.date_from is not None:
+            lo = self.date_from if lo is None else max(lo, self.date_from)
+        if self.date_to is not None:
+            hi = self.date_to if hi is None else min(hi, self.date_to)
+        if lo is None and hi is None and self.status is None:
+            return 0, len(rows)
+        if lo is not None and hi is not None and lo > hi:
+            return 0, 0
+        return rows.bounds((0,) if lo is None else (0, lo), (1,) if hi is None else (0, hi + 1))
+
+    def view(self, rows, index, clients, today):
+        """Lista (em ordem) dos registros visíveis; rows é um SortedRows."""
+        i, j = self._bounds(rows, today)
+        ids = index.search(self.text)
+        if ids is None:
+            return rows.slice(i, j)
+        if i >= j:
+            return []
+        if len(ids) * 32 < j - i:
+            # Poucos resultados: ordena só eles e confere o intervalo
+            lo_key = rows.key_at(i)
+            hi_key = rows.key_at(j) if j < len(rows) else None
+            found = []
+            for rid in ids:
+                k = rows.key_of(rid)
+                if k is not None and k >= lo_key and (hi_key is None or k < hi_key):
+                    found.append((k, clients[rid]))
+            found.sort(key=lambda kc: kc[0])
+            return [c for _, c in found]
+        return [c for c in rows.slice(i, j) if c.id in ids]
@@ -0,0 +1,222 @@
+# shards.py
+# Armazenamento particionado (shards) dos clientes no GitHub
+# ---------------------------------------------------------------
+# Em vez de um único clientes.csv, os clientes ficam em vários CSVs
+# dentro de um diretório (ex.: clientes/2025-11.csv). Ao salvar, só os
+# shards alterados são enviados, todos num único commit atômico via
+# Git Data API (trees -> commits -> refs). A leitura baixa os shards em
+# paralelo.
+#
+# Variáveis de ambiente:
+#   GITHUB_SHARDS    -> "month" (um CSV por mês de vencimento) ou
+#                       "hash:N" (N baldes pelo nome da empresa); vazio = desligado
+#   GITHUB_SHARD_DIR -> diretório dos shards (padrão: GITHUB_FILE sem extensão)
+
+import os
+import zlib
+import hashlib
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+import dates
+from records import load_clients_from_text, clients_to_csv, merge_clients
+from githubapi import GitHubError
+from timing import timed
+
+NO_DATE_SHARD = "sem-data.csv"
+
+
+def git_blob_sha(text: str) -> str:
+    """SHA que o Git atribui a um blob com este conteúdo (evita reenviar shards iguais)."""
+    data = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class ShardStore:
+    def __init__(self, gh, scheme="month", directory="clientes", workers=8):
+        self.gh = gh
+        self.directory = directory.strip("/")
+        self.workers = workers
+        if scheme == "month":
+            self._buckets = None
+        elif scheme.startswith("hash:") and scheme[5:].isdigit() and int(scheme[5:]) > 0:
+            self._buckets = int(scheme[5:])
+        else:
+            raise GitHubError(f"GITHUB_SHARDS inválido: {scheme!r} (use 'month' ou 'hash:N')")
+        self.scheme = scheme
+
+        self.head = None    # commit conhecido do branch
+        self.tree = None    # tree desse commit
+        self.remote = {}    # nome do shard -> SHA do blob remoto
+        self.base = {}      # nome do shard -> texto da última versão sincronizada
+
+    @classmethod
+    def from_env(cls, gh):
+        scheme = (os.environ.get("GITHUB_SHARDS") or "").strip()
+        if not scheme:
+            return None
+        directory = (os.environ.get("GITHUB_SHARD_DIR") or "").strip() or posixpath.splitext(gh.file_path)[0]
+        return cls(gh, scheme, directory)
+
+    # ---------- Particionamento ----------
+    def shard_of(self, c) -> str:
+        if self._buckets:
+            bucket = zlib.crc32(c.empresa.casefold().encode("utf-8")) % self._buckets
+            return f"h{bucket:03d}.csv"
+        if c.ordinal is None:
+            return NO_DATE_SHARD
+        return dates.ordinal_to_iso(c.ordinal)[:7] + ".csv"
+
+    def split(self, clients):
+        """Agrupa os clientes por shard e serializa cada grupo (nome -> texto CSV)."""
+        groups = {}
+        for c in clients:
+            groups.setdefault(self.shard_of(c), []).append(c)
+        return {name: clients_to_csv(group) for name, group in groups.items()}
+
+    @staticmethod
+    def parse(shards):
+        clients = []
+        for name in sorted(shards):
+            clients.extend(load_clients_from_text(shards[name]))
+        return clients
+
+    # ---------- Leitura ----------
+    def _ref_path(self):
+        return f"git/refs/heads/{self.gh.branch}"
+
+    def _fetch_head(self):
+        r = self.gh.request("GET", self._ref_path())
+        if r.status_code != 200:
+            raise GitHubError(f"Erro ao ler {self._ref_path()}: {r.status_code} - {r.text[:200]}")
+        head = r.json()["object"]["sha"]
+        r = self.gh.request("GET", f"git/commits/{head}")
+        if r.status_code != 200:
+            raise GitHubError(f"Erro ao ler commit {head}: {r.status_code} - {r.text[:200]}")
+        return head, r.json()["tree"]["sha"]
+
+    def _list_shards(self, tree):
+        r = self.gh.request("GET", f"git/trees/{tree}?recursive=1")
+        if r.status_code != 200:
+            raise GitHubError(f"Erro ao listar tree {tree}: {r.status_code} - {r.text[:200]}")
+        prefix = self.directory + "/"
+        return {
+            e["path"][len(prefix):]: e["sha"]
+            for e in r.json().get("tree", [])
+            if e.get("type") == "blob" and e["path"].startswith(prefix) and "/" not in e["path"][len(prefix):]
+        }
+
+    def listing(self):
+        """Shards atuais (nome -> SHA do blob) sem baixar conteúdo; {} se o diretório não existir."""
+        self.head, self.tree = self._fetch_head()
+        return self._list_shards(self.tree)
+
+    def fingerprint(self):
+        """
+        Hash da listagem atual dos shards (muda se qualquer shard mudar), sem
+        baixar conteúdo. None se o diretório de shards ainda não existir.
+        """
+        listing = self.listing()
+        if not listing:
+            return None
+        return hashlib.sha1("\n".join(f"{n} {sha}" for n, sha in sorted(listing.items())).encode("utf-8")).hexdigest()
+
+    def _fetch_blob(self, sha):
+        with self.gh.open_raw(sha=sha) as f:
+            return f.read()
+
+    @timed("fetch")
+    def fetch_texts(self):
+        """Baixa todos os shards em paralelo (nome -> texto CSV); {} se o diretório não existir."""
+        self.head, self.tree = self._fetch_head()
+        listing = self._list_shards(self.tree)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shard") as pool:
+            texts = dict(zip(listing, pool.map(self._fetch_blob, listing.values())))
+        self.remote, self.base = listing, texts
+        return texts
+
+    def load(self):
+        """
+        Baixa todos os shards em paralelo e retorna a lista de clientes.
+        Retorna None se o diretório ainda não existir (migração a partir do arquivo único).
+        """
+        texts = self.fetch_texts()
+        if not texts:
+            return None
+        return self.parse(texts)
+
+    def state(self):
+        """Cópia do ponto de sincronização (head, tree, blobs remotos, textos base) para um envio posterior."""
+        return {"head": self.head, "tree": self.tree, "remote": dict(self.remote), "base": dict(self.base)}
+
+    def adopt(self, clients):
+        """Migração do arquivo único: a lista lida dele vira a base do merge do primeiro envio."""
+        self.base = self.split(clients)
+
+    # ---------- Escrita ----------
+    @timed("push")
+    def push(self, shards, message, state=None):
+        """
+        Envia só os shards alterados num único commit (trees/commits/refs).
+        Se o branch andou (ref não é fast-forward), recarrega, faz merge de
+        três vias e tenta de novo. Retorna a lista mesclada ou None.
+        state (de state()) é o ponto de partida capturado com o snapshot: um
+        fetch_texts() feito depois não adianta o head deste envio.
+        """
+        if state is not None:
+            self.head, self.tree = state["head"], state["tree"]
+            self.remote, self.base = dict(state["remote"]), dict(state["base"])
+        merged = None
+        for attempt in range(3):
+            changed = {n: t for n, t in shards.items() if git_blob_sha(t) != self.remote.get(n)}
+            removed = [n for n in self.remote if n not in shards]
+            if not changed and not removed:
+                return merged
+            if self.head is None:
+                self.head, self.tree = self._fetch_head()
+
+            entries = [
+                {"path": f"{self.directory}/{n}", "mode": "100644", "type": "blob", "content": t}
+                for n, t in changed.items()
+            ] + [
+                {"path": f"{self.directory}/{n}", "mode": "100644", "type": "blob", "sha": None}
+                for n in removed
+            ]
+            r = self.gh.request("POST", "git/trees", json={"base_tree": self.tree, "tree": entries})
+            if r.status_code != 201:
+                raise GitHubError(f"Erro ao criar tree: {r.status_code} - {r.text[:200]}")
+            new_tree = r.json()["sha"]
+            r = self.gh.request("POST", "git/commits", json={
+                "message": message, "tree": new_tree, "parents": [self.head],
+                "author": self.gh.committer, "committer": self.gh.committer,
+            })
+            if r.status_code != 201:
+                raise GitHubError(f"Erro ao criar commit: {r.status_code} - {r.text[:200]}")
+            commit = r.json()["sha"]
+
+            r = self.gh.request("PATCH", self._ref_path(), json={"sha": commit, "force": False})
+            if r.status_code == 200:
+                self.head, self.tree = commit, new_tree
+                for n, t in changed.items():
+                    self.remote[n] = git_blob_sha(t)
+                    self.base[n] = t
+                for n in removed:
+                    self.remote.pop(n, None)
+                    self.base.pop(n, None)
+                return merged
+            if r.status_code not in (409, 422) or attempt == 2:
+                raise GitHubError(f"Erro ao atualizar {self._ref_path()}: {r.status_code} - {r.text[:200]}")
+
+            # Outro editor gravou antes: merge de três vias sobre o estado remoto
+            base = self.base
+            remote = self.load()
+            if remote is None:
+                # Ainda não há shards no remoto (só outros arquivos mudaram): não há
+                # o que sobrescrever nem apagar; reenvia sobre o novo head
+                self.base = base
+                continue
+            # Sem base sincronizada, tudo o que está no remoto é mantido e as
+            # linhas locais entram como inclusões (iguais às remotas não duplicam)
+            merged = merge_clients(self.parse(base), self.parse(shards), remote)
+            shards = self.split(merged)
+        return merged
@@ -0,0 +1,50 @@
+# startup.py
+# Relatório de tempo de partida da GUI
+# ---------------------------------------------------------------
+# main.py importa este módulo antes de qualquer outro e marca as etapas
+# (imports, criação da janela, primeira pintura, dados carregados). Com
+# STARTUP_REPORT definido, o relatório sai no terminal ("1") ou num arquivo
+# JSON (caminho). Para o detalhe de cada import: python -X importtime main.py
+#
+# Os tempos contam a partir do import deste módulo (o interpretador e, no
+# executável onefile do PyInstaller, a extração ficam de fora).
+
+import os
+import sys
+import json
+import time
+
+T0 = time.perf_counter()
+_marks = []  # [(etapa, segundos desde T0)]
+_reported = False
+
+
+def mark(name):
+    _marks.append((name, time.perf_counter() - T0))
+
+
+def report():
+    """Imprime/grava (uma vez) as etapas marcadas. Sem STARTUP_REPORT não faz nada."""
+    global _reported
+    target = (os.environ.get("STARTUP_REPORT") or "").strip()
+    if not target or target == "0" or _reported:
+        return
+    _reported = True
+    data = {
+        "steps": [{"step": n, "s": round(t, 4)} for n, t in _marks],
+        "modules": len(sys.modules),
+        "frozen": bool(getattr(sys, "frozen", False)),
+    }
+    if target == "1":
+        prev = 0.0
+        print("⏱️ Partida:", file=sys.stderr)
+        for n, t in _marks:
+            print(f"   {n:<22} {t * 1000:8.1f} ms  (+{(t - prev) * 1000:.1f})", file=sys.stderr)
+            prev = t
+        print(f"   {len(sys.modules)} módulos carregados", file=sys.stderr)
+        return
+    try:
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"⚠️ STARTUP_REPORT: não foi possível gravar {target}: {e}", file=sys.stderr)
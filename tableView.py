@@ -0,0 +1,263 @@
+# tableView.py
+# Treeview virtualizado para listas grandes de clientes
+# ---------------------------------------------------------------
+# Em vez de um item Tk por cliente, o Treeview contém apenas a janela
+# visível (+ uma pequena folga). A barra de rolagem e a roda do mouse
+# passam a mover um deslocamento (offset) sobre a lista ordenada, e a
+# janela é redesenhada reaproveitando os itens que continuam visíveis.
+# O custo de rolar/atualizar depende do tamanho da janela, não da lista.
+#
+# Os iids do Treeview são os ids estáveis dos registros. Cada renderização
+# compara a janela desejada com o que já está desenhado e só insere, move,
+# atualiza ou remove os itens que mudaram.
+
+from bisect import bisect_left
+
+_NAV_KEYS = ("Up", "Down", "Prior", "Next", "Home", "End")
+
+
+class SortedRows:
+    """Lista ordenada de registros com posição por id via bisect (O(log n))."""
+
+    def __init__(self, key):
+        self.key = key
+        self._keys = []
+        self._rows = []
+        self._key_of = {}
+
+    def reset(self, rows):
+        self._rows = sorted(rows, key=self.key)
+        self._keys = [self.key(r) for r in self._rows]
+        self._key_of = {r.id: k for r, k in zip(self._rows, self._keys)}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        return self._rows[i]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def key_of(self, rid):
+        return self._key_of.get(rid)
+
+    def key_at(self, i):
+        return self._keys[i]
+
+    def bounds(self, lo_key=None, hi_key=None):
+        """Índices [i, j) das chaves em [lo_key, hi_key) (limites opcionais)."""
+        i = 0 if lo_key is None else bisect_left(self._keys, lo_key)
+        j = len(self._keys) if hi_key is None else bisect_left(self._keys, hi_key)
+        return i, max(i, j)
+
+    def slice(self, i, j):
+        return self._rows[i:j]
+
+    def index_of(self, rid):
+        k = self._key_of.get(rid)
+        if k is None:
+            return None
+        return bisect_left(self._keys, k)
+
+    def add(self, row):
+        k = self.key(row)
+        i = bisect_left(self._keys, k)
+        self._keys.insert(i, k)
+        self._rows.insert(i, row)
+        self._key_of[row.id] = k
+        return i
+
+    def discard(self, rid):
+        i = self.index_of(rid)
+        if i is None:
+            return None
+        del self._keys[i]
+        del self._rows[i]
+        del self._key_of[rid]
+        return i
+
+    def reposition(self, row):
+        """Reposiciona um registro cuja chave mudou; retorna (antigo, novo)."""
+        old = self.discard(row.id)
+        return old, self.add(row)
+
+
+class VirtualTable:
+    def __init__(self, tree, y_scroll, row_builder, row_height=30, buffer=5, virtual=True):
+        """
+        row_builder(index, registro) -> (iid, values, tags)
+        Com virtual=False o Treeview recebe todas as linhas e rola nativamente.
+        """
+        self.tree = tree
+        self.y_scroll = y_scroll
+        self.row_builder = row_builder
+        self.row_height = row_height
+        self.buffer = buffer
+        self.virtual = virtual
+
+        self.rows = []
+        self.offset = 0
+        self.visible = 20
+        self._shown = []          # iids presentes no Treeview, em ordem
+        self._first = 0           # índice (na lista) do primeiro item desenhado
+        self._rendered = {}       # iid -> (values, tags) já enviados ao Tk
+        self._selected = None     # iid selecionado (sobrevive fora da janela)
+
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        if virtual:
+            y_scroll.configure(command=self.yview)
+            tree.configure(yscrollcommand="")
+            tree.bind("<Configure>", self._on_configure, add="+")
+            for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                tree.bind(seq, self._on_wheel)
+            for key in _NAV_KEYS:
+                tree.bind(f"<{key}>", self._on_key)
+        else:
+            y_scroll.configure(command=tree.yview)
+            tree.configure(yscrollcommand=y_scroll.set)
+
+    # ---------- Dados ----------
+    def set_rows(self, rows, top=False):
+        """Define a lista (já ordenada) e redesenha a janela atual (ou o topo, com top=True)."""
+        self.rows = rows
+        if top:
+            self.offset = 0
+        self.render()
+
+    def changed(self, from_index=0):
+        """Avisa que as linhas a partir de from_index mudaram (inserção/remoção/edição)."""
+        self.render(from_index)
+
+    def selected(self):
+        return self._selected
+
+    def clear_selection(self):
+        self._selected = None
+        self.tree.selection_set(())
+
+    # ---------- Renderização ----------
+    def _window(self):
+        n = len(self.rows)
+        if not self.virtual:
+            return 0, n
+        return self.offset, min(n, self.offset + self.visible + self.buffer)
+
+    def render(self, from_index=0):
+        self._clamp()
+        start, end = self._window()
+        tree = self.tree
+        rendered = self._rendered
+
+        # Linhas antes de from_index não mudaram: o prefixo já desenhado fica como está
+        skip = max(0, min(from_index - start, len(self._shown))) if start == self._first else 0
+        if skip >= end - start and len(self._shown) == skip:
+            self._update_scrollbar()
+            return
+
+        wanted = [self.row_builder(i, self.rows[i]) for i in range(start + skip, end)]
+        wanted_ids = {iid for iid, _, _ in wanted}
+
+        tail = self._shown[skip:]
+        stale = [iid for iid in tail if iid not in wanted_ids]
+        if stale:
+            tree.delete(*stale)
+            for iid in stale:
+                del rendered[iid]
+        current = [iid for iid in tail if iid in wanted_ids]
+
+        for k, (iid, values, tags) in enumerate(wanted):
+            row = (values, tags)
+            if iid in rendered:
+                if rendered[iid] != row:
+                    tree.item(iid, values=values, tags=tags)
+                if current[k] != iid:
+                    tree.move(iid, "", skip + k)
+                    current.remove(iid)
+                    current.insert(k, iid)
+            else:
+                tree.insert("", skip + k, iid=iid, values=values, tags=tags)
+                current.insert(k, iid)
+            rendered[iid] = row
+
+        del self._shown[skip:]
+        self._shown.extend(current)
+        self._first = start
+
+        if self._selected in wanted_ids:
+            tree.selection_set(self._selected)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if not self.virtual:
+            return
+        n = len(self.rows)
+        if n <= self.visible:
+            self.y_scroll.set(0.0, 1.0)
+            return
+        self.y_scroll.set(self.offset / n, min(1.0, (self.offset + self.visible) / n))
+
+    def _clamp(self):
+        max_offset = max(0, len(self.rows) - self.visible)
+        self.offset = max(0, min(self.offset, max_offset))
+
+    def scroll_to(self, offset):
+        self.offset = offset
+        self.render()
+
+    # ---------- Eventos ----------
+    def yview(self, *args):
+        """Comando da barra de rolagem vertical (moveto / scroll)."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2].startswith("page"):
+                step *= max(1, self.visible - 1)
+            self.scroll_to(self.offset + step)
+
+    def _on_configure(self, event):
+        # Desconta a linha de cabeçalho
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            step = -3
+        elif event.num == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.scroll_to(self.offset + step)
+        return "break"
+
+    def _on_select(self, _event=None):
+        sel = self.tree.selection()
+        if sel:
+            self._selected = sel[0]
+        elif self._selected in self._shown:
+            self._selected = None
+
+    def _on_key(self, event):
+        n = len(self.rows)
+        if not n:
+            return "break"
+        if self._selected in self._shown:
+            cur = self.offset + self._shown.index(self._selected)
+        else:
+            cur = self.offset
+        page = max(1, self.visible - 1)
+        step = {"Up": -1, "Down": 1, "Prior": -page, "Next": page, "Home": -n, "End": n}[event.keysym]
+        new = max(0, min(n - 1, cur + step))
+        if new < self.offset:
+            self.offset = new
+        elif new >= self.offset + self.visible:
+            self.offset = new - self.visible + 1
+        self._selected = self.row_builder(new, self.rows[new])[0]
+        self.render()
+        self.tree.focus(self._selected)
+        return "break"
@@ -0,0 +1,293 @@
+# tenants.py
+# Várias carteiras (repositórios de clientes) numa única execução
+# ---------------------------------------------------------------
+# python notify.py --tenants tenants.json
+#
+# Cada carteira ("tenant") tem seu repositório, arquivo e destinatário. As
+# carteiras rodam em paralelo num pool de threads limitado (NOTIFY_WORKERS):
+# download e seleção de cada uma são independentes, e os e-mails saem por
+# um MailerPool com poucas conexões SMTP compartilhadas. A falha de uma
+# carteira (token errado, repositório inexistente, SMTP recusado) fica
+# registrada no resultado dela e não interrompe as outras.
+#
+# Formato do arquivo (JSON; tokens nunca ficam no arquivo, só o nome da
+# variável de ambiente que os contém):
+#   {
+#     "defaults": {"days_thresholds": "30,15,5", "from_name": "3N Licenças"},
+#     "tenants": [
+#       {"name": "matriz", "repo": "org/clientes-matriz", "owner_email": "dono@x.com"},
+#       {"name": "filial", "repo": "org/clientes-filial", "file": "dados/clientes.csv",
+#        "token_env": "FILIAL_GITHUB_TOKEN", "owner_email": "gerente@x.com", "mode": "cliente"}
+#     ]
+#   }
+# Campos por carteira (todos opcionais, exceto repo): name, repo, file,
+# branch, token_env (padrão GITHUB_TOKEN), owner_email, from_name, mode,
+# days_thresholds, shards, shard_dir, email_column, manager_column, ledger.
+# "defaults" vale para todas; o ambiente (GITHUB_*, OWNER_EMAIL...) é o
+# último recurso.
+#
+# Variáveis de ambiente:
+#   NOTIFY_TENANTS  -> arquivo padrão de --tenants
+#   NOTIFY_WORKERS  -> carteiras processadas ao mesmo tempo (padrão 8)
+#   SMTP_CONNECTIONS-> conexões SMTP compartilhadas (padrão 2)
+
+import os
+import re
+import json
+import time
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+import records
+from alerts import montar_mensagens, selecionar_vencimentos
+from dates import today_ordinal
+from expiry import parse_thresholds
+from githubapi import GitHubClient, GitHubError
+from ledger import NotificationLedger
+from mailer import MailerError, MailerPool
+from shards import ShardStore
+
+FIELDS = {
+    "name", "repo", "file", "branch", "token_env", "owner_email", "from_name", "mode",
+    "days_thresholds", "shards", "shard_dir", "email_column", "manager_column", "ledger",
+}
+
+
+class TenantError(RuntimeError):
+    pass
+
+
+def _env(name, default=""):
+    return (os.environ.get(name) or default).strip()
+
+
+def load_tenants(path):
+    """Lista de dicts já com defaults aplicados; levanta TenantError se o arquivo for inválido."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise TenantError(f"Não foi possível ler {path}: {e}")
+    if isinstance(data, list):
+        data = {"tenants": data}
+    if not isinstance(data, dict):
+        raise TenantError(f"{path}: esperado um objeto com 'tenants' ou uma lista de carteiras")
+    defaults = data.get("defaults") or {}
+    if not isinstance(defaults, dict):
+        raise TenantError(f"{path}: 'defaults' deve ser um objeto")
+    entries = data.get("tenants") or []
+    if not isinstance(entries, list):
+        raise TenantError(f"{path}: 'tenants' deve ser uma lista")
+    tenants = []
+    seen = set()
+    for i, raw in enumerate(entries, 1):
+        if not isinstance(raw, dict):
+            raise TenantError(f"Carteira {i}: esperado um objeto, encontrado {type(raw).__name__}")
+        t = {**defaults, **raw}
+        unknown = set(t) - FIELDS
+        if unknown:
+            raise TenantError(f"Carteira {i}: campo(s) desconhecido(s) {', '.join(sorted(unknown))}")
+        if not t.get("repo"):
+            raise TenantError(f"Carteira {i}: 'repo' é obrigatório")
+        t.setdefault("name", t["repo"])
+        if t["name"] in seen:
+            raise TenantError(f"Carteira {t['name']!r} repetida")
+        seen.add(t["name"])
+        tenants.append(t)
+    if not tenants:
+        raise TenantError(f"Nenhuma carteira em {path}")
+    return tenants
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "tenant"
+
+
+class TenantRun:
+    """Processa uma carteira: download, seleção, registro de avisos e envio."""
+
+    def __init__(self, tenant, args, pool):
+        self.t = tenant
+        self.args = args
+        self.pool = pool
+        self.result = {"name": tenant["name"], "repo": tenant["repo"], "status": "ok"}
+
+    def _get(self, key, env=None, default=""):
+        value = self.t.get(key)
+        if value is None or value == "":
+            value = _env(env, default) if env else default
+        return str(value).strip()
+
+    def _github(self):
+        token = _env(self._get("token_env", default="GITHUB_TOKEN"))
+        if not token:
+            raise TenantError(f"token vazio ({self._get('token_env', default='GITHUB_TOKEN')})")
+        return GitHubClient(
+            self.t["repo"], token,
+            file_path=self._get("file", "GITHUB_FILE", "clientes.csv"),
+            branch=self._get("branch", "GITHUB_BRANCH", "main"),
+            api_url=_env("GITHUB_API_URL", "https://api.github.com"),
+            committer={
+                "name": _env("GITHUB_COMMITTER_NAME", "3N Bot"),
+                "email": _env("GITHUB_COMMITTER_EMAIL", "noreply@local"),
+            },
+        )
+
+    def _ledger(self):
+        if self.args.full:
+            return None
+        path = self._get("ledger")
+        if not path:
+            cache_dir = _env("CACHE_DIR")
+            if not cache_dir:
+                return None
+            path = os.path.join(cache_dir, f"notify-ledger-{_slug(self.t['name'])}.json")
+        return NotificationLedger(path)
+
+    def _store(self, gh):
+        scheme = self._get("shards", "GITHUB_SHARDS")
+        if not scheme:
+            return None
+        directory = self._get("shard_dir") or posixpath.splitext(gh.file_path)[0]
+        return ShardStore(gh, scheme, directory)
+
+    def _source(self, gh):
+        """Hash do conteúdo (shards ou arquivo único) sem baixar os dados, como notify.fonte_atual."""
+        store = self._store(gh)
+        fp = store.fingerprint() if store is not None else None
+        return fp if fp is not None else gh.blob_sha()
+
+    def _load(self, gh):
+        store = self._store(gh)
+        if store is not None:
+            clients = store.load()
+            if clients is not None:
+                return clients, store.fingerprint()
+        res = gh.get_file()
+        if res.status != 200:
+            raise GitHubError(f"status {res.status} ao buscar {gh.file_path}")
+        return records.load_clients_from_text(res.text), res.sha
+
+    def run(self):
+        r = self.result
+        t0 = time.perf_counter()
+        gh = None
+        try:
+            thresholds = parse_thresholds(self._get("days_thresholds", "DAYS_THRESHOLDS"))
+            gh = self._github()
+            ledger = self._ledger()
+            hoje = today_ordinal()
+            source = None
+            if ledger is not None:
+                # Mesmo conteúdo já processado hoje: nada a baixar
+                try:
+                    source = self._source(gh)
+                except GitHubError:
+                    source = None  # sem hash: processa normalmente
+                if ledger.unchanged(source, hoje, thresholds):
+                    r["status"] = "inalterado"
+                    return r
+
+            clients, loaded = self._load(gh)
+            source = source or loaded
+            r["fetch_s"] = round(time.perf_counter() - t0, 4)
+            expirados, proximos = selecionar_vencimentos(clients, thresholds)
+            r.update(clientes=len(clients), vencidos=len(expirados), proximos=len(proximos))
+
+            if ledger is not None:
+                expirados, proximos = ledger.filter_new(expirados, proximos, thresholds)
+                ledger.mark_run(source, hoje, thresholds)
+            r["novos"] = len(expirados) + len(proximos)
+            if not r["novos"] and ledger is not None:
+                if not self.args.dry_run:
+                    ledger.save()
+                r["status"] = "nada novo"
+                return r
+            if self.args.dry_run:
+                r["status"] = "dry-run"
+                return r
+
+            cfg = {
+                "SMTP_EMAIL": _env("SMTP_EMAIL"),
+                "OWNER_EMAIL": self._get("owner_email", "OWNER_EMAIL"),
+                "FROM_NAME": self._get("from_name", "FROM_NAME", "3N Licenças"),
+                "EMAIL_COLUMN": self._get("email_column", "EMAIL_COLUMN", "email"),
+                "MANAGER_COLUMN": self._get("manager_column", "MANAGER_COLUMN", "responsavel"),
+            }
+            if not cfg["OWNER_EMAIL"]:
+                raise TenantError("owner_email não definido")
+            mode = self._get("mode", "NOTIFY_MODE", "resumo")
+            mensagens = montar_mensagens(cfg, expirados, proximos, thresholds, mode)
+            t_send = time.perf_counter()
+            falhas = self.pool.send_many(mensagens)
+            r["send_s"] = round(time.perf_counter() - t_send, 4)
+            r["emails"] = len(mensagens) - len(falhas)
+            if falhas:
+                r["falhas"] = [f"{msg['To']}: {erro}" for msg, erro in falhas]
+            if ledger is not None and all(msg is not mensagens[0] for msg, _ in falhas):
+                ledger.save()
+            if falhas:
+                r["status"] = "parcial"
+        except (GitHubError, MailerError, TenantError, OSError, ValueError) as e:
+            r["status"] = "erro"
+            r["error"] = str(e)
+        except Exception as e:  # resposta inesperada/bug numa carteira não derruba o relatório das outras
+            r["status"] = "erro"
+            r["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if gh is not None:
+                gh.close()
+            r["seconds"] = round(time.perf_counter() - t0, 4)
+        return r
+
+
+def run_tenants(tenants, args, workers=None, pool=None):
+    """Processa todas as carteiras; retorna o relatório agregado."""
+    workers = workers or int(_env("NOTIFY_WORKERS", "8"))
+    t0 = time.perf_counter()
+    own_pool = pool is None
+    pool = pool or MailerPool.from_env()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tenants))),
+                                thread_name_prefix="tenant") as ex:
+            results = list(ex.map(lambda t: TenantRun(t, args, pool).run(), tenants))
+    finally:
+        if own_pool:
+            pool.close()
+    wall = time.perf_counter() - t0
+
+    by_status = {}
+    for r in results:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+    slowest = max(results, key=lambda r: r.get("seconds", 0))
+    return {
+        "tenants": results,
+        "aggregate": {
+            "tenants": len(results),
+            "status": by_status,
+            "clientes": sum(r.get("clientes", 0) for r in results),
+            "vencidos": sum(r.get("vencidos", 0) for r in results),
+            "proximos": sum(r.get("proximos", 0) for r in results),
+            "emails": sum(r.get("emails", 0) for r in results),
+            "wall_s": round(wall, 4),
+            "sum_s": round(sum(r.get("seconds", 0) for r in results), 4),
+            "slowest": {"name": slowest["name"], "seconds": slowest.get("seconds", 0)},
+            "smtp": pool.stats,
+        },
+    }
+
+
+def print_report(report):
+    for r in report["tenants"]:
+        icon = {"ok": "✅", "erro": "❌", "parcial": "⚠️"}.get(r["status"], "♻️")
+        detail = r.get("error") or (
+            f"{r.get('clientes', 0)} clientes, {r.get('vencidos', 0)} vencidos, "
+            f"{r.get('proximos', 0)} próximos, {r.get('emails', 0)} e-mail(s)"
+        )
+        print(f"{icon} {r['name']} [{r['status']}] {detail} ({r.get('seconds', 0):.2f}s)")
+        for falha in r.get("falhas", ()):
+            print(f"   ⚠️ {falha}")
+    agg = report["aggregate"]
+    print(f"📊 {agg['tenants']} carteira(s) em {agg['wall_s']:.2f}s "
+          f"(soma {agg['sum_s']:.2f}s, mais lenta {agg['slowest']['name']} {agg['slowest']['seconds']:.2f}s); "
+          f"{agg['emails']} e-mail(s) por {agg['smtp']['connections']} conexão(ões) SMTP")
@@ -0,0 +1,102 @@
+# tests/fakegit.py
+# Git Data API em memória (refs/commits/trees/blobs) para testar shards.py
+# ---------------------------------------------------------------
+# Imita GitHubClient.request/open_raw no que ShardStore usa; PATCH da ref
+# só aceita fast-forward (o pai do commit novo é o head atual), como o
+# GitHub com "force": false.
+
+import io
+import hashlib
+from contextlib import contextmanager
+
+
+class _Response:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = str(self._data)
+
+    def json(self):
+        return self._data
+
+
+def _sha(*parts):
+    return hashlib.sha1("\0".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+class FakeGit:
+    branch = "main"
+    repo = "o/r"
+    file_path = "clientes.csv"
+    committer = {"name": "t", "email": "t@x"}
+
+    def __init__(self, files=None):
+        self.blobs = {}      # sha -> texto
+        self.trees = {}      # sha -> {caminho: sha do blob}
+        self.commits = {}    # sha -> (tree, pai)
+        self.head = None
+        self.requests = 0
+        self.write(files or {})
+
+    # ---------- Ajudantes do teste ----------
+    def _blob(self, text):
+        sha = _sha("blob", text)
+        self.blobs[sha] = text
+        return sha
+
+    def _tree(self, entries):
+        sha = _sha("tree", *sorted(entries.items()))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _commit(self, tree, parent):
+        sha = _sha("commit", tree, parent, len(self.commits))
+        self.commits[sha] = (tree, parent)
+        return sha
+
+    def write(self, files):
+        """Outro editor: commit direto no branch com {caminho: texto ou None}."""
+        entries = dict(self.trees[self.commits[self.head][0]]) if self.head else {}
+        for path, text in files.items():
+            if text is None:
+                entries.pop(path, None)
+            else:
+                entries[path] = self._blob(text)
+        self.head = self._commit(self._tree(entries), self.head)
+
+    def files(self):
+        return {p: self.blobs[s] for p, s in self.trees[self.commits[self.head][0]].items()}
+
+    # ---------- API usada por ShardStore ----------
+    def request(self, method, path, json=None, **kwargs):
+        self.requests += 1
+        path = path.split("?", 1)[0]
+        if method == "GET" and path == f"git/refs/heads/{self.branch}":
+            return _Response(200, {"object": {"sha": self.head}})
+        if method == "GET" and path.startswith("git/commits/"):
+            return _Response(200, {"tree": {"sha": self.commits[path.rsplit("/", 1)[1]][0]}})
+        if method == "GET" and path.startswith("git/trees/"):
+            tree = self.trees[path.rsplit("/", 1)[1]]
+            return _Response(200, {"tree": [{"path": p, "type": "blob", "sha": s} for p, s in tree.items()]})
+        if method == "POST" and path == "git/trees":
+            entries = dict(self.trees[json["base_tree"]])
+            for e in json["tree"]:
+                if e.get("content") is not None:
+                    entries[e["path"]] = self._blob(e["content"])
+                else:
+                    entries.pop(e["path"], None)
+            return _Response(201, {"sha": self._tree(entries)})
+        if method == "POST" and path == "git/commits":
+            return _Response(201, {"sha": self._commit(json["tree"], json["parents"][0])})
+        if method == "PATCH" and path == f"git/refs/heads/{self.branch}":
+            if self.commits[json["sha"]][1] != self.head:
+                return _Response(422, {"message": "Update is not a fast forward"})
+            self.head = json["sha"]
+            return _Response(200, {"object": {"sha": self.head}})
+        return _Response(404, {"message": "Not Found"})
+
+    @contextmanager
+    def open_raw(self, file_path=None, sha=None):
+        if sha is None:
+            sha = self.trees[self.commits[self.head][0]][file_path or self.file_path]
+        yield io.StringIO(self.blobs[sha])
@@ -0,0 +1,40 @@
+# tests/test_columnar.py
+# ClientColumns: coluna de status e snapshot (mmap) usados pelo daemon
+
+import types
+
+from columnar import ClientColumns
+from daemon import WarmClients
+from expiry import GUI_LIMITS, TAG_NAMES
+
+TEXT = "empresa,vencimento\r\nA,01/01/2030\r\nB,15/01/2030\r\nC,\r\nD,01/06/2030\r\n"
+
+
+def test_status_codes_are_a_column_saved_with_the_snapshot(tmp_path):
+    cols = ClientColumns.from_text(TEXT, source="sha1")
+    today = cols.ordinals[0] - 10
+    codes = cols.status(today)
+    assert [TAG_NAMES[c] for c in codes] == ["due_15", "due_month", "normal", "ok_far"]
+    assert cols.codes is codes and cols.codes_key == (today, GUI_LIMITS)
+
+    path = tmp_path / "clientes.snap"
+    cols.save(path)
+    loaded = ClientColumns.load(path, source="sha1")
+    assert loaded.names == ["A", "B", "C", "D"]
+    assert list(loaded.ordinals) == list(cols.ordinals)
+    assert loaded.codes_key == (today, GUI_LIMITS)
+    assert list(loaded.codes) == list(codes)
+    assert loaded.status(today) is loaded.codes  # mesmo dia: não recalcula
+    assert ClientColumns.load(path, source="outra") is None
+
+
+def test_daemon_starts_from_snapshot_without_reparsing(tmp_path):
+    path = tmp_path / "clientes.snap"
+    ClientColumns.from_text(TEXT, source="sha1").save(path)
+    res = types.SimpleNamespace(not_modified=False, status=200, etag='W/"sha1"', sha="sha1", text="lixo")
+    gh = types.SimpleNamespace(get_file=lambda etag=None: res, file_path="clientes.csv")
+
+    warm = WarmClients(gh, snapshot=str(path))
+    assert warm.loaded and warm.source == "sha1"
+    assert warm.refresh() is False  # mesma revisão: o texto baixado não é interpretado
+    assert warm.columns.names == ["A", "B", "C", "D"]
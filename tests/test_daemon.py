@@ -0,0 +1,40 @@
+# tests/test_daemon.py
+# NotifierDaemon: agenda do primeiro check na partida
+
+import types
+from datetime import datetime, time as dtime
+
+import pytest
+
+from daemon import NotifierDaemon
+
+TEXT = "empresa,vencimento\r\nVencido,01/01/2030\r\nProximo,20/01/2030\r\n"
+
+
+@pytest.fixture
+def gh(monkeypatch):
+    monkeypatch.delenv("GITHUB_SHARDS", raising=False)
+    res = types.SimpleNamespace(not_modified=False, status=200, etag='W/"s1"', sha="s1", text=TEXT)
+    return types.SimpleNamespace(get_file=lambda etag=None: res, file_path="clientes.csv")
+
+
+def _start(gh, now):
+    sent = []
+    daemon = NotifierDaemon(gh, (30,), lambda e, p: sent.append((e, p)) or True,
+                            at=dtime(8, 0), clock=lambda: now.timestamp())
+    daemon.stop.set()  # só a partida: run() volta antes do laço
+    daemon.run()
+    return daemon, sent
+
+
+def test_startup_schedules_check_today_at_notify_at(gh):
+    daemon, sent = _start(gh, datetime(2030, 1, 10, 7, 0))
+    assert sent == []  # nada sai na partida, mesmo com cliente vencido
+    assert daemon.metrics.values["next_check_timestamp_seconds"] == datetime(2030, 1, 10, 8, 0).timestamp()
+
+
+def test_startup_after_notify_at_waits_for_next_crossing(gh):
+    daemon, sent = _start(gh, datetime(2030, 1, 10, 9, 0))
+    assert sent == []
+    # "Proximo" vence em 20/01: passa a vencido em 21/01
+    assert daemon.metrics.values["next_check_timestamp_seconds"] == datetime(2030, 1, 21, 8, 0).timestamp()
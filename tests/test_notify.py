@@ -0,0 +1,67 @@
+# tests/test_notify.py
+# notify.py: leitura em fluxo com e sem shards, opções da linha de comando
+
+import pytest
+
+import notify
+from fakegit import FakeGit
+
+STALE = "empresa,vencimento\r\nAntigo,01/01/2030\r\n"
+
+
+@pytest.fixture
+def git():
+    return FakeGit({
+        "clientes.csv": STALE,
+        "clientes/2030-01.csv": "empresa,vencimento\r\nA,01/01/2030\r\n",
+        "clientes/2030-02.csv": "empresa,vencimento\r\nB,02/02/2030\r\nC,03/02/2030\r\n",
+    })
+
+
+def test_stream_reads_shards_in_load_order(git, monkeypatch):
+    monkeypatch.setenv("GITHUB_SHARDS", "month")
+    monkeypatch.delenv("GITHUB_SHARD_DIR", raising=False)
+    stats = {}
+    names = [c.empresa for c in notify.stream_clients_from_github(git, stats)]
+    assert names == ["A", "B", "C"]
+    assert stats["clientes"] == 3
+    assert "2 shards" in stats["origem"]
+
+
+def test_stream_uses_single_file_without_shards(git, monkeypatch):
+    monkeypatch.delenv("GITHUB_SHARDS", raising=False)
+    names = [c.empresa for c in notify.stream_clients_from_github(git)]
+    assert names == ["Antigo"]
+
+
+def test_invalid_notify_parallel_does_not_break_help(monkeypatch, capsys):
+    monkeypatch.setenv("NOTIFY_PARALLEL", "oito")
+    monkeypatch.setattr("sys.argv", ["notify.py", "--help"])
+    with pytest.raises(SystemExit) as exc:
+        notify.main()
+    assert exc.value.code == 0
+    assert notify.parallel_from_env() == 0
+    assert "NOTIFY_PARALLEL inválido" in capsys.readouterr().out
+
+
+def test_invalid_parallel_argument_is_a_usage_error(monkeypatch):
+    monkeypatch.delenv("NOTIFY_PARALLEL", raising=False)
+    monkeypatch.setattr("sys.argv", ["notify.py", "--parallel", "-2"])
+    with pytest.raises(SystemExit) as exc:
+        notify.main()
+    assert exc.value.code == 2
+
+
+@pytest.mark.parametrize("argv, env", [
+    (["--stream", "--parallel", "2"], {}),
+    ([], {"GITHUB_STREAM": "1", "NOTIFY_PARALLEL": "2"}),
+])
+def test_stream_and_parallel_are_exclusive(monkeypatch, argv, env):
+    for name in ("GITHUB_STREAM", "NOTIFY_PARALLEL"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr("sys.argv", ["notify.py", *argv])
+    with pytest.raises(SystemExit) as exc:
+        notify.main()
+    assert exc.value.code == 2
@@ -0,0 +1,59 @@
+# tests/test_shards.py
+# ShardStore.push: conflitos de ref e merge de três vias
+
+from fakegit import FakeGit
+from records import Client, load_clients_from_text
+from shards import ShardStore
+
+
+def _names(git, directory="clientes"):
+    clients = []
+    for path, text in sorted(git.files().items()):
+        if path.startswith(directory + "/"):
+            clients.extend(load_clients_from_text(text))
+    return sorted(c.empresa for c in clients)
+
+
+def _store(git):
+    return ShardStore(git, "month", "clientes")
+
+
+def test_push_from_captured_state_merges_after_a_later_fetch():
+    git = FakeGit()
+    store = _store(git)
+    store.push(store.split([Client("A", "01/01/2030")]), "init")
+    store.load()
+    state = store.state()
+
+    other = _store(git)
+    other.load()
+    other.push(other.split(other.parse(other.base) + [Client("X", "02/02/2030")]), "other")
+
+    local = store.split(store.parse(state["base"]) + [Client("L", "03/03/2030")])
+    store.load()  # download enfileirado antes do envio adianta head/base
+    merged = store.push(local, "local", state=state)
+    assert merged is not None
+    assert _names(git) == ["A", "L", "X"]
+
+
+def test_conflict_without_base_keeps_remote_only_shards():
+    git = FakeGit()
+    _store(git).push(_store(git).split([Client("A", "01/01/2030"), Client("R", "05/05/2031")]), "remote")
+
+    store = _store(git)        # nunca carregou: sem base nem head conhecido
+    store.head, store.tree = git.head, git.commits[git.head][0]
+    git.write({"outro.txt": "x"})  # o branch anda: o envio recebe 422
+    merged = store.push(store.split([Client("A", "01/01/2030"), Client("L", "03/03/2030")]), "local")
+    assert merged is not None
+    assert _names(git) == ["A", "L", "R"]
+
+
+def test_conflict_before_any_remote_shard_retries_on_new_head():
+    git = FakeGit({"clientes.csv": "empresa,vencimento\r\nA,01/01/2030\r\n"})
+    store = _store(git)
+    store.load()
+    store.adopt([Client("A", "01/01/2030")])
+    git.write({"README.md": "outro commit"})
+    assert store.push(store.split([Client("A", "01/01/2030")]), "migrate") is None
+    assert _names(git) == ["A"]
+    assert "README.md" in git.files()
@@ -0,0 +1,69 @@
+# tests/test_sync.py
+# Envio da GUI intercalado com um download (worker FIFO), contra o fake do GitHub
+
+import types
+
+import pytest
+
+appScreens = pytest.importorskip("appScreens")
+
+from bench.fake_github import FakeGitHub
+from csvcache import ContentCache
+from githubapi import GitHubClient, push_clients_csv
+from records import load_clients_from_text
+
+App = appScreens.App
+FILE = "clientes.csv"
+
+
+@pytest.fixture
+def fake():
+    with FakeGitHub() as gh:
+        yield gh
+
+
+def _app(fake, tmp_path):
+    """Só o que os métodos de sincronização usam (sem janela)."""
+    gh = GitHubClient("o/r", "t", api_url=fake.api_url)
+    app = types.SimpleNamespace(
+        cache=ContentCache(tmp_path / FILE),
+        shards=None, _synced=None, _github=lambda: gh,
+    )
+    for name in ("_fetch_github_csv", "_push_github_internal", "_push_snapshot", "_sync_state"):
+        setattr(app, name, types.MethodType(getattr(App, name), app))
+    return app, gh
+
+
+def _remote(fake):
+    return sorted(c.empresa for c in load_clients_from_text(fake.files[FILE].decode("utf-8")))
+
+
+def test_fetch_queued_before_push_does_not_erase_remote_rows(fake, tmp_path):
+    fake.files[FILE] = b"empresa,vencimento\r\nA,01/01/2030\r\n"
+    app, gh = _app(fake, tmp_path)
+    app._fetch_github_csv()
+    app._synced = app._sync_state()
+
+    # Outro editor grava X
+    other = gh.get_file()
+    push_clients_csv(gh, (other.text + "X,02/02/2030\r\n").encode(), "other", base_text=other.text, sha=other.sha)
+
+    # Edição local: snapshot e base capturados juntos na thread do Tk
+    snapshot, base = b"empresa,vencimento\r\nA,01/01/2030\r\nL,03/03/2030\r\n", app._synced
+    # ...mas um download enfileirado antes roda primeiro e atualiza o cache
+    app._fetch_github_csv()
+
+    merged, state = app._push_snapshot("local", snapshot, base)
+    assert merged is not None
+    assert _remote(fake) == ["A", "L", "X"]
+    assert state["sha"] == gh.get_file().sha
+
+
+def test_push_without_concurrent_changes_needs_no_merge(fake, tmp_path):
+    fake.files[FILE] = b"empresa,vencimento\r\nA,01/01/2030\r\n"
+    app, _ = _app(fake, tmp_path)
+    app._fetch_github_csv()
+    merged, _ = app._push_snapshot("local", b"empresa,vencimento\r\nA,01/01/2030\r\nL,03/03/2030\r\n",
+                                   app._sync_state())
+    assert merged is None
+    assert _remote(fake) == ["A", "L"]
@@ -0,0 +1,125 @@
+# timing.py
+# Medição de tempo por etapa (spans): fetch, decode, parse, classify...
+# ---------------------------------------------------------------
+# Desligado por padrão: span() devolve um contexto nulo compartilhado e
+# timed() só confere uma flag, então o custo sem medição é desprezível.
+# Ligado (notify.py --profile, GUI), cada span guarda contagem, total,
+# máximo e a última duração por nome, além de uma linha do tempo curta
+# (início relativo, duração, thread) para o relatório JSON.
+#
+# Nomes usados: fetch, decode, parse, classify, compose, smtp.connect,
+# smtp.send, push, export, table.refresh, index.build.
+
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+_enabled = False
+_lock = threading.Lock()
+_t0 = time.perf_counter()
+_stats = {}                   # nome -> [contagem, total, máximo, última]
+_events = deque(maxlen=2000)  # (nome, início desde _t0, duração, thread)
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    global _t0
+    with _lock:
+        _stats.clear()
+        _events.clear()
+        _t0 = time.perf_counter()
+
+
+def record(name, start, seconds):
+    with _lock:
+        st = _stats.get(name)
+        if st is None:
+            _stats[name] = [1, seconds, seconds, seconds]
+        else:
+            st[0] += 1
+            st[1] += seconds
+            st[3] = seconds
+            if seconds > st[2]:
+                st[2] = seconds
+        _events.append((name, start - _t0, seconds, threading.current_thread().name))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """with span("parse"): ... — mede o bloco se a medição estiver ligada."""
+    return _Span(name) if _enabled else _NULL
+
+
+def timed(name):
+    """Decorador equivalente a span() em volta da função inteira."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def last(name):
+    """Duração (s) da última execução do span, ou None."""
+    st = _stats.get(name)
+    return st[3] if st else None
+
+
+def summary():
+    """{nome: {count, total_s, max_s, last_s}} em ordem de primeira ocorrência."""
+    with _lock:
+        return {
+            name: {"count": c, "total_s": round(t, 6), "max_s": round(m, 6), "last_s": round(l, 6)}
+            for name, (c, t, m, l) in _stats.items()
+        }
+
+
+def events():
+    with _lock:
+        return [{"span": n, "start_s": round(s, 6), "seconds": round(d, 6), "thread": th}
+                for n, s, d, th in _events]